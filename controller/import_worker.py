@@ -0,0 +1,123 @@
+# controller/import_worker.py
+# تحميل DXF + التثليث + الإكسترود على QThreadPool بعيداً عن خيط الواجهة
+
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from tools.extrude_tool import ExtrudeTool
+
+
+class ImportSignals(QObject):
+    """إشارات العامل — تصل إلى خيط الواجهة كـ queued signals."""
+    progress = pyqtSignal(str, float)      # (المرحلة، نسبة 0..1)
+    preview = pyqtSignal(object)           # ProfileGeometry بعد التثليث (عرض 2D) — العامل لا يعدّله بعدها
+    finished = pyqtSignal(object, object)  # (ProfileGeometry, ExtrudedMesh أو None)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class ImportWorker(QRunnable):
+    """parse → tessellate → extrude في خيط عامل؛ الواجهة تنشئ الـ actors فقط."""
+
+    def __init__(self, dxf_cache, file_path, depth=60.0, flip=False):
+        super().__init__()
+        self.dxf_cache = dxf_cache
+        self.file_path = file_path
+        self.depth = depth
+        self.flip = flip
+        self.signals = ImportSignals()
+        self.timings = {}
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        try:
+            # 1️⃣ قراءة الملف (عبر الكاش)
+            t0 = time.perf_counter()
+            profile = self.dxf_cache.load(
+                self.file_path,
+                progress=lambda f: self.signals.progress.emit("parse", f),
+                cancel=self._cancel.is_set,
+            )
+            t1 = time.perf_counter()
+            self.timings["parse"] = t1 - t0
+            if self.is_cancelled:
+                self.signals.cancelled.emit()
+                return
+            if profile is None:
+                self.signals.failed.emit("no valid geometry")
+                return
+
+            # 2️⃣ تحويل الحلقات إلى polydata — وكل كاش البروفايل (flattened، التثليث،
+            #    polydata النسخ للعرض) يُملأ هنا قبل إرساله للواجهة؛ بعد preview لا
+            #    يلمس العامل البروفايل إطلاقاً (الإكسترود يقرأ polydata الخاص به فقط)
+            polydata = profile.to_polydata()
+            profile.vtk_instances()
+            t2 = time.perf_counter()
+            self.timings["tessellate"] = t2 - t1
+            self.signals.progress.emit("tessellate", 1.0)
+            if self.is_cancelled:
+                self.signals.cancelled.emit()
+                return
+            self.signals.preview.emit(profile)
+
+            # 3️⃣ الإكسترود (محرك NumPy)
+            extruded = ExtrudeTool.create_extruded(polydata, depth=self.depth, flip=self.flip)
+            self.timings["extrude"] = time.perf_counter() - t2
+            self.signals.progress.emit("extrude", 1.0)
+            if self.is_cancelled:
+                self.signals.cancelled.emit()
+                return
+            self.signals.finished.emit(profile, extruded)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+
+class BatchSignals(QObject):
+    progress = pyqtSignal(int, int)   # (ملفات منتهية، العدد الكلي)
+    finished = pyqtSignal(object)     # BatchReport (قد يكون ملغى جزئياً)
+    failed = pyqtSignal(str)
+
+
+class BatchImportWorker(QRunnable):
+    """استيراد مجلد كامل (ProcessPool) من خيط عامل — الواجهة لا تتجمد أثناء الدفعة.
+
+    الناتج تقرير فقط: البروفايلات تُحفظ في كاش الـ DXF ولا تُنقل للواجهة، وفتح
+    أي ملف منها لاحقاً (import_file) يأتي من الكاش فوراً.
+    """
+
+    def __init__(self, folder, cache_dir=None):
+        super().__init__()
+        self.folder = folder
+        self.cache_dir = cache_dir
+        self.signals = BatchSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        from core.batch_import import batch_import
+        try:
+            report = batch_import(
+                self.folder,
+                cache_dir=self.cache_dir,
+                progress=self.signals.progress.emit,
+                cancel=self._cancel.is_set,
+                keep_profiles=False,
+            )
+            self.signals.finished.emit(report)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
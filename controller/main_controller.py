@@ -1,66 +1,216 @@
 # controller/main_controller.py
 
-import os
+import numpy as np
 import vtk
-from model.occ_model import OCCModel
+from model.occ_model import OCCModel, LOD_LEVELS
+from PyQt5.QtCore import QThreadPool
 from PyQt5.QtWidgets import QFileDialog
 
+# ألوان قائمة القص (لون لكل طول مختلف)
+CUT_LIST_PALETTE = (
+    (0.35, 0.65, 0.95), (0.95, 0.65, 0.30), (0.45, 0.85, 0.45),
+    (0.90, 0.45, 0.55), (0.70, 0.55, 0.95), (0.95, 0.90, 0.40),
+)
+
 class MainController:
     def __init__(self, viewer):
         self.model = OCCModel()
         self.viewer = viewer
+        # إعدادات الإكسترود الحالية (تتغير من لوحة الخصائص بدون إعادة بناء)
+        # الاتجاه دائماً عمودي المقطع؛ flip يعكسه فقط (محور داخل المستوى = حجم صفري)
+        self.extrude_depth = 60.0
+        self.extrude_flip = False
+        self.extruded = None
+        self.extruded_id = None   # كائن المجسم في المشهد (لتحديثه بعد تعديل العمق)
+        # الاستيراد في الخلفية: العامل الحالي + دالة اختيارية (stage, fraction) لعرض التقدم
+        self._import_worker = None
+        self._batch_worker = None
+        self.last_batch_report = None   # BatchReport آخر دفعة (بدون البروفايلات — في الكاش)
+        self.on_progress = None
 
     def import_dxf(self):
-        """فتح ملف DXF وتحميله للعارض مع توليد إكسترود ثلاثي الأبعاد."""
+        """فتح ملف DXF وتحميله للعارض مع توليد إكسترود ثلاثي الأبعاد (في الخلفية)."""
         file_path, _ = QFileDialog.getOpenFileName(
             None, "Open DXF File", "", "DXF Files (*.dxf)"
         )
         if not file_path:
             return
+        return self.import_file(file_path)
 
-        print(f"📂 [DXF] جاري تحميل الملف: {file_path}")
-        shape = self.model.import_dxf(file_path)
-        if not shape:
-            print("❌ فشل تحميل DXF")
-            return
-
-        # 🔹 تحويل الشكل إلى polydata أو STL مؤقت
-        polydata_or_path = self.model.shape_to_temp_stl(shape)
-
-        # ⚙️ في حال أرجعت الدالة مسار ملف STL (نصّي) وليس vtkPolyData
-        if isinstance(polydata_or_path, str):
-            print("🧩 [DXF] الشكل حُفظ كـ STL مؤقت، سيتم تحميله للعرض فقط.")
-            self.viewer.display_stl(polydata_or_path, color=(0.5, 0.8, 1.0))
-            return
-
-        polydata = polydata_or_path
-        print(
-            f"🔹 [DXF] نقاط={polydata.GetNumberOfPoints()}, خطوط={polydata.GetNumberOfLines()}, أسطح={polydata.GetNumberOfPolys()}")
-
-        # 🔹 توليد إكسترود من الشكل 2D بشكل آمن
-        from tools.extrude_tool import ExtrudeTool
-        solid = ExtrudeTool.create_extrude(polydata, depth=60.0, axis="Y")
+    def import_file(self, file_path):
+        """parse/tessellate/extrude على QThreadPool — الواجهة لا تتجمد والعرض 2D يظهر أولاً."""
+        from controller.import_worker import ImportWorker
 
-        if solid and solid.GetNumberOfPoints() > 0:
-            self.viewer.display_stl(solid, color=(0.35, 0.65, 0.95))
-            print("🧱 [DXF→Extrude] تم إنشاء مجسم الإكسترود بنجاح ✅")
+        self._cancel_file_import()
+        print(f"📂 [DXF] جاري تحميل الملف: {file_path}")
+        worker = ImportWorker(self.model.dxf_cache, file_path, self.extrude_depth, self.extrude_flip)
+        worker.signals.progress.connect(self._on_import_progress)
+        worker.signals.preview.connect(lambda profile: self._on_import_preview(worker, profile))
+        worker.signals.finished.connect(lambda profile, extruded: self._on_import_finished(worker, profile, extruded))
+        worker.signals.failed.connect(lambda error: self._on_import_failed(worker, error))
+        worker.signals.cancelled.connect(lambda: self._on_import_cancelled(worker))
+        self._import_worker = worker
+        QThreadPool.globalInstance().start(worker)
+        return worker
+
+    def cancel_import(self):
+        """إيقاف الاستيراد الجاري (ملف واحد أو دفعة، إن وجد)."""
+        self.cancel_batch_import()
+        self._cancel_file_import()
+
+    def _cancel_file_import(self):
+        worker = self._import_worker
+        if worker is not None and not worker.is_cancelled:
+            worker.cancel()
+            print(f"⏹️ [DXF] إلغاء: {worker.file_path}")
+
+    def _on_import_progress(self, stage, fraction):
+        if self.on_progress:
+            self.on_progress(stage, fraction)
+
+    def _on_import_preview(self, worker, profile):
+        # 🔹 عرض خطوط 2D فور انتهاء القراءة، قبل جاهزية المجسم
+        if worker is self._import_worker and not worker.is_cancelled:
+            self.viewer.display_profile(profile)
+
+    def _on_import_finished(self, worker, profile, extruded):
+        if worker is not self._import_worker:
+            return  # نتيجة استيراد قديم تم استبداله
+        self._import_worker = None
+        self.model.set_profile(profile)
+        self.extruded = extruded
+        self.extruded_id = None
+        stages = ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in worker.timings.items())
+
+        # الواجهة تنشئ الـ actor فقط — كل الحساب تم في الخلفية
+        if extruded is not None and extruded.polydata.GetNumberOfPoints() > 0:
+            self.extruded_id = self.viewer.display_stl(extruded.polydata, color=(0.35, 0.65, 0.95), source=extruded)
+            print(f"🧱 [DXF→Extrude] تم إنشاء مجسم الإكسترود بنجاح ✅ ({stages})")
         else:
             print("⚠️ [DXF→Extrude] فشل إنشاء المجسم من DXF (الشكل فارغ أو غير صالح).")
-
-        print(f"✅ DXF imported and processed: {file_path}")
+        if self.on_progress:
+            self.on_progress("done", 1.0)
+        print(f"✅ DXF imported and processed: {worker.file_path}")
+
+    def _on_import_failed(self, worker, error):
+        if worker is self._import_worker:
+            self._import_worker = None
+        print(f"❌ فشل تحميل DXF: {worker.file_path} — {error}")
+
+    def _on_import_cancelled(self, worker):
+        if worker is self._import_worker:
+            self._import_worker = None
+        print(f"⏹️ [DXF] تم الإلغاء: {worker.file_path}")
+
+    def set_extrude_depth(self, depth):
+        """تغيير طول الإكسترود الحالي لحظياً (تعديل نقاط الغطاء العلوي والجدران فقط)."""
+        self.extrude_depth = float(depth)
+        self._update_extrusion()
+
+    def set_extrude_flip(self, flip):
+        """عكس اتجاه الإكسترود (على عمودي المقطع)."""
+        self.extrude_flip = bool(flip)
+        self._update_extrusion()
+
+    def _update_extrusion(self):
+        if self.extruded is None:
+            return
+        self.extruded.update(self.extrude_depth, self.extruded.section.direction(self.extrude_flip))
+        if self.extruded_id is not None:
+            self.viewer.refresh_mesh(self.extruded_id)
+
+    def show_cut_list(self, lengths, gap=20.0, colors=None):
+        """عرض قائمة قص للبروفايل الحالي كنسخ (mesh واحد على الـ GPU مهما كان عدد القطع).
+
+        القطع مصفوفة جنباً إلى جنب على X بفاصل gap؛ القطع بنفس الطول لها نفس اللون.
+        """
+        profile = self.model.current_profile
+        if profile is None:
+            print("⚠️ [CutList] لا يوجد بروفايل محمّل")
+            return None
+        from tools.extrude_tool import ExtrudeTool
+        # المقطع نفسه (لا create_cut_list) ليبقى مصدراً للتحديد: مثلث → حلقة/ضلع
+        section = ExtrudeTool.section(profile.to_polydata())
+        if section is None:
+            print("⚠️ [CutList] لا توجد حلقات مغلقة في البروفايل")
+            return None
+        try:
+            unit, stretches = section.extrude_instances(lengths, section.direction(self.extrude_flip))
+        except ValueError as e:
+            print(f"⚠️ [CutList] {e}")
+            return None
+
+        x0, x1 = unit.GetBounds()[:2]
+        pitch = (x1 - x0) + gap
+        matrices = []
+        for i, stretch in enumerate(stretches):
+            placement = np.eye(4)
+            placement[0, 3] = i * pitch
+            matrices.append(placement @ stretch)
+        if colors is None:
+            palette = {length: CUT_LIST_PALETTE[i % len(CUT_LIST_PALETTE)]
+                       for i, length in enumerate(dict.fromkeys(lengths))}
+            colors = [palette[length] for length in lengths]
+
+        object_id = self.viewer.add_instances(unit, matrices, colors, name="cut list", source=section)
+        self.viewer.fit_view()
+        print(f"📏 [CutList] {len(lengths)} قطعة، {len(set(lengths))} طول مختلف ✅")
+        return object_id
+
+    def batch_import(self):
+        """استيراد مجلد كامل من ملفات DXF على عدة أنوية (في الخلفية) مع تقرير لكل ملف."""
+        folder = QFileDialog.getExistingDirectory(None, "Select DXF Folder", "")
+        if not folder:
+            return
+        return self.batch_import_folder(folder)
+
+    def batch_import_folder(self, folder):
+        from controller.import_worker import BatchImportWorker
+
+        self.cancel_batch_import()
+        print(f"📂 [Batch] جاري استيراد المجلد: {folder}")
+        worker = BatchImportWorker(folder, cache_dir=self.model.dxf_cache.cache_dir)
+        worker.signals.progress.connect(self._on_batch_progress)
+        worker.signals.finished.connect(lambda report: self._on_batch_finished(worker, report))
+        worker.signals.failed.connect(lambda error: self._on_batch_failed(worker, error))
+        self._batch_worker = worker
+        QThreadPool.globalInstance().start(worker)
+        return worker
+
+    def cancel_batch_import(self):
+        """إيقاف الدفعة الجارية: الملفات المنتظرة تُلغى والجارية فقط تكتمل."""
+        worker = self._batch_worker
+        if worker is not None and not worker.is_cancelled:
+            worker.cancel()
+            print(f"⏹️ [Batch] إلغاء: {worker.folder}")
+
+    def _on_batch_progress(self, done, total):
+        if self.on_progress:
+            self.on_progress("batch", done / max(total, 1))
+
+    def _on_batch_finished(self, worker, report):
+        if worker is self._batch_worker:
+            self._batch_worker = None
+        # الملفات أصبحت في كاش الـ DXF: فتح أي منها بعد الآن (import_file) فوري
+        self.last_batch_report = report
+        print(report.summary())
+        if self.on_progress:
+            self.on_progress("done", 1.0)
+
+    def _on_batch_failed(self, worker, error):
+        if worker is self._batch_worker:
+            self._batch_worker = None
+        print(f"❌ فشل استيراد المجلد: {worker.folder} — {error}")
 
     def create_box(self):
         shape = self.model.make_box(50, 50, 30)
-        stl_path = self.model.shape_to_temp_stl(shape)
-        if stl_path:
-            try:
-                self.viewer.display_stl(stl_path, color=(0.53, 0.81, 0.92))
-            finally:
-                # احذف الملف المؤقت بعد العرض
-                try: os.remove(stl_path)
-                except: pass
-                print("✅ Box created, moving +20 on X")
-                self.move_selected(20, 0, 0)
+        if self.model.shape_lod(shape, LOD_LEVELS[0]) is None:
+            return
+        # أخشن مستوى فوراً، والعارض يرفع الدقة حسب حجم الشكل على الشاشة
+        self.viewer.display_lod(lambda level: self.model.shape_lod(shape, level),
+                                LOD_LEVELS, color=(0.53, 0.81, 0.92), source=shape)
+        print("✅ Box created, moving +20 on X")
+        self.move_selected(20, 0, 0)
 
     def move_selected(self, dx=0, dy=0, dz=0):
         """تحريك العنصر المحدد (آمن بدون كراش)"""
@@ -70,6 +220,14 @@ class MainController:
 
         actor = self.viewer._last_actor
 
+        # كائنات المشهد: تعديل مصفوفة الكائن (يبقى الـ BVH متزامناً)
+        object_id = self.viewer.object_for_actor(actor) if hasattr(self.viewer, "object_for_actor") else None
+        if object_id is not None:
+            self.viewer.move_object(object_id, dx, dy, dz)
+            self.viewer.request_render()
+            print(f"[MOVE] تم تحريك الكائن #{object_id} ({dx}, {dy}, {dz}) ✅")
+            return
+
         try:
             # قراءة الـ matrix الحالي
             old_matrix = vtk.vtkMatrix4x4()
@@ -86,7 +244,7 @@ class MainController:
             actor.PokeMatrix(new_matrix)
 
             # إعادة رسم المشهد
-            self.viewer.render_window.Render()
+            self.viewer.request_render()
             print(f"[MOVE] تم تحريك العنصر ({dx}, {dy}, {dz}) بدون كراش ✅")
 
         except Exception as e:
@@ -0,0 +1,130 @@
+# core/batch_import.py
+# Batch import of a folder of profile DXFs on a process pool
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from core.dxf_cache import DXFCache
+from core.dxf_loader import load_dxf_profile
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one file. profile is a ProfileGeometry (plain NumPy arrays,
+    so it pickles back to the parent cheaply), or None on failure or when the
+    batch was run with keep_profiles=False (loops/vertices are still filled)."""
+    file_path: str
+    ok: bool
+    profile: object = None
+    error: str = ""
+    timings: dict = field(default_factory=dict)
+    loops: int = 0
+    vertices: int = 0
+
+
+# How often a running batch checks its cancel callback (seconds)
+CANCEL_POLL_INTERVAL = 0.1
+
+
+@dataclass
+class BatchReport:
+    results: list
+    wall_time: float
+    workers: int
+    cancelled: bool = False
+
+    @property
+    def succeeded(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    def summary(self):
+        lines = [
+            f"📦 [Batch] {len(self.succeeded)}/{len(self.results)} files imported "
+            f"in {self.wall_time:.2f}s on {self.workers} workers"
+            + (" (cancelled)" if self.cancelled else "")
+        ]
+        for r in self.results:
+            stages = ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in r.timings.items())
+            status = "✅" if r.ok else "❌"
+            error = f" — {r.error}" if r.error else ""
+            size = f"{r.loops} loops, " if r.ok else ""
+            lines.append(f"   {status} {Path(r.file_path).name} ({size}{stages}){error}")
+        return "\n".join(lines)
+
+
+def find_dxf_files(folder, recursive=True):
+    """All *.dxf files in folder (case-insensitive), sorted."""
+    pattern = "**/*" if recursive else "*"
+    return sorted(str(p) for p in Path(folder).glob(pattern)
+                  if p.is_file() and p.suffix.lower() == ".dxf")
+
+
+def _import_one(file_path, cache_dir, keep_profile=True):
+    """Worker: parse + tessellate one file (runs in a child process)."""
+    timings = {}
+    try:
+        t0 = time.perf_counter()
+        if cache_dir is not None:
+            profile = DXFCache(cache_dir).load(file_path)
+        else:
+            profile = load_dxf_profile(file_path)
+        t1 = time.perf_counter()
+        timings["parse"] = t1 - t0
+        if profile is None:
+            return BatchResult(file_path, False, error="no valid geometry", timings=timings)
+        profile.tessellate()
+        timings["tessellate"] = time.perf_counter() - t1
+        return BatchResult(file_path, True, profile=profile if keep_profile else None, timings=timings,
+                           loops=profile.num_loops, vertices=profile.num_vertices)
+    except Exception as e:
+        return BatchResult(file_path, False, error=str(e), timings=timings)
+
+
+def batch_import(paths, workers=None, cache_dir=None, progress=None, cancel=None, keep_profiles=True):
+    """Import many DXFs in parallel.
+
+    paths:     folder or list of files
+    workers:   process count (default: all cores)
+    cache_dir: DXFCache directory, or None to always parse
+    keep_profiles: False → only the report comes back (no profile payloads
+               pickled to the parent); with a cache_dir the files are then
+               parsed into the cache and open instantly later
+    progress:  optional callback(done, total)
+    cancel:    optional callback returning True to stop; polled every
+               CANCEL_POLL_INTERVAL, queued files are dropped and only the
+               files already running are waited for
+    """
+    if isinstance(paths, (str, os.PathLike)) and Path(paths).is_dir():
+        files = find_dxf_files(paths)
+    else:
+        files = [str(p) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(files) or 1))
+
+    t0 = time.perf_counter()
+    results = []
+    cancelled = False
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_import_one, f, cache_dir, keep_profiles) for f in files}
+        while pending:
+            done, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                results.append(future.result())
+                if progress:
+                    progress(len(results), len(files))
+            if cancel and cancel():
+                pool.shutdown(wait=False, cancel_futures=True)
+                cancelled = True
+                print("⏹️ [Batch] Cancelled")
+                break
+
+    order = {f: i for i, f in enumerate(files)}
+    results.sort(key=lambda r: order[r.file_path])
+    return BatchReport(results, time.perf_counter() - t0, workers, cancelled)
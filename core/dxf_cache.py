@@ -0,0 +1,202 @@
+# core/dxf_cache.py
+# On-disk cache of parsed DXF profiles, keyed by file content hash + loader version
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from core.dxf_loader import LOADER_VERSION, load_dxf_profile
+from core.profile_geometry import ProfileGeometry
+
+# Anchored to the package root (not the cwd) so the app, batch import and the
+# CLI all share one cache; ALUMPRO_DXF_CACHE overrides the location
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+CACHE_ENV = "ALUMPRO_DXF_CACHE"
+CACHE_DIR = Path(os.environ.get(CACHE_ENV) or PACKAGE_ROOT / "data" / "cache" / "dxf")
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+_PROFILE_ARRAYS = ("vertices", "bulges", "offsets", "closed", "kinds", "sources")
+_INSTANCE_ARRAYS = ("instance_geometry", "instance_matrices", "instance_sources")
+_MESH_ARRAYS = ("points", "loop_offsets")
+_HASH_CHUNK = 1024 * 1024
+
+log = logging.getLogger(__name__)
+
+
+class DXFCache:
+    """Persistent cache of ProfileGeometry arrays + their tessellation.
+
+    Every entry is a directory of plain .npy files, read back with
+    mmap_mode="r", so a hit costs one file hash and a few mmaps.
+    The total size is capped; least recently used entries are evicted.
+
+    Entries are versioned ("<key>.<stamp>") and never written over: put()
+    stores a new version and discards the old ones. Windows refuses to delete
+    files that a live profile still maps; such leftovers lose their meta.json
+    (so they no longer count as entries) and are removed by a later evict().
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir).expanduser().resolve()
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # -------------------------------------------------------------
+    # Keys
+    # -------------------------------------------------------------
+    @staticmethod
+    def key_for(file_path):
+        """sha256 of the file content, suffixed with the loader version."""
+        h = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                h.update(chunk)
+        return f"{h.hexdigest()}-v{LOADER_VERSION}"
+
+    def _versions(self, key):
+        """Complete versions of key, oldest first."""
+        return sorted(p.parent for p in self.cache_dir.glob(f"{key}.*/meta.json"))
+
+    # -------------------------------------------------------------
+    # Get / put
+    # -------------------------------------------------------------
+    def get(self, key):
+        """Return the cached ProfileGeometry (memory-mapped) or None."""
+        versions = self._versions(key)
+        if not versions:
+            return None
+        entry = versions[-1]
+        try:
+            meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+            profile = _load_arrays(entry)
+            if meta.get("shared"):
+                shared = [_load_arrays(entry / "shared" / str(i)) for i in range(meta["shared"])]
+                profile.set_instances(shared, *(np.load(entry / f"{name}.npy", mmap_mode="r")
+                                                for name in _INSTANCE_ARRAYS))
+            if meta.get("tessellation") is not None:
+                profile.set_tessellation(
+                    meta["tessellation"],
+                    *(np.load(entry / f"{name}.npy", mmap_mode="r") for name in _MESH_ARRAYS),
+                )
+        except Exception as e:
+            log.warning("[DXFCache] Corrupt entry %s removed: %s", key, e)
+            _discard(entry)
+            return None
+
+        os.utime(entry)  # LRU: mark as recently used
+        return profile
+
+    def put(self, key, profile):
+        """Store the profile (and its current tessellation, if any) as a new version of key."""
+        old = self._versions(key)
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir))
+        try:
+            _save_arrays(tmp, profile)
+            for i, geom in enumerate(profile.shared):
+                _save_arrays(tmp / "shared" / str(i), geom)
+            if profile.num_instances:
+                for name in _INSTANCE_ARRAYS:
+                    np.save(tmp / f"{name}.npy", np.asarray(getattr(profile, name)))
+            params = profile.tessellation_params
+            if params is not None:
+                points, loop_offsets = profile.tessellate(*params)
+                np.save(tmp / "points.npy", np.asarray(points))
+                np.save(tmp / "loop_offsets.npy", np.asarray(loop_offsets))
+            meta = {"loader_version": LOADER_VERSION,
+                    "shared": len(profile.shared),
+                    "tessellation": list(params) if params is not None else None}
+            (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+            # a fresh name: the old versions may still be memory-mapped
+            os.replace(tmp, self.cache_dir / f"{key}.{time.time_ns():016x}")
+        except Exception as e:
+            log.warning("[DXFCache] Failed to store %s: %s", key, e)
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        for entry in old:
+            _discard(entry)
+        self.evict()
+
+    def load(self, file_path, progress=None, cancel=None):
+        """load_dxf_profile() through the cache."""
+        key = self.key_for(file_path)
+        profile = self.get(key)
+        if profile is not None:
+            log.debug("[DXFCache] Hit: %s", file_path)
+            return profile
+
+        profile = load_dxf_profile(file_path, progress, cancel)
+        if profile is not None:
+            profile.tessellate()
+            self.put(key, profile)
+        return profile
+
+    # -------------------------------------------------------------
+    # Size cap / LRU eviction
+    # -------------------------------------------------------------
+    def _entries(self):
+        """[(mtime, size, path)] of all complete entries."""
+        entries = []
+        for meta in self.cache_dir.glob("*/meta.json"):
+            entry = meta.parent
+            if entry.name.startswith(".tmp-"):
+                continue
+            size = sum(f.stat().st_size for f in entry.rglob("*.npy"))
+            entries.append((entry.stat().st_mtime, size, entry))
+        return entries
+
+    def _collect(self):
+        """Retry removing discarded versions (no meta.json) that were still mapped."""
+        for entry in self.cache_dir.iterdir():
+            if entry.is_dir() and not entry.name.startswith(".tmp-") and not (entry / "meta.json").exists():
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes."""
+        self._collect()
+        entries = sorted(self._entries(), key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            _discard(entry)
+            total -= size
+
+    def clear(self):
+        for _, _, entry in self._entries():
+            _discard(entry)
+        self._collect()
+
+
+def _discard(entry):
+    """Drop an entry: meta.json first (it stops being an entry at once), then the
+    files. Whatever is still memory-mapped on Windows stays for _collect()."""
+    try:
+        (entry / "meta.json").unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        log.warning("[DXFCache] Cannot discard %s: %s", entry.name, e)
+        return
+    shutil.rmtree(entry, ignore_errors=True)
+
+
+def _save_arrays(folder, profile):
+    folder.mkdir(parents=True, exist_ok=True)
+    for name in _PROFILE_ARRAYS:
+        np.save(folder / f"{name}.npy", np.asarray(getattr(profile, name)))
+
+
+def _load_arrays(folder):
+    return ProfileGeometry(**{name: np.load(folder / f"{name}.npy", mmap_mode="r")
+                              for name in _PROFILE_ARRAYS})
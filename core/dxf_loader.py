@@ -1,148 +1,502 @@
-# ✅ DXF Loader (Legacy Stable) - يعمل مع AutoCAD / Fusion / Corel / SolidWorks
-# يدعم LINE, LWPOLYLINE, CIRCLE, ARC, SPLINE
-# لا يكراش حتى مع ملفات كبيرة
+# ✅ DXF Loader (Streaming) - يعمل مع AutoCAD / Fusion / Corel / SolidWorks
+# يدعم LINE, LWPOLYLINE, CIRCLE, ARC, SPLINE, INSERT (البلوكات كنسخ مشتركة)
+# يقرأ الـ modelspace مرة واحدة كتيار (stream) بدون تحميل المستند كاملاً
+# الناتج ProfileGeometry (NumPy)، وحواف OCC تُبنى فقط عند الحاجة
 
+import os
 import ezdxf
+import logging
 import math
-import vtk
-from OCC.Core.BRepBuilderAPI import (
-    BRepBuilderAPI_MakeEdge, BRepBuilderAPI_Transform
-)
-from OCC.Core.BRep import BRep_Builder, BRep_Tool
-from OCC.Core.TopoDS import TopoDS_Compound
-from OCC.Core.TopExp import TopExp_Explorer
-from OCC.Core.TopAbs import TopAbs_EDGE
-from OCC.Core.gp import gp_Pnt, gp_Dir, gp_Trsf, gp_Ax1, gp_Circ, gp_Ax2
-from OCC.Core.GeomAPI import GeomAPI_PointsToBSpline
-from OCC.Core.TColgp import TColgp_Array1OfPnt
-
-
-def load_dxf_shape(file_path):
-    """تحميل DXF من أي برنامج وتحويله إلى Compound ثلاثي الأبعاد"""
-    try:
-        doc = ezdxf.readfile(file_path)
-    except Exception as e:
-        print("❌ Failed to read DXF:", e)
-        return None
+import numpy as np
+from ezdxf.addons import iterdxf
 
-    msp = doc.modelspace()
-    edges = []
+from core.profile_geometry import ProfileBuilder, ProfileGeometry, KIND_SPLINE, handle_to_source
+from core.loop_assembler import assemble_profile, signed_area
+from core.tessellation import CHORD_TOLERANCE, ANGLE_TOLERANCE, edges_to_polydata
 
-    # ---------- LINE ----------
-    for line in msp.query("LINE"):
-        s, e = line.dxf.start, line.dxf.end
-        edges.append(
-            BRepBuilderAPI_MakeEdge(
-                gp_Pnt(s[0], s[1], 0),
-                gp_Pnt(e[0], e[1], 0)
-            ).Edge()
-        )
-
-    # ---------- LWPOLYLINE ----------
-    for poly in msp.query("LWPOLYLINE"):
-        pts = poly.get_points("xy")
-        n = len(pts)
-        if n < 2:
-            continue
-        closed = poly.closed
-        for i in range(n):
-            x1, y1 = pts[i]
-            x2, y2 = pts[(i + 1) % n]
-            if i == n - 1 and not closed:
-                break
-            edges.append(
-                BRepBuilderAPI_MakeEdge(
-                    gp_Pnt(x1, y1, 0),
-                    gp_Pnt(x2, y2, 0)
-                ).Edge()
-            )
-
-    # ---------- CIRCLE ----------
-    for circ in msp.query("CIRCLE"):
-        c = circ.dxf.center
-        r = circ.dxf.radius
-        circ_ax2 = gp_Ax2(gp_Pnt(c[0], c[1], 0), gp_Dir(0, 0, 1))
-        circle = gp_Circ(circ_ax2, r)
-        edges.append(BRepBuilderAPI_MakeEdge(circle).Edge())
-
-    # ---------- ARC ----------
-    for arc in msp.query("ARC"):
-        c = arc.dxf.center
-        r = arc.dxf.radius
-        start_angle = math.radians(arc.dxf.start_angle)
-        end_angle = math.radians(arc.dxf.end_angle)
-        circ_ax2 = gp_Ax2(gp_Pnt(c[0], c[1], 0), gp_Dir(0, 0, 1))
-        circle = gp_Circ(circ_ax2, r)
-        edges.append(
-            BRepBuilderAPI_MakeEdge(circle, start_angle, end_angle).Edge()
-        )
-
-    # ---------- SPLINE ----------
-    for spline in msp.query("SPLINE"):
-        fit_points = spline.fit_points
-        n = len(fit_points)
-        if n >= 2:
-            arr = TColgp_Array1OfPnt(1, n)
-            for i, pt in enumerate(fit_points, start=1):
-                arr.SetValue(i, gp_Pnt(pt[0], pt[1], 0))
-            bspline = GeomAPI_PointsToBSpline(arr).Curve()
-            edges.append(BRepBuilderAPI_MakeEdge(bspline).Edge())
-
-    if not edges:
-        print("❌ No valid geometry found in DXF.")
-        return None
+log = logging.getLogger(__name__)
+
+# رقم إصدار المحمّل — غيّره عند تغيّر شكل الناتج (يُبطل الكاش على القرص)
+LOADER_VERSION = 6
+
+# عدد الكيانات بين كل استدعاء لـ progress / cancel (حتى لا تصبح عبئاً)
+PROGRESS_EVERY = 500
+
+# دقة تقسيم الـ SPLINE عند التحميل (mm)
+SPLINE_FLATTENING = 0.01
+
+
+# -------------------------------------------------------------
+# محوّلات الكيانات — كل محوّل يضيف حلقة/حلقات إلى ProfileBuilder
+# -------------------------------------------------------------
+def _convert_line(line, builder):
+    s, e = line.dxf.start, line.dxf.end
+    builder.add_line(s[0], s[1], e[0], e[1])
 
-    # ---------- COMPOUND ----------
-    builder = BRep_Builder()
-    compound = TopoDS_Compound()
-    builder.MakeCompound(compound)
-    for e in edges:
-        builder.Add(compound, e)
-
-    # ---------- ROTATE SHAPE ----------
-    trsf = gp_Trsf()
-    trsf.SetRotation(
-        gp_Ax1(gp_Pnt(0, 0, 0), gp_Dir(1, 0, 0)),
-        math.radians(-90)
+
+def _convert_lwpolyline(poly, builder):
+    pts = np.asarray(poly.get_points("xyb"), dtype=np.float64).reshape(-1, 3)
+    builder.add_loop(pts[:, :2], pts[:, 2], closed=poly.closed)
+
+
+def _convert_circle(circ, builder):
+    c = circ.dxf.center
+    builder.add_circle(c[0], c[1], circ.dxf.radius)
+
+
+def _convert_arc(arc, builder):
+    c = arc.dxf.center
+    builder.add_arc(
+        c[0], c[1], arc.dxf.radius,
+        math.radians(arc.dxf.start_angle),
+        math.radians(arc.dxf.end_angle),
     )
-    rotated_shape = BRepBuilderAPI_Transform(compound, trsf, True).Shape()
 
-    print(f"✅ DXF loaded successfully: {file_path}")
-    return rotated_shape
 
+def _convert_spline(spline, builder):
+    # نقاط الـ fit إن وجدت، وإلا تقسيم المنحنى من نقاط التحكم
+    if len(spline.fit_points) >= 2:
+        pts = np.asarray(spline.fit_points, dtype=np.float64)[:, :2]
+    else:
+        pts = np.asarray(list(spline.flattening(SPLINE_FLATTENING)), dtype=np.float64)[:, :2]
+    closed = spline.closed and len(pts) > 2 and np.allclose(pts[0], pts[-1])
+    if closed:
+        pts = pts[:-1]
+    builder.add_loop(pts, closed=closed, kind=KIND_SPLINE)
 
-def extract_closed_loops_from_edges(shape):
-    """يحول الشكل المركب إلى حلقات مغلقة داخل vtkPolyData"""
-    explorer = TopExp_Explorer(shape, TopAbs_EDGE)
-    points = vtk.vtkPoints()
-    lines_array = vtk.vtkCellArray()
-    pid = 0
 
-    while explorer.More():
-        edge = explorer.Current()
-        curve_handle, first, last = BRep_Tool.Curve(edge)
-        if curve_handle is None:
-            explorer.Next()
+def _convert_insert(insert, builder):
+    # المصفوفة هنا بدون نقطة الأساس (base point) — تُضاف عند قراءة البلوك
+    ins = insert.dxf.insert
+    angle = math.radians(insert.dxf.get("rotation", 0.0))
+    sx, sy = insert.dxf.get("xscale", 1.0), insert.dxf.get("yscale", 1.0)
+    c, s = math.cos(angle), math.sin(angle)
+    rot_scale = np.array(((c * sx, -s * sy), (s * sx, c * sy)))
+
+    # MINSERT: شبكة من النسخ، الإزاحات في اتجاه الدوران
+    cols, rows = insert.dxf.get("column_count", 1), insert.dxf.get("row_count", 1)
+    dc, dr = insert.dxf.get("column_spacing", 0.0), insert.dxf.get("row_spacing", 0.0)
+    for r in range(rows):
+        for k in range(cols):
+            m = np.eye(3)
+            m[:2, :2] = rot_scale
+            m[0, 2] = ins[0] + c * k * dc - s * r * dr
+            m[1, 2] = ins[1] + s * k * dc + c * r * dr
+            builder.add_insert(insert.dxf.name, m)
+
+
+CONVERTERS = {
+    "LINE": _convert_line,
+    "LWPOLYLINE": _convert_lwpolyline,
+    "CIRCLE": _convert_circle,
+    "ARC": _convert_arc,
+    "SPLINE": _convert_spline,
+    "INSERT": _convert_insert,
+}
+
+
+# -------------------------------------------------------------
+# تنظيف الملفات "المتسخة": حذف المكرر والمتراكب والقطع الصفرية
+# -------------------------------------------------------------
+# المسافة التي تُعتبر عندها نقطتان/خطان متطابقين (mm)
+HEAL_TOLERANCE = 1e-4
+# دقة تجميع الاتجاهات عند البحث عن الخطوط المتراكبة (radians)
+HEAL_ANGLE_QUANTUM = 1e-6
+
+
+class HealReport:
+    """إحصائيات التنظيف — كم قطعة وكم طول أُزيل."""
+
+    def __init__(self):
+        self.zero_length = 0
+        self.duplicate_loops = 0
+        self.duplicate_arcs = 0
+        self.overlapping_lines = 0
+        self.length_before = 0.0
+        self.length_after = 0.0
+
+    @property
+    def removed(self):
+        return self.zero_length + self.duplicate_loops + self.duplicate_arcs + self.overlapping_lines
+
+    @property
+    def removed_length(self):
+        return self.length_before - self.length_after
+
+    def summary(self):
+        return (f"zero_length={self.zero_length}, duplicate_loops={self.duplicate_loops}, "
+                f"duplicate_arcs={self.duplicate_arcs}, overlapping_lines={self.overlapping_lines}, "
+                f"removed_length={self.removed_length:.3f}mm "
+                f"({100 * self.removed_length / max(self.length_before, 1e-12):.1f}%)")
+
+
+def _total_length(profile):
+    starts, ends = profile.segments()
+    chord = np.hypot(*(profile.vertices[ends] - profile.vertices[starts]).T)
+    theta = np.abs(4.0 * np.arctan(profile.bulges[starts]))
+    half = np.sin(theta / 2.0)
+    arc = half > 0
+    length = chord.copy()
+    length[arc] = theta[arc] * chord[arc] / (2.0 * half[arc])
+    return float(length.sum())
+
+
+def _drop_zero_length(profile, tol, report):
+    """يحذف نقطة بداية كل قطعة طولها صفر، ثم الحلقات التي لم يبقَ منها شيء."""
+    starts, ends = profile.segments()
+    gap = np.hypot(*(profile.vertices[ends] - profile.vertices[starts]).T)
+    keep = np.ones(profile.num_vertices, dtype=bool)
+    keep[starts[gap <= tol]] = False
+    report.zero_length += int((~keep).sum())
+
+    loop_id = np.repeat(np.arange(profile.num_loops), np.diff(profile.offsets))
+    sizes = np.bincount(loop_id[keep], minlength=profile.num_loops)
+    # حلقة مغلقة من نقطتين تحتاج أقواساً، وإلا فهي ذهاب وإياب على نفس الخط
+    loop_bulge = np.bincount(loop_id[keep], weights=np.abs(profile.bulges[keep]), minlength=profile.num_loops)
+    valid = (sizes >= 2) & ~(profile.closed & (sizes == 2) & (loop_bulge == 0))
+    keep &= valid[loop_id]
+    sizes = np.where(valid, sizes, 0)
+
+    offsets = np.concatenate(([0], np.cumsum(sizes[valid]))).astype(np.int64)
+    return ProfileGeometry(profile.vertices[keep], profile.bulges[keep], offsets,
+                           profile.closed[valid], profile.kinds[valid], profile.sources[keep])
+
+
+def _canonical_loop(verts, bulges, tol):
+    """(key, vertices, bulges) لحلقة مغلقة بشكل قياسي لا يعتمد على نقطة البداية أو الاتجاه.
+
+    النقاط تُقرّب إلى tol، وتبدأ الحلقة من أصغر نقطة، ويُختار الاتجاه الأصغر
+    ترتيباً (العكس يقلب إشارة الـ bulge وينقله إلى الضلع المقابل).
+    """
+    q = np.round(verts / tol).astype(np.int64)
+    n = len(q)
+    start = np.lexsort((q[:, 1], q[:, 0]))[0]
+    steps = np.arange(n)
+    fwd = (start + steps) % n
+    rev = (start - steps) % n
+    qb = np.round(bulges / HEAL_ANGLE_QUANTUM).astype(np.int64)
+    candidates = [
+        (fwd, bulges[fwd], qb[fwd]),
+        (rev, -bulges[(rev - 1) % n], -qb[(rev - 1) % n]),
+    ]
+    idx, b, kb = min(candidates, key=lambda c: (q[c[0]].tolist(), c[2].tolist()))
+    key = (n, q[idx].tobytes(), kb.tobytes())
+    return key, verts[idx], b
+
+
+def heal_profile(profile, tol=HEAL_TOLERANCE):
+    """ينظف القطع المكررة والمتراكبة والصفرية في O(n log n).
+
+    - الحلقات المغلقة المكررة (نفس النقاط والأقواس بأي بداية أو اتجاه) تُحذف.
+    - القطع المفتوحة تُفكك إلى قطع مفردة:
+      * الأقواس المكررة تُحذف،
+      * الخطوط المتوازية على نفس المستقيم تُجمّع بالفرز (شبكة اتجاه/إزاحة)
+        وتُدمج فتراتها المتداخلة (بأكثر من tol) في خط واحد؛ الخطوط المتلامسة
+        طرفاً لطرف تبقى كما هي ويربطها مجمّع الحلقات.
+    مصدر كل قطعة (profile.sources) يبقى معها؛ الخط المدمج يأخذ مصدر أول خط فيه.
+    يعيد (ProfileGeometry, HealReport).
+    """
+    report = HealReport()
+    report.length_before = _total_length(profile)
+    profile = _drop_zero_length(profile, tol, report)
+
+    builder = ProfileBuilder()
+    seen_loops = {}
+    open_ids = []
+    for i in range(profile.num_loops):
+        verts, bulges, closed, kind = profile.loop(i)
+        if not closed:
+            if kind == KIND_SPLINE:
+                builder.add_loop(verts, bulges, closed, kind, profile.loop_sources(i))
+            else:
+                open_ids.append(i)
+            continue
+        key, cv, cb = _canonical_loop(verts, bulges, tol)
+        # المفتاح مقرّب؛ المطابقة الفعلية بمقارنة المصفوفات كاملة
+        if any(np.allclose(cv, v, rtol=0.0, atol=tol) and np.allclose(cb, b, rtol=0.0, atol=HEAL_ANGLE_QUANTUM)
+               for v, b in seen_loops.get(key, ())):
+            report.duplicate_loops += 1
             continue
+        seen_loops.setdefault(key, []).append((cv, cb))
+        builder.add_loop(verts, bulges, closed, kind, profile.loop_sources(i))
+
+    if open_ids:
+        # ---------- تفكيك القطع المفتوحة ----------
+        starts, ends = profile.segments()
+        loop_of = np.searchsorted(profile.offsets, starts, side="right") - 1
+        mask = np.isin(loop_of, open_ids)
+        p1, p2 = profile.vertices[starts[mask]], profile.vertices[ends[mask]]
+        b = profile.bulges[starts[mask]]
+        src = profile.sources[starts[mask]]
+
+        # ---------- الأقواس المكررة (بأي اتجاه) ----------
+        arc = b != 0.0
+        if arc.any():
+            a1, a2, ab = p1[arc], p2[arc], b[arc]
+            # قوس معكوس = نفس القوس: نرتب طرفيه ونعكس إشارة الـ bulge
+            flip = (a1[:, 0] > a2[:, 0]) | ((a1[:, 0] == a2[:, 0]) & (a1[:, 1] > a2[:, 1]))
+            c1 = np.where(flip[:, None], a2, a1)
+            c2 = np.where(flip[:, None], a1, a2)
+            cb = np.where(flip, -ab, ab)
+            keys = np.round(np.column_stack((c1, c2, cb)) / tol).astype(np.int64)
+            _, first = np.unique(keys, axis=0, return_index=True)
+            report.duplicate_arcs += int(arc.sum() - len(first))
+            for j in np.sort(first):
+                builder.add_loop((a1[j], a2[j]), (ab[j], 0.0), source=src[arc][j])
 
-        num_segments = 20
-        loop_ids = []
-        for i in range(num_segments + 1):
-            u = first + (last - first) * i / num_segments
-            pnt = curve_handle.Value(u)
-            points.InsertNextPoint(pnt.X(), pnt.Y(), pnt.Z())
-            loop_ids.append(pid)
-            pid += 1
+        # ---------- الخطوط المتراكبة على نفس المستقيم ----------
+        line = ~arc
+        if line.any():
+            l1, l2 = p1[line], p2[line]
+            line_src = src[line]
+            d = l2 - l1
+            ang = np.mod(np.arctan2(d[:, 1], d[:, 0]), np.pi)
+            u = np.column_stack((np.cos(ang), np.sin(ang)))
+            n = np.column_stack((-u[:, 1], u[:, 0]))
+            offset = np.einsum("ij,ij->i", l1, n)
+            t1, t2 = np.einsum("ij,ij->i", l1, u), np.einsum("ij,ij->i", l2, u)
+            lo, hi = np.minimum(t1, t2), np.maximum(t1, t2)
+            lo_pt = np.where((t1 <= t2)[:, None], l1, l2)
+            hi_pt = np.where((t1 <= t2)[:, None], l2, l1)
 
-        id_list = vtk.vtkIdList()
-        for i in loop_ids:
-            id_list.InsertNextId(i)
-        lines_array.InsertNextCell(id_list)
+            ka = np.round(ang / HEAL_ANGLE_QUANTUM).astype(np.int64)
+            ka[ka == int(round(np.pi / HEAL_ANGLE_QUANTUM))] = 0   # 0 و π نفس الاتجاه
+            ko = np.round(offset / tol).astype(np.int64)
+            order = np.lexsort((lo, ko, ka))
 
+            merged = 0
+            cur = order[0]
+            cur_hi, cur_hi_pt = hi[cur], hi_pt[cur]
+            for j in order[1:]:
+                same_line = ka[j] == ka[cur] and ko[j] == ko[cur]
+                if same_line and lo[j] < cur_hi - tol:
+                    merged += 1
+                    if hi[j] > cur_hi:
+                        cur_hi, cur_hi_pt = hi[j], hi_pt[j]
+                    continue
+                builder.add_line(*lo_pt[cur], *cur_hi_pt, source=line_src[cur])
+                cur, cur_hi, cur_hi_pt = j, hi[j], hi_pt[j]
+            builder.add_line(*lo_pt[cur], *cur_hi_pt, source=line_src[cur])
+            report.overlapping_lines += merged
+
+    healed = builder.build()
+    report.length_after = _total_length(healed) if healed is not None else 0.0
+    return healed, report
+
+
+# -------------------------------------------------------------
+# قراءة الـ modelspace كتيار
+# -------------------------------------------------------------
+class DXFSource:
+    """مصدر كيانات DXF: iterdxf كتيار (كيان واحد في كل مرة)، أو readfile كبديل.
+
+    iterdxf يبقي الذاكرة ثابتة تقريباً مهما كبر الملف. الملفات التي
+    لا يقبلها (DXF ثنائي أو R12 ناقص) تُقرأ بالطريقة التقليدية.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._stream = None
+        self._doc = None
+        try:
+            self._stream = iterdxf.opendxf(file_path)
+        except Exception as e:
+            log.debug("[DXF] Streaming unavailable (%s), falling back to readfile", e)
+            self._doc = ezdxf.readfile(file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def modelspace(self, progress=None):
+        """يمر على كيانات الـ modelspace مرة واحدة مع تقرير التقدم (0..1)."""
+        types = list(CONVERTERS)
+        if self._doc is not None:
+            entities = self._doc.modelspace().query(" ".join(types))
+            total = max(len(entities), 1)
+            for i, entity in enumerate(entities, start=1):
+                if progress and i % PROGRESS_EVERY == 0:
+                    progress(i / total)
+                yield entity
+            return
+
+        size = max(os.path.getsize(self.file_path), 1)
+        for i, entity in enumerate(self._stream.modelspace(types=types), start=1):
+            if progress and i % PROGRESS_EVERY == 0:
+                progress(min(self._stream.file.tell() / size, 1.0))
+            yield entity
+
+    def read_blocks(self):
+        """{name: (base_point (2,), ProfileBuilder)} لكل تعريف بلوك (عدا الـ layouts)."""
+        blocks = {}
+        if self._doc is not None:
+            for block in self._doc.blocks:
+                if block.block_record.is_any_layout:
+                    continue
+                builder = ProfileBuilder()
+                for entity in block.query(" ".join(CONVERTERS)):
+                    CONVERTERS[entity.dxftype()](entity, builder)
+                base = block.block.dxf.base_point
+                blocks[block.name] = (np.array((base[0], base[1])), builder)
+            return blocks
+
+        if "BLOCKS" not in self._stream.sections:
+            return blocks
+        types = set(CONVERTERS) | {"BLOCK", "ENDBLK"}
+        current = None
+        for entity in self._stream.load_entities(self._stream.sections["BLOCKS"] + 1, types):
+            kind = entity.dxftype()
+            if kind == "BLOCK":
+                name = entity.dxf.name
+                if name.lower().startswith(("*model_space", "*paper_space")):
+                    current = None
+                    continue
+                base = entity.dxf.base_point
+                current = ProfileBuilder()
+                blocks[name] = (np.array((base[0], base[1])), current)
+            elif kind == "ENDBLK":
+                current = None
+            elif current is not None:
+                CONVERTERS[kind](entity, current)
+        return blocks
+
+
+def _finish_profile(builder, allow_empty=False):
+    """build → heal → assemble لحلقات builder (بدون البلوكات)."""
+    profile = builder.build()
+    if profile is None:
+        return ProfileGeometry.empty() if allow_empty else None
+
+    # ---------- حذف المكرر والمتراكب ----------
+    profile, heal = heal_profile(profile)
+    if profile is None:
+        return ProfileGeometry.empty() if allow_empty else None
+    if heal.removed:
+        log.debug("[DXF] Healed: %s", heal.summary())
+
+    # ---------- ربط القطع في حلقات مغلقة ومرتبة ----------
+    assembly = assemble_profile(profile)
+    if not assembly.ok:
+        log.warning("[DXF] Open chains found: %s", assembly.diagnostics())
+    return assembly.to_profile()
+
+
+def _resolve_blocks(inserts, blocks):
+    """يحوّل مراجع البلوكات (بما فيها المتداخلة) إلى نسخ فوق هندسة مشتركة.
+
+    كل بلوك يُحوّل مرة واحدة فقط؛ النسخ المتداخلة تُجمع مصفوفاتها.
+    يعيد (shared, geometry_ids, matrices, sources) — مصدر كل نسخة هو handle الـ INSERT
+    في الـ modelspace الذي وضعها (حتى لو جاءت عبر بلوكات متداخلة).
+    """
+    shared = []
+    index = {}      # name -> index in shared (-1 = no own geometry)
+    expanded = {}   # name -> [(geometry id, matrix)] in block coordinates
+
+    def expand(name, stack):
+        if name in expanded:
+            return expanded[name]
+        if name not in blocks:
+            log.warning("[DXF] Missing block definition: %s", name)
+            return []
+        if name in stack:
+            log.warning("[DXF] Recursive block reference ignored: %s", name)
+            return []
+
+        base, builder = blocks[name]
+        to_base = np.eye(3)
+        to_base[:2, 2] = -base
+
+        if name not in index:
+            geom = _finish_profile(builder)
+            index[name] = len(shared) if geom is not None and geom.num_loops else -1
+            if index[name] >= 0:
+                shared.append(geom)
+
+        out = []
+        if index[name] >= 0:
+            out.append((index[name], to_base))
+        for child, placement, _ in builder.inserts:
+            for g, m in expand(child, stack | {name}):
+                out.append((g, to_base @ placement @ m))
+        expanded[name] = out
+        return out
+
+    ids, matrices, sources = [], [], []
+    for name, placement, source in inserts:
+        for g, m in expand(name, frozenset()):
+            ids.append(g)
+            matrices.append(placement @ m)
+            sources.append(source)
+    return (shared, np.array(ids, dtype=np.int64), np.array(matrices, dtype=np.float64).reshape(-1, 3, 3),
+            np.array(sources, dtype=np.int64))
+
+
+def load_dxf_profile(file_path, progress=None, cancel=None):
+    """تحميل DXF إلى ProfileGeometry (مصفوفات NumPy بدون حواف OCC)
+
+    progress: دالة اختيارية تستقبل نسبة التقدم (0..1)
+    cancel:   دالة اختيارية تعيد True لإيقاف التحميل (تُرجع None عندها)
+    """
+    builder = ProfileBuilder()
+    blocks = {}
+    try:
+        with DXFSource(file_path) as source:
+            for i, entity in enumerate(source.modelspace(progress), start=1):
+                if cancel and i % PROGRESS_EVERY == 0 and cancel():
+                    log.debug("[DXF] Loading cancelled: %s", file_path)
+                    return None
+                # handle الكيان يُختم على قطعه (ProfileGeometry.sources) — للتحديد لاحقاً
+                builder.source = handle_to_source(entity.dxf.get("handle"))
+                CONVERTERS[entity.dxftype()](entity, builder)
+            if builder.inserts:
+                blocks = source.read_blocks()
+    except Exception as e:
+        log.error("[DXF] Failed to read %s: %s", file_path, e)
+        return None
+
+    if progress:
+        progress(1.0)
+
+    profile = _finish_profile(builder, allow_empty=bool(builder.inserts))
+    if profile is not None and builder.inserts:
+        profile.set_instances(*_resolve_blocks(builder.inserts, blocks))
+
+    if profile is None or (profile.num_loops == 0 and profile.num_instances == 0):
+        log.error("[DXF] No valid geometry found in %s", file_path)
+        return None
+
+    log.debug("[DXF] Loaded %s (loops=%d, vertices=%d, blocks=%d, instances=%d)", file_path,
+              profile.num_loops, profile.num_vertices, len(profile.shared), profile.num_instances)
+    return profile
+
+
+def load_dxf_shape(file_path, progress=None, cancel=None):
+    """تحميل DXF من أي برنامج وتحويله إلى Compound ثلاثي الأبعاد"""
+    profile = load_dxf_profile(file_path, progress, cancel)
+    if profile is None:
+        return None
+    return profile.to_occ_shape()
+
+
+def extract_closed_loops_from_edges(shape, chord_tol=CHORD_TOLERANCE, angle_tol=ANGLE_TOLERANCE):
+    """يحول الشكل المركب إلى حلقات داخل vtkPolyData (تقسيم حسب التفاوت المسموح)"""
+    # OCC فقط هنا — بقية المحمّل يعمل بدونه (مثلاً أداة التحويل بدون واجهة)
+    from OCC.Core.TopExp import TopExp_Explorer
+    from OCC.Core.TopAbs import TopAbs_EDGE
+
+    edges = []
+    explorer = TopExp_Explorer(shape, TopAbs_EDGE)
+    while explorer.More():
+        edges.append(explorer.Current())
         explorer.Next()
 
-    poly = vtk.vtkPolyData()
-    poly.SetPoints(points)
-    poly.SetLines(lines_array)
-    print(f"✅ DXF→PolyData: عدد النقاط = {points.GetNumberOfPoints()}, عدد الخطوط = {lines_array.GetNumberOfCells()}")
-    return poly
\ No newline at end of file
+    poly = edges_to_polydata(edges, chord_tol, angle_tol)
+    log.debug("[DXF] Edges → PolyData: %d points, %d lines", poly.GetNumberOfPoints(), poly.GetNumberOfLines())
+    return poly
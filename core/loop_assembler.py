@@ -0,0 +1,303 @@
+# core/loop_assembler.py
+# Chains unordered DXF pieces into ordered, oriented closed loops using a hash grid
+
+import math
+import numpy as np
+
+from core.profile_geometry import ProfileGeometry, KIND_POLYLINE, KIND_SPLINE
+
+# Endpoints closer than this are joined (mm) — absorbs tiny gaps in exported files
+JOIN_TOLERANCE = 0.01
+
+
+class LoopAssembly:
+    """Result of assemble_loops().
+
+    loops:       [(vertices (k, 2), bulges (k,), kind)] closed loops; outer
+                 boundaries are CCW, holes (odd nesting depth) are CW
+    depths:      nesting depth of every loop (0 = outer boundary)
+    open_chains: [(vertices, bulges, kind)] chains whose ends found no partner
+    max_gap:     largest endpoint gap that was closed
+    sources:     [(k,) int64] source entity of every loop segment (-1 = unknown)
+    open_sources: the same for open_chains
+    """
+
+    def __init__(self, loops, depths, open_chains, max_gap, sources=None, open_sources=None):
+        self.loops = loops
+        self.depths = depths
+        self.open_chains = open_chains
+        self.max_gap = max_gap
+        self.sources = sources if sources is not None else _unknown_sources(loops)
+        self.open_sources = open_sources if open_sources is not None else _unknown_sources(open_chains)
+
+    @property
+    def ok(self):
+        return not self.open_chains
+
+    def diagnostics(self):
+        msg = f"loops={len(self.loops)}, open_chains={len(self.open_chains)}, max_gap={self.max_gap:.4g}"
+        for verts, _, _ in self.open_chains[:10]:
+            (x1, y1), (x2, y2) = verts[0], verts[-1]
+            msg += f"\n   ⚠️ open chain ({x1:.3f}, {y1:.3f}) → ({x2:.3f}, {y2:.3f}), {len(verts)} vertices"
+        return msg
+
+    def faces(self):
+        """[(outer, [holes])] loop indices: every even-depth loop with the
+        odd-depth loops directly inside it (smallest containing outer wins)."""
+        depths = np.asarray(self.depths, dtype=np.int64)
+        outers = np.flatnonzero(depths % 2 == 0)
+        holes_of = {int(o): [] for o in outers}
+        holes = np.flatnonzero(depths % 2 == 1)
+        if len(holes):
+            pts, offsets = LoopAssembly(self.loops, [], [], 0.0).to_profile(keep_open=False).tessellate()
+            areas = np.array([abs(signed_area(v, b)) for v, b, _ in self.loops])
+            for h in holes:
+                probe = self.loops[h][0][:1]
+                parents = [o for o in outers[depths[outers] == depths[h] - 1]
+                           if _points_in_polygon(probe, pts[offsets[o]:offsets[o + 1]])[0]]
+                if parents:
+                    holes_of[int(min(parents, key=lambda o: areas[o]))].append(int(h))
+        return list(holes_of.items())
+
+    def to_profile(self, keep_open=True):
+        """ProfileGeometry of the closed loops (+ open chains as open loops)."""
+        items = [(v, b, True, k, s) for (v, b, k), s in zip(self.loops, self.sources)]
+        if keep_open:
+            items += [(v, b, False, k, s) for (v, b, k), s in zip(self.open_chains, self.open_sources)]
+        if not items:
+            return None
+        sizes = [len(v) for v, _, _, _, _ in items]
+        offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        return ProfileGeometry(
+            np.concatenate([v for v, _, _, _, _ in items]),
+            np.concatenate([b for _, b, _, _, _ in items]),
+            offsets,
+            np.array([c for _, _, c, _, _ in items], dtype=bool),
+            np.array([k for _, _, _, k, _ in items], dtype=np.int8),
+            np.concatenate([s for _, _, _, _, s in items]),
+        )
+
+
+def _unknown_sources(loops):
+    return [np.full(len(item[0]), -1, dtype=np.int64) for item in loops]
+
+
+# -------------------------------------------------------------
+# Endpoint matching
+# -------------------------------------------------------------
+def _match_endpoints(ends, tol):
+    """partner[i] = index of the endpoint joined to endpoint i (or -1).
+
+    Endpoints are bucketed into a grid of cell size tol; only the 3x3
+    neighbouring cells are searched, so matching is near-linear. Pairs are
+    accepted closest-first so each endpoint joins at most one other.
+    """
+    cells = np.floor(ends / tol).astype(np.int64).tolist()
+    xy = ends.tolist()
+    grid = {}
+    for i, (cx, cy) in enumerate(cells):
+        grid.setdefault((cx, cy), []).append(i)
+
+    pairs = []
+    for i, (cx, cy) in enumerate(cells):
+        x, y = xy[i]
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in grid.get((cx + dx, cy + dy), ()):
+                    # j > i: each pair once; i ^ 1: the other end of the same piece
+                    if j > i and j != (i ^ 1):
+                        d = math.hypot(x - xy[j][0], y - xy[j][1])
+                        if d <= tol:
+                            pairs.append((d, i, j))
+
+    partner = np.full(len(ends), -1, dtype=np.int64)
+    for d, i, j in sorted(pairs):
+        if partner[i] < 0 and partner[j] < 0:
+            partner[i], partner[j] = j, i
+    return partner
+
+
+def _oriented(piece, forward):
+    """(vertices, bulges, sources) of a piece walked forward or backward."""
+    verts, bulges, sources = piece[0], piece[1], piece[3]
+    if forward:
+        return verts, bulges, sources
+    # reversed: segment j runs v[k-j] -> v[k-j-1] with the opposite bulge
+    rb = np.empty_like(bulges)
+    rb[:-1] = -bulges[:-1][::-1]
+    rb[-1] = 0.0
+    rs = np.empty_like(sources)
+    rs[:-1] = sources[:-1][::-1]
+    rs[-1] = -1
+    return verts[::-1], rb, rs
+
+
+def _join(chain, pieces):
+    """Concatenate oriented pieces; each joint vertex appears once."""
+    verts, bulges, sources = [], [], []
+    kinds = set()
+    for p, forward in chain:
+        v, b, s = _oriented(pieces[p], forward)
+        verts.append(v[:-1])
+        bulges.append(b[:-1])
+        sources.append(s[:-1])
+        kinds.add(pieces[p][2])
+    return verts, bulges, sources, kinds
+
+
+# -------------------------------------------------------------
+# Orientation / nesting
+# -------------------------------------------------------------
+def signed_area(verts, bulges):
+    """Signed area of a closed bulge loop (CCW > 0), arcs included exactly."""
+    nxt = np.roll(verts, -1, axis=0)
+    area = 0.5 * np.sum(verts[:, 0] * nxt[:, 1] - nxt[:, 0] * verts[:, 1])
+    arc = bulges != 0.0
+    if arc.any():
+        chord = np.hypot(*(nxt[arc] - verts[arc]).T)
+        theta = 4.0 * np.arctan(bulges[arc])
+        radius = chord / (2.0 * np.abs(np.sin(theta / 2.0)))
+        area += np.sum(0.5 * radius ** 2 * (theta - np.sin(theta)))
+    return area
+
+
+def _points_in_polygon(points, polygon):
+    """Even-odd ray casting of many points against one polygon."""
+    x, y = points[:, 0][:, None], points[:, 1][:, None]
+    x1, y1 = polygon[:, 0][None, :], polygon[:, 1][None, :]
+    x2, y2 = np.roll(polygon[:, 0], -1)[None, :], np.roll(polygon[:, 1], -1)[None, :]
+    crosses = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xint = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.count_nonzero(crosses & (x < xint), axis=1) % 2 == 1
+
+
+def _nesting_depths(loops):
+    """How many other loops contain each loop (tested with its first vertex)."""
+    if len(loops) < 2:
+        return np.zeros(len(loops), dtype=np.int64)
+    profile = LoopAssembly([(v, b, KIND_POLYLINE) for v, b in loops], [], [], 0.0).to_profile()
+    pts, offsets = profile.tessellate()
+    probes = np.array([v[0] for v, _ in loops])
+    # boxes of the tessellated loops: vertex boxes miss the arc bulges
+    # (a circle's two half-arc vertices give a zero-height box)
+    lo = np.minimum.reduceat(pts, offsets[:-1], axis=0)
+    hi = np.maximum.reduceat(pts, offsets[:-1], axis=0)
+    depths = np.zeros(len(loops), dtype=np.int64)
+    for j in range(len(loops)):
+        # bounding-box prefilter before the exact test
+        cand = np.flatnonzero(np.all((probes >= lo[j]) & (probes <= hi[j]), axis=1))
+        cand = cand[cand != j]
+        if len(cand):
+            inside = _points_in_polygon(probes[cand], pts[offsets[j]:offsets[j + 1]])
+            depths[cand[inside]] += 1
+    return depths
+
+
+# -------------------------------------------------------------
+# Public API
+# -------------------------------------------------------------
+def assemble_loops(pieces, tol=JOIN_TOLERANCE):
+    """Chain pieces into closed loops.
+
+    pieces: [(vertices (k, 2), bulges (k,) or None, closed, kind[, sources (k,)])].
+    Closed pieces pass through unchanged; open ones are chained end to end.
+    The optional per-segment sources follow every segment into the loops
+    (LoopAssembly.sources).
+    """
+    closed_loops = []
+    open_pieces = []
+    for piece in pieces:
+        verts, bulges, closed, kind = piece[:4]
+        verts = np.asarray(verts, dtype=np.float64).reshape(-1, 2)
+        bulges = np.zeros(len(verts)) if bulges is None else np.asarray(bulges, dtype=np.float64)
+        sources = (np.asarray(piece[4], dtype=np.int64) if len(piece) > 4 and piece[4] is not None
+                   else np.full(len(verts), -1, dtype=np.int64))
+        if len(verts) < 2:
+            continue
+        if not closed and len(verts) > 2 and np.hypot(*(verts[0] - verts[-1])) <= tol:
+            verts, bulges, sources, closed = verts[:-1], bulges[:-1], sources[:-1], True
+        if closed:
+            closed_loops.append((verts, bulges, kind, sources))
+        else:
+            open_pieces.append((verts, bulges, kind, sources))
+
+    loops = list(closed_loops)
+    open_chains = []
+    max_gap = 0.0
+
+    if open_pieces:
+        ends = np.array([(p[0][0], p[0][-1]) for p in open_pieces]).reshape(-1, 2)
+        partner = _match_endpoints(ends, tol)
+        matched = partner >= 0
+        if matched.any():
+            max_gap = float(np.max(np.hypot(*(ends[matched] - ends[partner[matched]]).T)))
+
+        visited = np.zeros(len(open_pieces), dtype=bool)
+        for start in range(len(open_pieces)):
+            if visited[start]:
+                continue
+            visited[start] = True
+            chain = [(start, True)]
+            # walk forward from the end of the start piece
+            end = 2 * start + 1
+            closed = False
+            while partner[end] >= 0:
+                nxt = partner[end]
+                p = nxt // 2
+                if p == start:
+                    closed = True
+                    break
+                if visited[p]:
+                    break
+                visited[p] = True
+                forward = nxt % 2 == 0
+                chain.append((p, forward))
+                end = 2 * p + (1 if forward else 0)
+
+            if not closed:
+                # walk backward from the start of the start piece
+                begin = 2 * start
+                while partner[begin] >= 0:
+                    prv = partner[begin]
+                    p = prv // 2
+                    if visited[p]:
+                        break
+                    visited[p] = True
+                    forward = prv % 2 == 1
+                    chain.insert(0, (p, forward))
+                    begin = 2 * p + (0 if forward else 1)
+
+            verts, bulges, sources, kinds = _join(chain, open_pieces)
+            kind = KIND_SPLINE if kinds == {KIND_SPLINE} else KIND_POLYLINE
+            if closed:
+                loops.append((np.concatenate(verts), np.concatenate(bulges), kind, np.concatenate(sources)))
+            else:
+                last_p, last_fwd = chain[-1]
+                v, _, _ = _oriented(open_pieces[last_p], last_fwd)
+                verts.append(v[-1:])
+                bulges.append(np.zeros(1))
+                sources.append(np.full(1, -1, dtype=np.int64))
+                open_chains.append((np.concatenate(verts), np.concatenate(bulges), kind, np.concatenate(sources)))
+
+    # ---------- orientation: outer CCW, holes CW ----------
+    depths = _nesting_depths([(v, b) for v, b, _, _ in loops])
+    oriented, oriented_sources = [], []
+    for (verts, bulges, kind, sources), depth in zip(loops, depths):
+        want_ccw = depth % 2 == 0
+        if (signed_area(verts, bulges) > 0) != want_ccw:
+            # reverse a closed loop: keep vertex 0, flip segment order and bulge sign
+            verts = np.concatenate((verts[:1], verts[:0:-1]))
+            bulges = -bulges[::-1]
+            sources = sources[::-1]
+        oriented.append((verts, bulges, kind))
+        oriented_sources.append(sources)
+
+    return LoopAssembly(oriented, depths, [c[:3] for c in open_chains], max_gap,
+                        oriented_sources, [c[3] for c in open_chains])
+
+
+def assemble_profile(profile, tol=JOIN_TOLERANCE):
+    """assemble_loops() over the loops of a ProfileGeometry."""
+    pieces = [profile.loop(i) + (profile.loop_sources(i),) for i in range(profile.num_loops)]
+    return assemble_loops(pieces, tol)
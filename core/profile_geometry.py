@@ -0,0 +1,508 @@
+# core/profile_geometry.py
+# Compact array-based 2D profile (NumPy) — OCC edges are built only on demand
+
+import math
+import numpy as np
+import vtk
+from vtkmodules.util import numpy_support
+
+from core.tessellation import (
+    CHORD_TOLERANCE, ANGLE_TOLERANCE, bulge_segment_counts, sample_bulge_segments
+)
+
+KIND_POLYLINE = 0   # segments are lines, or arcs when the bulge is non-zero
+KIND_SPLINE = 1     # vertices are points of a smooth curve (interpolated in OCC)
+
+# Point array of to_polydata(): DXF entity of the segment starting at each point
+SOURCE_ARRAY = "SourceEntity"
+# sources value when the entity is not known
+NO_SOURCE = -1
+
+
+def handle_to_source(handle):
+    """DXF handle (hex string) → sources value; NO_SOURCE when missing."""
+    try:
+        return int(handle, 16)
+    except (TypeError, ValueError):
+        return NO_SOURCE
+
+
+def source_to_handle(source):
+    """sources value → DXF handle as written in the file, or None."""
+    return f"{int(source):X}" if source >= 0 else None
+
+
+class ProfileGeometry:
+    """2D profile stored as flat float64 arrays.
+
+    vertices: (N, 2) float64 — all loop vertices, loop after loop
+    bulges:   (N,)   float64 — DXF bulge of the segment starting at each vertex
+                               (0 = line, tan(sweep / 4) = arc, >0 is CCW)
+    offsets:  (M+1,) int64   — loop i is vertices[offsets[i]:offsets[i + 1]]
+    closed:   (M,)   bool
+    kinds:    (M,)   int8    — KIND_POLYLINE / KIND_SPLINE
+    sources:  (N,)   int64   — DXF handle (hex value) of the entity the segment
+                               starting at each vertex came from (-1 = unknown)
+
+    Block references (DXF INSERT) are kept as instances of shared geometry:
+    shared:             [ProfileGeometry] — each block converted once
+    instance_geometry:  (K,)      int64   — index into shared per instance
+    instance_matrices:  (K, 3, 3) float64 — 2D affine transform per instance
+    instance_sources:   (K,)      int64   — handle of the modelspace INSERT that
+                                            placed the instance (its segments' source)
+    """
+
+    def __init__(self, vertices, bulges, offsets, closed, kinds, sources=None):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 2)
+        self.bulges = np.ascontiguousarray(bulges, dtype=np.float64)
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        self.closed = np.ascontiguousarray(closed, dtype=bool)
+        self.kinds = np.ascontiguousarray(kinds, dtype=np.int8)
+        self.sources = (np.full(len(self.vertices), NO_SOURCE, dtype=np.int64) if sources is None
+                        else np.ascontiguousarray(sources, dtype=np.int64))
+        self.shared = []
+        self.instance_geometry = np.zeros(0, dtype=np.int64)
+        self.instance_matrices = np.zeros((0, 3, 3), dtype=np.float64)
+        self.instance_sources = np.zeros(0, dtype=np.int64)
+        self._occ_shape = None
+        self._occ_local = None      # own edges, unrotated (shared by OCC instances)
+        self._vtk_poly = None       # own polydata (shared by VTK instances)
+        self._flat = None
+        self._tessellation = None   # (params, points, loop_offsets)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, 2)), np.zeros(0), np.zeros(1, dtype=np.int64),
+                   np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int8))
+
+    # -------------------------------------------------------------
+    # Basic info
+    # -------------------------------------------------------------
+    @property
+    def num_loops(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_vertices(self):
+        return len(self.vertices)
+
+    @property
+    def tessellation_params(self):
+        return self._tessellation[0] if self._tessellation is not None else None
+
+    def set_tessellation(self, params, points, loop_offsets):
+        """Seed the tessellation cache (e.g. from the on-disk DXF cache)."""
+        self._tessellation = (tuple(params), points, loop_offsets)
+
+    @property
+    def nbytes(self):
+        return (self.vertices.nbytes + self.bulges.nbytes + self.offsets.nbytes
+                + self.closed.nbytes + self.kinds.nbytes + self.sources.nbytes
+                + self.instance_geometry.nbytes + self.instance_matrices.nbytes
+                + self.instance_sources.nbytes
+                + sum(g.nbytes for g in self.shared))
+
+    def loop(self, i):
+        """Return (vertices, bulges, closed, kind) of loop i (views, no copy)."""
+        a, b = self.offsets[i], self.offsets[i + 1]
+        return self.vertices[a:b], self.bulges[a:b], bool(self.closed[i]), int(self.kinds[i])
+
+    def loop_sources(self, i):
+        """Source entity per segment of loop i (view, no copy)."""
+        return self.sources[self.offsets[i]:self.offsets[i + 1]]
+
+    def bounds(self):
+        """(xmin, ymin, xmax, ymax) of the vertices (instances included)."""
+        verts = self.flattened().vertices
+        if len(verts) == 0:
+            return 0.0, 0.0, 0.0, 0.0
+        lo = verts.min(axis=0)
+        hi = verts.max(axis=0)
+        return lo[0], lo[1], hi[0], hi[1]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # OCC shapes are not picklable; VTK objects are rebuilt on demand
+        state["_occ_shape"] = state["_occ_local"] = state["_vtk_poly"] = None
+        return state
+
+    # -------------------------------------------------------------
+    # Instances (DXF blocks)
+    # -------------------------------------------------------------
+    @property
+    def num_instances(self):
+        return len(self.instance_geometry)
+
+    def set_instances(self, shared, geometry_ids, matrices, sources=None):
+        self.shared = list(shared)
+        self.instance_geometry = np.ascontiguousarray(geometry_ids, dtype=np.int64)
+        self.instance_matrices = np.ascontiguousarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+        self.instance_sources = (np.full(len(self.instance_geometry), NO_SOURCE, dtype=np.int64)
+                                 if sources is None else np.ascontiguousarray(sources, dtype=np.int64))
+        self._flat = None
+
+    def iter_instances(self):
+        """(geometry, 3x3 matrix) for the own loops and every instance."""
+        yield self, np.eye(3)
+        for g, m in zip(self.instance_geometry, self.instance_matrices):
+            yield self.shared[g], m
+
+    def transformed(self, matrix, source=None):
+        """Copy of the own loops under a 2D affine matrix.
+
+        Similarity transforms keep arcs exact (mirrors flip the bulge sign);
+        any other transform turns arcs into ellipses, so the loops are
+        tessellated first and transformed as polylines. source, if given,
+        replaces the sources of every segment (e.g. the placing INSERT).
+        """
+        a, t = matrix[:2, :2], matrix[:2, 2]
+        if is_similarity(matrix):
+            sign = 1.0 if np.linalg.det(a) > 0 else -1.0
+            sources = self.sources if source is None else np.full(self.num_vertices, source, dtype=np.int64)
+            return ProfileGeometry(self.vertices @ a.T + t, self.bulges * sign,
+                                   self.offsets, self.closed, self.kinds, sources)
+        pts, loop_offsets = self.tessellate()
+        sources = self.tessellated_sources() if source is None else np.full(len(pts), source, dtype=np.int64)
+        return ProfileGeometry(pts @ a.T + t, np.zeros(len(pts)), loop_offsets,
+                               self.closed, np.full(self.num_loops, KIND_POLYLINE, dtype=np.int8),
+                               sources)
+
+    def flattened(self):
+        """ProfileGeometry with every instance expanded into real loops (cached)."""
+        if self.num_instances == 0:
+            return self
+        if self._flat is None:
+            parts = [self] + [self.shared[g].transformed(m, s) for g, m, s in
+                              zip(self.instance_geometry, self.instance_matrices, self.instance_sources)]
+            self._flat = concat_profiles(parts)
+        return self._flat
+
+    # -------------------------------------------------------------
+    # Segments (vectorized over the whole profile)
+    # -------------------------------------------------------------
+    def segments(self):
+        """Return (start, end) vertex indices of every segment in the profile."""
+        n = self.num_vertices
+        starts = np.arange(n, dtype=np.int64)
+        ends = starts + 1
+        loop_first = self.offsets[:-1]
+        loop_last = self.offsets[1:] - 1
+        valid = loop_last >= loop_first
+        # closed loops wrap to their first vertex
+        ends[loop_last[valid & self.closed]] = loop_first[valid & self.closed]
+        # open loops have no segment starting at their last vertex
+        keep = np.ones(n, dtype=bool)
+        keep[loop_last[valid & ~self.closed]] = False
+        return starts[keep], ends[keep]
+
+    def tessellate(self, chord_tol=CHORD_TOLERANCE, angle_tol=ANGLE_TOLERANCE):
+        """Sample all loops into points within the given tolerances.
+
+        Lines emit only their start point; arcs emit as many points as the
+        chord/angle tolerances require. Returns (points (P, 2), loop_offsets
+        (M+1,)) where each loop's points exclude the closing point of closed
+        loops. The last result is cached.
+        """
+        params = (float(chord_tol), float(angle_tol))
+        if self._tessellation is not None and self._tessellation[0] == params:
+            return self._tessellation[1], self._tessellation[2]
+        pts, loop_offsets = self._tessellate(*params)
+        self._tessellation = (params, pts, loop_offsets)
+        return pts, loop_offsets
+
+    def tessellated_sources(self, chord_tol=CHORD_TOLERANCE, angle_tol=ANGLE_TOLERANCE):
+        """Source of every tessellate() point: that of the segment it starts
+        (NO_SOURCE for the end point of open loops)."""
+        starts, ends = self.segments()
+        counts = bulge_segment_counts(self.vertices[starts], self.vertices[ends],
+                                      self.bulges[starts], chord_tol, angle_tol)
+        out = np.repeat(self.sources[starts], counts)
+        loop_of_seg = np.searchsorted(self.offsets, starts, side="right") - 1
+        seg_counts = np.bincount(loop_of_seg, weights=counts,
+                                 minlength=self.num_loops).astype(np.int64)
+        seg_offsets = np.concatenate(([0], np.cumsum(seg_counts)))
+        return np.insert(out, seg_offsets[np.flatnonzero(~self.closed) + 1], NO_SOURCE)
+
+    def _tessellate(self, chord_tol, angle_tol):
+        starts, ends = self.segments()
+        p1, p2, b = self.vertices[starts], self.vertices[ends], self.bulges[starts]
+        counts = bulge_segment_counts(p1, p2, b, chord_tol, angle_tol)
+        pts = sample_bulge_segments(p1, p2, b, counts)
+
+        # open loops end with their last vertex
+        loop_of_seg = np.searchsorted(self.offsets, starts, side="right") - 1
+        seg_counts = np.bincount(loop_of_seg, weights=counts,
+                                 minlength=self.num_loops).astype(np.int64)
+        open_loops = np.flatnonzero(~self.closed)
+        seg_offsets = np.concatenate(([0], np.cumsum(seg_counts)))
+        insert_at = seg_offsets[open_loops + 1]
+        last_vertices = self.vertices[self.offsets[open_loops + 1] - 1]
+        pts = np.insert(pts, insert_at, last_vertices, axis=0)
+
+        loop_sizes = seg_counts + (~self.closed).astype(np.int64)
+        loop_offsets = np.concatenate(([0], np.cumsum(loop_sizes)))
+        return pts, loop_offsets
+
+    # -------------------------------------------------------------
+    # VTK
+    # -------------------------------------------------------------
+    def to_polydata(self, chord_tol=CHORD_TOLERANCE, angle_tol=ANGLE_TOLERANCE):
+        """One polyline cell per loop, in the same XZ plane as to_occ_shape().
+
+        Instances are expanded; use vtk_instances() to keep them shared.
+        The point array "SourceEntity" holds the DXF entity of the segment
+        starting at each point (see tessellated_sources()).
+        """
+        if self.num_instances:
+            return self.flattened().to_polydata(chord_tol, angle_tol)
+        pts2d, loop_offsets = self.tessellate(chord_tol, angle_tol)
+        xyz = np.zeros((len(pts2d), 3), dtype=np.float64)
+        xyz[:, 0] = pts2d[:, 0]
+        xyz[:, 2] = -pts2d[:, 1]   # rotation of -90° about X: (x, y) -> (x, 0, -y)
+
+        sizes = np.diff(loop_offsets)
+        closing = self.closed & (sizes > 0)
+        cell_sizes = sizes + closing
+        ids = np.arange(len(pts2d), dtype=np.int64)
+        ids = np.insert(ids, loop_offsets[1:][closing], loop_offsets[:-1][closing])
+        cell_offsets = np.concatenate(([0], np.cumsum(cell_sizes))).astype(np.int64)
+
+        points = vtk.vtkPoints()
+        points.SetData(numpy_support.numpy_to_vtk(xyz, deep=True))
+        lines = vtk.vtkCellArray()
+        lines.SetData(numpy_support.numpy_to_vtkIdTypeArray(cell_offsets, deep=True),
+                      numpy_support.numpy_to_vtkIdTypeArray(ids, deep=True))
+
+        sources = numpy_support.numpy_to_vtk(self.tessellated_sources(chord_tol, angle_tol), deep=True)
+        sources.SetName(SOURCE_ARRAY)
+
+        poly = vtk.vtkPolyData()
+        poly.SetPoints(points)
+        poly.SetLines(lines)
+        poly.GetPointData().AddArray(sources)
+        return poly
+
+    def vtk_instances(self):
+        """[(vtkPolyData, vtkMatrix4x4)] — one polydata per unique geometry,
+        shared by all of its instances (matrices already in the XZ plane)."""
+        out = []
+        for geom, m in self.iter_instances():
+            if geom.num_loops == 0:
+                continue
+            if geom._vtk_poly is None:
+                geom._vtk_poly = geom.to_polydata()
+            out.append((geom._vtk_poly, matrix_to_vtk(m)))
+        return out
+
+    # -------------------------------------------------------------
+    # OCC (lazy)
+    # -------------------------------------------------------------
+    def to_occ_edges(self):
+        """Build TopoDS edges for every segment (only when a B-rep op needs them)."""
+        from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeEdge
+        from OCC.Core.GC import GC_MakeArcOfCircle
+        from OCC.Core.GeomAPI import GeomAPI_PointsToBSpline
+        from OCC.Core.TColgp import TColgp_Array1OfPnt
+        from OCC.Core.gp import gp_Pnt
+
+        edges = []
+        for i in range(self.num_loops):
+            verts, bulges, closed, kind = self.loop(i)
+            n = len(verts)
+            if n < 2:
+                continue
+            if kind == KIND_SPLINE:
+                pts = np.vstack((verts, verts[:1])) if closed else verts
+                arr = TColgp_Array1OfPnt(1, len(pts))
+                for j, (x, y) in enumerate(pts, start=1):
+                    arr.SetValue(j, gp_Pnt(x, y, 0))
+                edges.append(BRepBuilderAPI_MakeEdge(GeomAPI_PointsToBSpline(arr).Curve()).Edge())
+                continue
+
+            nseg = n if closed else n - 1
+            for j in range(nseg):
+                x1, y1 = verts[j]
+                x2, y2 = verts[(j + 1) % n]
+                if x1 == x2 and y1 == y2:
+                    continue
+                bulge = bulges[j]
+                if bulge == 0.0:
+                    edges.append(BRepBuilderAPI_MakeEdge(gp_Pnt(x1, y1, 0), gp_Pnt(x2, y2, 0)).Edge())
+                else:
+                    mx, my = _bulge_midpoint(x1, y1, x2, y2, bulge)
+                    arc = GC_MakeArcOfCircle(gp_Pnt(x1, y1, 0), gp_Pnt(mx, my, 0), gp_Pnt(x2, y2, 0)).Value()
+                    edges.append(BRepBuilderAPI_MakeEdge(arc).Edge())
+        return edges
+
+    def _occ_compound(self):
+        """Compound of the own edges in the XY plane (cached, shared by instances)."""
+        if self._occ_local is None:
+            from OCC.Core.BRep import BRep_Builder
+            from OCC.Core.TopoDS import TopoDS_Compound
+
+            builder = BRep_Builder()
+            compound = TopoDS_Compound()
+            builder.MakeCompound(compound)
+            for e in self.to_occ_edges():
+                builder.Add(compound, e)
+            self._occ_local = compound
+        return self._occ_local
+
+    def to_occ_shape(self):
+        """Compound of all edges, rotated into the XZ plane (cached).
+
+        Rigid instances are added as located shapes over their block's
+        compound (shared TShape); scaled or mirrored ones are copied.
+        """
+        if self._occ_shape is not None:
+            return self._occ_shape
+
+        from OCC.Core.BRep import BRep_Builder
+        from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_Transform
+        from OCC.Core.TopLoc import TopLoc_Location
+        from OCC.Core.TopoDS import TopoDS_Compound
+        from OCC.Core.gp import gp_Trsf, gp_Ax1, gp_Pnt, gp_Dir
+
+        builder = BRep_Builder()
+        compound = TopoDS_Compound()
+        builder.MakeCompound(compound)
+        builder.Add(compound, self._occ_compound())
+        for g, m in zip(self.instance_geometry, self.instance_matrices):
+            block = self.shared[g]
+            if is_rigid(m):
+                trsf = gp_Trsf()
+                trsf.SetValues(m[0, 0], m[0, 1], 0.0, m[0, 2],
+                               m[1, 0], m[1, 1], 0.0, m[1, 2],
+                               0.0, 0.0, 1.0, 0.0)
+                builder.Add(compound, block._occ_compound().Located(TopLoc_Location(trsf)))
+            else:
+                builder.Add(compound, block.transformed(m)._occ_compound())
+
+        trsf = gp_Trsf()
+        trsf.SetRotation(gp_Ax1(gp_Pnt(0, 0, 0), gp_Dir(1, 0, 0)), math.radians(-90))
+        # Moved() keeps the sub-shapes shared; a transform copy would duplicate them
+        self._occ_shape = compound.Moved(TopLoc_Location(trsf))
+        return self._occ_shape
+
+
+class ProfileBuilder:
+    """Collects loops from DXF entities and packs them into a ProfileGeometry.
+
+    source is stamped on every loop and insert added while it is set (the
+    loader sets it to the handle of the entity being converted, see
+    handle_to_source); add_loop(source=...) overrides it with a value or a
+    per-vertex array.
+    """
+
+    def __init__(self):
+        self._vertices = []
+        self._bulges = []
+        self._sources = []
+        self._sizes = []
+        self._closed = []
+        self._kinds = []
+        self.inserts = []   # [(block name, 3x3 placement matrix, source)]
+        self.source = NO_SOURCE
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def add_insert(self, name, matrix, source=None):
+        self.inserts.append((name, np.asarray(matrix, dtype=np.float64),
+                             self.source if source is None else source))
+
+    def add_loop(self, vertices, bulges=None, closed=False, kind=KIND_POLYLINE, source=None):
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        if len(vertices) < 2:
+            return
+        if bulges is None:
+            bulges = np.zeros(len(vertices), dtype=np.float64)
+        self._vertices.append(vertices)
+        self._bulges.append(np.asarray(bulges, dtype=np.float64))
+        self._sources.append(np.broadcast_to(
+            np.asarray(self.source if source is None else source, dtype=np.int64), (len(vertices),)))
+        self._sizes.append(len(vertices))
+        self._closed.append(bool(closed))
+        self._kinds.append(kind)
+
+    def add_line(self, x1, y1, x2, y2, source=None):
+        self.add_loop(((x1, y1), (x2, y2)), source=source)
+
+    def add_arc(self, cx, cy, r, start_angle, end_angle):
+        """Arc CCW from start_angle to end_angle (radians)."""
+        sweep = (end_angle - start_angle) % (2 * math.pi)
+        if sweep == 0.0:
+            self.add_circle(cx, cy, r)
+            return
+        p1 = (cx + r * math.cos(start_angle), cy + r * math.sin(start_angle))
+        p2 = (cx + r * math.cos(end_angle), cy + r * math.sin(end_angle))
+        self.add_loop((p1, p2), (math.tan(sweep / 4), 0.0))
+
+    def add_circle(self, cx, cy, r):
+        # two half circles (bulge 1 each)
+        self.add_loop(((cx + r, cy), (cx - r, cy)), (1.0, 1.0), closed=True)
+
+    def build(self, allow_empty=False):
+        if not self._sizes:
+            return ProfileGeometry.empty() if allow_empty else None
+        offsets = np.zeros(len(self._sizes) + 1, dtype=np.int64)
+        np.cumsum(self._sizes, out=offsets[1:])
+        return ProfileGeometry(
+            np.concatenate(self._vertices),
+            np.concatenate(self._bulges),
+            offsets,
+            np.array(self._closed, dtype=bool),
+            np.array(self._kinds, dtype=np.int8),
+            np.concatenate(self._sources),
+        )
+
+
+# -------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------
+def _bulge_midpoint(x1, y1, x2, y2, bulge):
+    """Point in the middle of a bulge arc (sagitta = bulge * chord / 2)."""
+    dx, dy = x2 - x1, y2 - y1
+    s = bulge / 2.0
+    return (x1 + x2) / 2.0 + s * dy, (y1 + y2) / 2.0 - s * dx
+
+
+def is_similarity(matrix, tol=1e-9):
+    """True when the 2D linear part is rotation/mirror times a uniform scale."""
+    a = matrix[:2, :2]
+    ata = a.T @ a
+    return abs(ata[0, 1]) <= tol * max(ata[0, 0], 1.0) and abs(ata[0, 0] - ata[1, 1]) <= tol * max(ata[0, 0], 1.0)
+
+
+def is_rigid(matrix, tol=1e-9):
+    """Rotation + translation only (no scale, no mirror)."""
+    a = matrix[:2, :2]
+    return np.allclose(a.T @ a, np.eye(2), atol=tol) and np.linalg.det(a) > 0
+
+
+def matrix_to_vtk(matrix):
+    """2D affine (XY) -> vtkMatrix4x4 acting in the XZ plane of to_polydata()."""
+    (a, b, tx), (c, d, ty) = matrix[0], matrix[1]
+    m = vtk.vtkMatrix4x4()
+    m.DeepCopy((a, 0.0, -b, tx,
+                0.0, 1.0, 0.0, 0.0,
+                -c, 0.0, d, -ty,
+                0.0, 0.0, 0.0, 1.0))
+    return m
+
+
+def concat_profiles(parts):
+    """One ProfileGeometry holding the own loops of all parts."""
+    parts = [p for p in parts if p.num_loops]
+    if not parts:
+        return ProfileGeometry.empty()
+    sizes = np.concatenate([np.diff(p.offsets) for p in parts])
+    offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+    return ProfileGeometry(
+        np.concatenate([p.vertices for p in parts]),
+        np.concatenate([p.bulges for p in parts]),
+        offsets,
+        np.concatenate([p.closed for p in parts]),
+        np.concatenate([p.kinds for p in parts]),
+        np.concatenate([p.sources for p in parts]),
+    )
@@ -0,0 +1,135 @@
+# core/tessellation.py
+# Tolerance-driven curve tessellation (chord deviation + angle), vectorized per curve type
+
+import math
+import numpy as np
+import vtk
+from vtkmodules.util import numpy_support
+
+# Max distance between the true curve and its chords (mm). Together with the
+# angle cap an r=30 circle gets 40 chords (0.01 mm gave 122): small radii are
+# bounded by the angle, large ones stay within 0.1 mm of the true curve.
+CHORD_TOLERANCE = 0.1
+# Max angle swept by one chord (radians)
+ANGLE_TOLERANCE = math.radians(15)
+
+
+def arc_segment_counts(radius, sweep, chord_tol=CHORD_TOLERANCE, angle_tol=ANGLE_TOLERANCE):
+    """Number of chords needed per arc so that both tolerances hold.
+
+    A chord over angle a deviates r * (1 - cos(a / 2)) from the arc, so the
+    largest allowed step is 2 * acos(1 - chord_tol / r).
+    """
+    radius = np.abs(np.asarray(radius, dtype=np.float64))
+    sweep = np.abs(np.asarray(sweep, dtype=np.float64))
+    ratio = np.clip(1.0 - chord_tol / np.maximum(radius, 1e-12), -1.0, 1.0)
+    step = np.minimum(2.0 * np.arccos(ratio), angle_tol)
+    step = np.maximum(step, 1e-6)
+    return np.maximum(np.ceil(sweep / step - 1e-9), 1).astype(np.int64)
+
+
+def bulge_arc_params(p1, p2, bulges):
+    """center (K, 2), radius, start angle and signed sweep of bulge arcs p1->p2."""
+    chord = p2 - p1
+    length = np.hypot(chord[:, 0], chord[:, 1])
+    normal = np.column_stack((-chord[:, 1], chord[:, 0])) / np.where(length > 0, length, 1.0)[:, None]
+    d = length * (1.0 - bulges * bulges) / (4.0 * bulges)
+    center = (p1 + p2) / 2.0 + normal * d[:, None]
+    radius = np.hypot(p1[:, 0] - center[:, 0], p1[:, 1] - center[:, 1])
+    start = np.arctan2(p1[:, 1] - center[:, 1], p1[:, 0] - center[:, 0])
+    sweep = 4.0 * np.arctan(bulges)
+    return center, radius, start, sweep
+
+
+def bulge_segment_counts(p1, p2, bulges, chord_tol=CHORD_TOLERANCE, angle_tol=ANGLE_TOLERANCE):
+    """1 for lines, tolerance-driven count for arcs."""
+    counts = np.ones(len(bulges), dtype=np.int64)
+    is_arc = bulges != 0.0
+    if is_arc.any():
+        _, radius, _, sweep = bulge_arc_params(p1[is_arc], p2[is_arc], bulges[is_arc])
+        counts[is_arc] = arc_segment_counts(radius, sweep, chord_tol, angle_tol)
+    return counts
+
+
+def sample_bulge_segments(p1, p2, bulges, counts):
+    """Sample segments p1->p2 into counts[i] points each (end point excluded).
+
+    Lines are linear; arcs use the bulge to derive center/radius/sweep.
+    """
+    total = int(counts.sum())
+    seg = np.repeat(np.arange(len(counts)), counts)
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    t = (np.arange(total) - first[seg]) / counts[seg]
+
+    out = p1[seg] + (p2[seg] - p1[seg]) * t[:, None]
+
+    is_arc = bulges != 0.0
+    if is_arc.any():
+        center, radius, start, sweep = bulge_arc_params(p1[is_arc], p2[is_arc], bulges[is_arc])
+        arc_index = np.full(len(counts), -1, dtype=np.int64)
+        arc_index[is_arc] = np.arange(is_arc.sum())
+        on_arc = is_arc[seg]
+        k = arc_index[seg[on_arc]]
+        ang = start[k] + sweep[k] * t[on_arc]
+        out[on_arc, 0] = center[k, 0] + radius[k] * np.cos(ang)
+        out[on_arc, 1] = center[k, 1] + radius[k] * np.sin(ang)
+    return out
+
+
+# -------------------------------------------------------------
+# OCC edges
+# -------------------------------------------------------------
+def sample_occ_edge(edge, chord_tol=CHORD_TOLERANCE, angle_tol=ANGLE_TOLERANCE):
+    """Points (K, 3) along a TopoDS edge: 2 for lines, analytic for circles,
+    GCPnts_TangentialDeflection for everything else."""
+    from OCC.Core.BRepAdaptor import BRepAdaptor_Curve
+    from OCC.Core.GCPnts import GCPnts_TangentialDeflection
+    from OCC.Core.GeomAbs import GeomAbs_Line, GeomAbs_Circle
+
+    curve = BRepAdaptor_Curve(edge)
+    first, last = curve.FirstParameter(), curve.LastParameter()
+    kind = curve.GetType()
+
+    if kind == GeomAbs_Line:
+        a, b = curve.Value(first), curve.Value(last)
+        return np.array([[a.X(), a.Y(), a.Z()], [b.X(), b.Y(), b.Z()]], dtype=np.float64)
+
+    if kind == GeomAbs_Circle:
+        circ = curve.Circle()
+        c, x, y = circ.Location(), circ.XAxis().Direction(), circ.YAxis().Direction()
+        n = int(arc_segment_counts(circ.Radius(), last - first, chord_tol, angle_tol))
+        u = np.linspace(first, last, n + 1)
+        r = circ.Radius()
+        cos_u, sin_u = r * np.cos(u)[:, None], r * np.sin(u)[:, None]
+        return (np.array([c.X(), c.Y(), c.Z()])
+                + cos_u * np.array([x.X(), x.Y(), x.Z()])
+                + sin_u * np.array([y.X(), y.Y(), y.Z()]))
+
+    sampler = GCPnts_TangentialDeflection(curve, angle_tol, chord_tol)
+    pts = []
+    for i in range(1, sampler.NbPoints() + 1):
+        p = sampler.Value(i)
+        pts.append((p.X(), p.Y(), p.Z()))
+    return np.array(pts, dtype=np.float64).reshape(-1, 3)
+
+
+def edges_to_polydata(edges, chord_tol=CHORD_TOLERANCE, angle_tol=ANGLE_TOLERANCE):
+    """One polyline cell per edge, built with a single array copy into VTK."""
+    chunks = [sample_occ_edge(e, chord_tol, angle_tol) for e in edges]
+    chunks = [c for c in chunks if len(c) >= 2]
+    poly = vtk.vtkPolyData()
+    if not chunks:
+        return poly
+
+    xyz = np.concatenate(chunks)
+    sizes = np.array([len(c) for c in chunks], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(xyz, deep=True))
+    lines = vtk.vtkCellArray()
+    lines.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=True),
+                  numpy_support.numpy_to_vtkIdTypeArray(np.arange(len(xyz), dtype=np.int64), deep=True))
+    poly.SetPoints(points)
+    poly.SetLines(lines)
+    return poly
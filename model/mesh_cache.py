@@ -0,0 +1,100 @@
+# model/mesh_cache.py
+# In-process LRU of shape meshes (vtkPolyData), capped by memory size
+
+from collections import OrderedDict
+
+from model.occ_mesh import shape_key
+
+MESH_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def polydata_nbytes(polydata):
+    """Memory held by a vtkPolyData (VTK reports kibibytes)."""
+    return 0 if polydata is None else polydata.GetActualMemorySize() * 1024
+
+
+class MeshCache:
+    """(shape hash, linear, angular) → vtkPolyData, least recently used first out.
+
+    The hash can collide, so the shape is kept alongside its mesh and a hit
+    only counts when the stored shape IsSame() as the requested one; otherwise
+    the entry is replaced. Shapes without faces (DXF edges) are stored like any
+    other: their mesh is the edge polylines built by the mesh callback.
+    """
+
+    def __init__(self, max_bytes=MESH_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (shape, polydata, nbytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(shape, linear_deflection, angular_deflection):
+        return (shape_key(shape), float(linear_deflection), float(angular_deflection))
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None, shape=None):
+        """Mesh stored under key; with shape, only if the stored shape IsSame() as it."""
+        entry = self._entries.get(key)
+        if entry is None or (shape is not None and not entry[0].IsSame(shape)):
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, shape, polydata):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[2]
+        size = polydata_nbytes(polydata)
+        self._entries[key] = (shape, polydata, size)
+        self.nbytes += size
+        self.evict()
+
+    def get_or_mesh(self, shape, linear_deflection, angular_deflection, mesh):
+        """Cached mesh of the shape, or mesh(shape) stored under the key."""
+        key = self.key_for(shape, linear_deflection, angular_deflection)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0].IsSame(shape):
+            return self.get(key)
+        self.misses += 1  # new shape, or a different shape with the same hash
+        polydata = mesh(shape)
+        self.put(key, shape, polydata)
+        return polydata
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes (newest always stays)."""
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def summary(self):
+        st = self.stats()
+        return (f"🗃️ [MeshCache] {st['entries']} meshes, {st['bytes'] / 2**20:.1f}/"
+                f"{st['max_bytes'] / 2**20:.0f} MiB, hits={st['hits']} misses={st['misses']} "
+                f"evictions={st['evictions']} ({st['hit_rate']:.0%})")
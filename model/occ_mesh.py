@@ -0,0 +1,159 @@
+# model/occ_mesh.py
+# B-rep → vtkPolyData in memory (BRepMesh + Poly_Triangulation → NumPy → VTK), no temp files
+
+import numpy as np
+import vtk
+from vtkmodules.util import numpy_support
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.BRepTools import breptools
+from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_REVERSED
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import topods
+
+# Default mesh quality (mm / radians)
+LINEAR_DEFLECTION = 0.1
+ANGULAR_DEFLECTION = 0.5
+
+
+def mesh_shape(shape, linear_deflection=LINEAR_DEFLECTION, angular_deflection=ANGULAR_DEFLECTION,
+               parallel=False):
+    """Run BRepMesh_IncrementalMesh on the shape (triangulation is stored on its faces)."""
+    mesher = BRepMesh_IncrementalMesh(shape, linear_deflection, False, angular_deflection, parallel)
+    return mesher.IsDone()
+
+
+def clean_mesh(shape):
+    """Drop the triangulation stored on the shape's faces.
+
+    BRepMesh keeps any existing mesh that is already fine enough, so this is
+    needed before meshing the same shape again at a coarser deflection.
+    """
+    breptools.Clean(shape)
+
+
+def shape_key(shape):
+    """Hash of a shape's TShape and location (OCC's HashCode).
+
+    Only a bucket key: two different shapes may share it, so a cached entry
+    must be confirmed with IsSame() (same TShape and location) before use.
+    """
+    return shape.__hash__()
+
+
+def _location_matrix(loc):
+    """3x4 matrix of a TopLoc_Location (identity when empty)."""
+    trsf = loc.Transformation()
+    return np.array([[trsf.Value(r, c) for c in range(1, 5)] for r in range(1, 4)])
+
+
+def face_arrays(face):
+    """(nodes (n, 3), triangles (t, 3)) of a meshed face, located and oriented.
+
+    Triangles of reversed faces are flipped so normals point outwards.
+    Returns None when the face has no triangulation.
+    """
+    loc = TopLoc_Location()
+    tri = BRep_Tool.Triangulation(face, loc)
+    if tri is None:
+        return None
+
+    n = tri.NbNodes()
+    nodes = np.empty((n, 3), dtype=np.float64)
+    for i in range(1, n + 1):
+        p = tri.Node(i)
+        nodes[i - 1] = (p.X(), p.Y(), p.Z())
+    if not loc.IsIdentity():
+        m = _location_matrix(loc)
+        nodes = nodes @ m[:, :3].T + m[:, 3]
+
+    t = tri.NbTriangles()
+    tris = np.empty((t, 3), dtype=np.int64)
+    for i in range(1, t + 1):
+        tris[i - 1] = tri.Triangle(i).Get()
+    tris -= 1   # OCC node indices are 1-based
+    if face.Orientation() == TopAbs_REVERSED:
+        tris = tris[:, ::-1]
+    return nodes, tris
+
+
+def arrays_to_polydata(nodes, tris, face_ids=None, normals=True):
+    """Build vtkPolyData from flat arrays (single copy), with optional normals."""
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(np.ascontiguousarray(nodes, dtype=np.float64), deep=True))
+    offsets = np.arange(0, 3 * len(tris) + 1, 3, dtype=np.int64)
+    polys = vtk.vtkCellArray()
+    polys.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=True),
+                  numpy_support.numpy_to_vtkIdTypeArray(np.ascontiguousarray(tris.ravel(), dtype=np.int64), deep=True))
+
+    poly = vtk.vtkPolyData()
+    poly.SetPoints(points)
+    poly.SetPolys(polys)
+    if face_ids is not None:
+        arr = numpy_support.numpy_to_vtk(np.ascontiguousarray(face_ids, dtype=np.int32), deep=True)
+        arr.SetName("FaceId")
+        poly.GetCellData().AddArray(arr)
+
+    if not normals or len(tris) == 0:
+        return poly
+
+    # nodes are per face already, so smooth point normals never cross a face edge
+    gen = vtk.vtkPolyDataNormals()
+    gen.SetInputData(poly)
+    gen.SplittingOff()
+    gen.ConsistencyOff()
+    gen.AutoOrientNormalsOff()
+    gen.ComputePointNormalsOn()
+    gen.ComputeCellNormalsOff()
+    gen.Update()
+    return gen.GetOutput()
+
+
+def shape_arrays(shape):
+    """(nodes, triangles, face_ids) of an already meshed shape, or None without faces.
+
+    face_ids is the index of each triangle's B-rep face in TopExp_Explorer order.
+    """
+    all_nodes, all_tris, all_ids = [], [], []
+    base = 0
+    explorer = TopExp_Explorer(shape, TopAbs_FACE)
+    face_index = 0
+    while explorer.More():
+        arrays = face_arrays(topods.Face(explorer.Current()))
+        if arrays is not None:
+            nodes, tris = arrays
+            all_nodes.append(nodes)
+            all_tris.append(tris + base)
+            all_ids.append(np.full(len(tris), face_index, dtype=np.int32))
+            base += len(nodes)
+        face_index += 1
+        explorer.Next()
+
+    if not all_nodes:
+        return None
+    return np.concatenate(all_nodes), np.concatenate(all_tris), np.concatenate(all_ids)
+
+
+def face_by_index(shape, face_id):
+    """TopoDS_Face number face_id in TopExp_Explorer order (the 'FaceId' of a mesh), or None."""
+    explorer = TopExp_Explorer(shape, TopAbs_FACE)
+    for _ in range(face_id):
+        if not explorer.More():
+            return None
+        explorer.Next()
+    return topods.Face(explorer.Current()) if explorer.More() else None
+
+
+def shape_to_polydata(shape, linear_deflection=LINEAR_DEFLECTION, angular_deflection=ANGULAR_DEFLECTION,
+                      normals=True):
+    """Mesh the shape and copy every face's triangulation into one vtkPolyData.
+
+    Each triangle carries a 'FaceId' cell value (see shape_arrays()).
+    Returns None when the shape has no faces.
+    """
+    mesh_shape(shape, linear_deflection, angular_deflection)
+    arrays = shape_arrays(shape)
+    if arrays is None:
+        return None
+    return arrays_to_polydata(*arrays, normals=normals)
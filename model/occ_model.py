@@ -1,81 +1,99 @@
 # model/occ_model.py
-import os, tempfile
+import logging
+import threading
+
 from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
-from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
-from OCC.Core.StlAPI import StlAPI_Writer
-from core.dxf_loader import load_dxf_shape
-import vtk
-import tempfile
-import os
-from OCC.Core.StlAPI import StlAPI_Writer
-from OCC.Core.BRep import BRep_Tool
 from OCC.Extend.TopologyUtils import TopologyExplorer
-from OCC.Core.BRepAdaptor import BRepAdaptor_Curve
-from OCC.Core.GeomAbs import GeomAbs_Line, GeomAbs_Circle
+from core.dxf_cache import DXFCache
+from core.tessellation import edges_to_polydata
+from model.meshing_service import MeshingService
+from model.mesh_cache import MeshCache
+from model.occ_mesh import clean_mesh
+
+log = logging.getLogger(__name__)
+
+# مستويات دقة العرض: (linear deflection mm, angular deflection rad)
+LOD_LEVELS = ("coarse", "medium", "fine")
+LOD_DEFLECTIONS = {
+    "coarse": (1.0, 0.8),
+    "medium": (0.25, 0.4),
+    "fine": (0.05, 0.2),
+}
 
 class OCCModel:
-    def __init__(self):
-        self.current_shape = None
+    def __init__(self, dxf_cache=None, mesher=None, mesh_cache=None):
+        self._shape = None
+        self.current_profile = None
+        self.dxf_cache = dxf_cache if dxf_cache is not None else DXFCache()
+        # دقة الـ Mesh (linear/angular deflection) قابلة للتعديل من هنا
+        self.mesher = mesher if mesher is not None else MeshingService()
+        # كاش الـ Mesh في الذاكرة: (shape hash, linear, angular) → polydata، بحد أقصى للحجم
+        self.mesh_cache = mesh_cache if mesh_cache is not None else MeshCache()
+        # الـ Mesh قد يُطلب من عامل في الخلفية (LOD): BRepMesh يعدّل الشكل نفسه، والكاش مشترك
+        self._mesh_lock = threading.RLock()
+
+    @property
+    def current_shape(self):
+        """الشكل الحالي — حواف الـ DXF تُبنى في OCC فقط عند أول طلب"""
+        if self._shape is None and self.current_profile is not None:
+            self._shape = self.current_profile.to_occ_shape()
+        return self._shape
+
+    @current_shape.setter
+    def current_shape(self, shape):
+        self._shape = shape
 
     def make_box(self, x=50, y=50, z=30):
+        self.current_profile = None
         self.current_shape = BRepPrimAPI_MakeBox(x, y, z).Shape()
         return self.current_shape
 
-    def import_dxf(self, file_path):
-        shape = load_dxf_shape(file_path)
-        if shape:
-            self.current_shape = shape
-        return shape
+    def import_dxf(self, file_path, progress=None, cancel=None):
+        """تحميل DXF كـ ProfileGeometry (بدون بناء حواف OCC) — عبر الكاش على القرص"""
+        profile = self.dxf_cache.load(file_path, progress, cancel)
+        if profile:
+            self.set_profile(profile)
+        return profile
+
+    def set_profile(self, profile):
+        """اعتماد بروفايل محمّل (مثلاً من عامل في الخلفية) كشكل حالي"""
+        self.current_profile = profile
+        self.current_shape = None
 
-    def shape_to_temp_stl(self, shape):
-        """تحويل أي شكل إلى STL أو PolyData مؤقت للعرض"""
+    def shape_to_polydata(self, shape):
+        """تحويل أي شكل إلى vtkPolyData للعرض مباشرة في الذاكرة (بدون STL مؤقت) — عبر الكاش"""
         if shape is None or shape.IsNull():
-            print("❌ الشكل فارغ")
+            log.warning("[OCC] الشكل فارغ")
             return None
+        with self._mesh_lock:
+            return self.mesh_cache.get_or_mesh(
+                shape, self.mesher.linear_deflection, self.mesher.angular_deflection,
+                lambda s: self._mesh(s, self.mesher.linear_deflection, self.mesher.angular_deflection),
+            )
 
-        # جرب حفظه STL أولاً (للأشكال الصلبة)
-        tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".stl")
-        tmp_path = tmp_file.name
-        tmp_file.close()
+    def shape_lod(self, shape, level="medium"):
+        """Mesh الشكل بمستوى دقة معيّن (coarse/medium/fine) — كل مستوى يُحسب مرة واحدة فقط
 
-        try:
-            writer = StlAPI_Writer()
-            if writer.Write(shape, tmp_path):
-                if os.path.getsize(tmp_path) > 0:
-                    print(f"[OCC] STL محفوظ ({os.path.getsize(tmp_path)} bytes): {tmp_path}")
-                    return tmp_path
-        except Exception:
-            pass
-
-        # لو STL فشل نحاول توليد Mesh من الحواف
-        print("⚠️ STL فشل، توليد Mesh من خطوط DXF")
-
-        points = vtk.vtkPoints()
-        lines = vtk.vtkCellArray()
-
-        te = TopologyExplorer(shape)
-        point_id = 0
-
-        for edge in te.edges():
-            curve = BRepAdaptor_Curve(edge)
-            first, last = curve.FirstParameter(), curve.LastParameter()
-            num_pts = 30  # دقة الرسم
+        آمنة من أي خيط (العارض يطلب المستويات الأدق من عامل في الخلفية).
+        """
+        if shape is None or shape.IsNull():
+            return None
+        lin, ang = LOD_DEFLECTIONS[level]
+        with self._mesh_lock:
+            return self.mesh_cache.get_or_mesh(shape, lin, ang, lambda s: self._mesh(s, lin, ang, level))
 
-            for i in range(num_pts + 1):
-                p = curve.Value(first + (last - first) * i / num_pts)
-                points.InsertNextPoint(p.X(), p.Y(), p.Z())
-                if i > 0:
-                    line = vtk.vtkLine()
-                    line.GetPointIds().SetId(0, point_id - 1)
-                    line.GetPointIds().SetId(1, point_id)
-                    lines.InsertNextCell(line)
-                point_id += 1
+    def _mesh(self, shape, linear_deflection, angular_deflection, label="mesh"):
+        # BRepMesh يحتفظ بالـ Mesh الأدق الموجود، لذا نمسحه قبل أي دقة جديدة
+        clean_mesh(shape)
 
-        poly_data = vtk.vtkPolyData()
-        poly_data.SetPoints(points)
-        poly_data.SetLines(lines)
+        # الأشكال الصلبة: Mesh متوازي للأوجه ثم نسخ المثلثات إلى VTK
+        result = self.mesher.mesh(shape, linear_deflection=linear_deflection,
+                                  angular_deflection=angular_deflection)
+        if result.polydata is not None:
+            log.debug("[%s] %s", label, result.summary())
+            return result.polydata
 
-        # ✅ بدل الحفظ، نعيد الـ PolyData مباشرة
-        print(f"[OCC] Mesh جاهز للعرض: {points.GetNumberOfPoints()} نقاط")
+        # لا توجد أوجه (حواف DXF): خطوط = نقطتان، أقواس ومنحنيات حسب التفاوت المسموح
+        poly_data = edges_to_polydata(TopologyExplorer(shape).edges())
+        log.debug("[%s] %d edge points", label, poly_data.GetNumberOfPoints())
         return poly_data
-
@@ -0,0 +1,268 @@
+# model/picking.py
+# Sub-entity picking (face / edge / vertex) on scene meshes with cached cell locators
+
+from dataclasses import dataclass
+
+import numpy as np
+import vtk
+from vtkmodules.util import numpy_support
+
+PICK_FACE, PICK_EDGE, PICK_VERTEX = "face", "edge", "vertex"
+PICK_KINDS = (PICK_FACE, PICK_EDGE, PICK_VERTEX)
+
+# Dihedral angle above which a mesh edge is a real (pickable) edge, degrees
+PICK_FEATURE_ANGLE = 30.0
+
+
+@dataclass
+class PickResult:
+    """What is under the cursor. Positions are in world coordinates.
+
+    face_id:  'FaceId' (B-rep face, explorer order) or 'RegionId' of the hit triangle, -1 if none
+    edge:     (p0, p1) of the snapped feature edge (kind == "edge")
+    vertex:   snapped corner (kind == "vertex")
+    instance: index inside an instanced group, -1 for plain objects
+    entity:   what the hit maps back to (see source_entity())
+    """
+    object_id: int
+    kind: str
+    cell_id: int
+    position: np.ndarray
+    t: float
+    instance: int = -1
+    face_id: int = -1
+    edge: tuple = None
+    vertex: np.ndarray = None
+    entity: object = None
+
+
+class MeshPickData:
+    """Acceleration structures for one mesh, valid while its MTime is unchanged.
+
+    cells:    vtkStaticCellLocator over the triangles (ray casts)
+    edges:    feature edges (boundaries + sharp creases) and a locator over them
+    corners:  feature-edge points where edges meet at an angle, and a point locator
+    """
+
+    def __init__(self, mesh, feature_angle=PICK_FEATURE_ANGLE):
+        self.mesh = mesh
+        self.mtime = mesh.GetMTime()
+        self.cells = vtk.vtkStaticCellLocator()
+        self.cells.SetDataSet(mesh)
+        self.cells.BuildLocator()
+        self.face_ids = self._cell_ids(mesh)
+        self._feature_angle = feature_angle
+        self._edges = None
+
+    @staticmethod
+    def _cell_ids(mesh):
+        for name in ("FaceId", "RegionId"):
+            arr = mesh.GetCellData().GetArray(name)
+            if arr is not None:
+                return numpy_support.vtk_to_numpy(arr)
+        return None
+
+    def _build_edges(self):
+        # coincident points are merged first: faces meshed separately (B-rep) or
+        # split for flat normals (extrusion walls) would otherwise all be boundaries
+        clean = vtk.vtkCleanPolyData()
+        clean.SetInputData(self.mesh)
+        clean.PointMergingOn()
+        features = vtk.vtkFeatureEdges()
+        features.SetInputConnection(clean.GetOutputPort())
+        features.SetFeatureAngle(self._feature_angle)
+        features.BoundaryEdgesOn()
+        features.FeatureEdgesOn()
+        features.NonManifoldEdgesOn()
+        features.ManifoldEdgesOff()
+        features.ColoringOff()
+        features.Update()
+        lines = features.GetOutput()
+
+        edge_locator = None
+        if lines.GetNumberOfCells():
+            edge_locator = vtk.vtkStaticCellLocator()
+            edge_locator.SetDataSet(lines)
+            edge_locator.BuildLocator()
+
+        corners = vtk.vtkPolyData()
+        corners.SetPoints(vtk.vtkPoints())
+        if lines.GetNumberOfLines():
+            pts = numpy_support.vtk_to_numpy(lines.GetPoints().GetData()).astype(np.float64)
+            conn = numpy_support.vtk_to_numpy(lines.GetLines().GetConnectivityArray()).astype(np.int64).reshape(-1, 2)
+            corners.GetPoints().SetData(numpy_support.numpy_to_vtk(
+                feature_corners(pts, conn, self._feature_angle), deep=True))
+        corner_locator = None
+        if corners.GetNumberOfPoints():
+            corner_locator = vtk.vtkStaticPointLocator()
+            corner_locator.SetDataSet(corners)
+            corner_locator.BuildLocator()
+        self._edges = (lines, edge_locator, corners, corner_locator)
+        return self._edges
+
+    @property
+    def edges(self):
+        """Built on first edge/vertex query — a face-only pick never pays for it."""
+        return self._edges if self._edges is not None else self._build_edges()
+
+    def intersect(self, p0, p1, tol=0.0):
+        """(t, x, cell_id) of the first triangle along p0 → p1 (local frame), or None."""
+        t, sub, cell_id = vtk.reference(0.0), vtk.reference(0), vtk.reference(-1)
+        x, pcoords = [0.0] * 3, [0.0] * 3
+        if not self.cells.IntersectWithLine(p0, p1, tol, t, x, pcoords, sub, cell_id):
+            return None
+        return float(t), np.array(x), int(cell_id)
+
+    def snap_vertex(self, x, radius):
+        """Nearest corner within radius, or None."""
+        _, _, corners, locator = self.edges
+        if locator is None:
+            return None
+        dist2 = vtk.reference(0.0)
+        pid = locator.FindClosestPointWithinRadius(radius, list(x), dist2)
+        return np.array(corners.GetPoint(pid)) if pid >= 0 else None
+
+    def snap_edge(self, x, radius):
+        """(closest point, p0, p1) on the nearest feature edge within radius, or None."""
+        lines, locator, _, _ = self.edges
+        if locator is None:
+            return None
+        closest, cell_id, sub, dist2 = [0.0] * 3, vtk.reference(-1), vtk.reference(0), vtk.reference(0.0)
+        if not locator.FindClosestPointWithinRadius(list(x), radius, closest, vtk.vtkGenericCell(),
+                                                    cell_id, sub, dist2):
+            return None
+        ids = lines.GetCell(int(cell_id)).GetPointIds()
+        return (np.array(closest), np.array(lines.GetPoint(ids.GetId(0))),
+                np.array(lines.GetPoint(ids.GetId(1))))
+
+
+def feature_corners(points, lines, feature_angle=PICK_FEATURE_ANGLE):
+    """Points of a 2-point line set that are ends (degree != 2) or turn by more than feature_angle."""
+    n = len(points)
+    degree = np.bincount(lines.ravel(), minlength=n)
+    ends = lines.ravel()
+    other = lines[:, ::-1].ravel()
+    order = np.argsort(ends, kind="stable")
+    ends, other = ends[order], other[order]
+
+    corner = degree != 2
+    through = np.flatnonzero(degree == 2)
+    first = np.searchsorted(ends, through)
+    a = points[other[first]] - points[through]
+    b = points[other[first + 1]] - points[through]
+    denom = np.maximum(np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1), 1e-30)
+    # straight through the point ⇔ a and b point in opposite directions
+    straight = np.einsum("ij,ij->i", a, b) / denom < -np.cos(np.radians(feature_angle))
+    corner[through[~straight]] = True
+    corner &= degree > 0
+    return np.ascontiguousarray(points[corner])
+
+
+class PickCache:
+    """MeshPickData per mesh; rebuilt only when the mesh MTime changes."""
+
+    def __init__(self):
+        self._data = {}
+
+    def get(self, mesh):
+        entry = self._data.get(id(mesh))
+        if entry is None or entry.mesh is not mesh or entry.mtime != mesh.GetMTime():
+            entry = MeshPickData(mesh)
+            self._data[id(mesh)] = entry
+        return entry
+
+    def discard(self, mesh):
+        self._data.pop(id(mesh), None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def instance_candidates(object_id, mesh, matrices, origin, direction):
+    """Candidates of an instanced group: only placements whose box the ray hits."""
+    from model.scene import BVH, transform_bounds
+
+    bounds = mesh.GetBounds()
+    boxes = [transform_bounds(bounds, m) for m in matrices]
+    if not boxes:
+        return []
+    with np.errstate(divide="ignore"):
+        inv_dir = 1.0 / np.asarray(direction, dtype=np.float64)
+    t = BVH._slab(np.array([b[0] for b in boxes]), np.array([b[1] for b in boxes]),
+                  np.asarray(origin, dtype=np.float64), inv_dir)
+    return [(object_id, int(i), mesh, matrices[i]) for i in np.flatnonzero(np.isfinite(t))]
+
+
+def _inverse_ray(matrix, origin, direction):
+    inv = np.linalg.inv(matrix)
+    return inv[:3, :3] @ origin + inv[:3, 3], inv[:3, :3] @ direction
+
+
+def pick(candidates, origin, direction, cache, tolerance=None, kinds=PICK_KINDS):
+    """Nearest face/edge/vertex along the ray origin → origin + direction.
+
+    candidates: [(object_id, instance, mesh, 4x4 matrix)] — usually the BVH hits
+    tolerance:  fn(world point) → snap radius in world units (e.g. a few pixels);
+                None picks faces only
+    kinds:      which of "face", "edge", "vertex" may be returned
+    """
+    origin = np.asarray(origin, dtype=np.float64)
+    direction = np.asarray(direction, dtype=np.float64)
+    best = None
+    for object_id, instance, mesh, matrix in candidates:
+        if mesh is None or mesh.GetNumberOfCells() == 0:
+            continue
+        matrix = np.asarray(matrix, dtype=np.float64)
+        o, d = _inverse_ray(matrix, origin, direction)
+        data = cache.get(mesh)
+        hit = data.intersect(o, o + d)
+        if hit is None or (best is not None and hit[0] >= best[0]):
+            continue
+        best = (hit[0], object_id, instance, matrix, data, hit[1], hit[2])
+    if best is None:
+        return None
+
+    t, object_id, instance, matrix, data, x, cell_id = best
+    world = matrix[:3, :3] @ x + matrix[:3, 3]
+    result = PickResult(object_id, PICK_FACE, cell_id, world, t, instance,
+                        int(data.face_ids[cell_id]) if data.face_ids is not None else -1)
+    if tolerance is None or not (PICK_VERTEX in kinds or PICK_EDGE in kinds):
+        return result
+
+    # snap radius in the mesh frame (mean scale of the placement)
+    radius = tolerance(world) / max(abs(np.linalg.det(matrix[:3, :3])) ** (1.0 / 3.0), 1e-12)
+    to_world = lambda p: matrix[:3, :3] @ p + matrix[:3, 3]
+    if PICK_VERTEX in kinds:
+        vertex = data.snap_vertex(x, radius)
+        if vertex is not None:
+            result.kind, result.vertex, result.position = PICK_VERTEX, to_world(vertex), to_world(vertex)
+            return result
+    if PICK_EDGE in kinds:
+        edge = data.snap_edge(x, radius)
+        if edge is not None:
+            closest, p0, p1 = edge
+            result.kind, result.edge, result.position = PICK_EDGE, (to_world(p0), to_world(p1)), to_world(closest)
+            return result
+    if PICK_FACE not in kinds:
+        return None
+    return result
+
+
+def source_entity(source, result):
+    """Map a pick back to what the mesh was built from.
+
+    - extrusion (ExtrudedMesh / ProfileSection): section.describe_cell(cell_id)
+      → cap or wall, face region, profile loop, loop segment and (walls) the
+        DXF handle of the entity the segment came from (the INSERT for blocks)
+    - B-rep (TopoDS_Shape): the TopoDS_Face with index face_id
+    """
+    section = getattr(source, "section", source)
+    if hasattr(section, "describe_cell"):
+        return section.describe_cell(result.cell_id)
+    if hasattr(source, "IsNull") and result.face_id >= 0:
+        from model.occ_mesh import face_by_index
+        return face_by_index(source, result.face_id)
+    return None
@@ -0,0 +1,262 @@
+# model/scene.py
+# Scene/document model: many objects with IDs, transforms and shared meshes + a BVH over their bounds
+
+import itertools
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# Max objects per BVH leaf
+BVH_LEAF_SIZE = 4
+
+
+def _box_corners(bounds):
+    """8 corners (8, 3) of a VTK-style bounds tuple (x0, x1, y0, y1, z0, z1)."""
+    x0, x1, y0, y1, z0, z1 = bounds
+    return np.array([(x, y, z) for x in (x0, x1) for y in (y0, y1) for z in (z0, z1)], dtype=np.float64)
+
+
+def transform_bounds(bounds, matrix):
+    """Axis-aligned (min (3,), max (3,)) of bounds moved by a 4x4 matrix."""
+    pts = _box_corners(bounds) @ matrix[:3, :3].T + matrix[:3, 3]
+    return pts.min(axis=0), pts.max(axis=0)
+
+
+@dataclass
+class SceneObject:
+    """One placed part. mesh is shared between objects that show the same geometry.
+
+    local_bounds: bounds of the mesh in its own frame (VTK order)
+    source:       what the mesh came from (ProfileGeometry, TopoDS_Shape, ...)
+    """
+    id: int
+    mesh: object
+    matrix: np.ndarray = field(default_factory=lambda: np.eye(4))
+    name: str = ""
+    kind: str = "part"
+    color: tuple = (0.4, 0.7, 1.0)
+    visible: bool = True
+    source: object = None
+    local_bounds: tuple = None
+
+    def __post_init__(self):
+        if self.local_bounds is None and self.mesh is not None:
+            self.local_bounds = tuple(self.mesh.GetBounds())
+
+    def world_box(self):
+        return transform_bounds(self.local_bounds, self.matrix)
+
+
+class BVH:
+    """Bounding-volume hierarchy over axis-aligned boxes.
+
+    Built top-down with a median split on the longest axis; nodes are kept
+    in flat arrays (bmin, bmax, left, right, start, count) and leaves point
+    into `items`. Queries walk the tree with an explicit stack.
+    """
+
+    def __init__(self, ids, bmin, bmax, leaf_size=BVH_LEAF_SIZE):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.box_min = np.asarray(bmin, dtype=np.float64).reshape(-1, 3)
+        self.box_max = np.asarray(bmax, dtype=np.float64).reshape(-1, 3)
+        self.leaf_size = leaf_size
+
+        nodes_min, nodes_max, left, right, start, count = [], [], [], [], [], []
+        items = []
+
+        def build(idx):
+            node = len(nodes_min)
+            nodes_min.append(self.box_min[idx].min(axis=0))
+            nodes_max.append(self.box_max[idx].max(axis=0))
+            left.append(-1)
+            right.append(-1)
+            start.append(len(items))
+            count.append(0)
+            if len(idx) <= leaf_size:
+                items.extend(idx.tolist())
+                count[node] = len(idx)
+                return node
+            centers = (self.box_min[idx] + self.box_max[idx]) * 0.5
+            axis = int(np.argmax(nodes_max[node] - nodes_min[node]))
+            order = idx[np.argsort(centers[:, axis], kind="stable")]
+            half = len(order) // 2
+            left[node] = build(order[:half])
+            right[node] = build(order[half:])
+            return node
+
+        if len(self.ids):
+            build(np.arange(len(self.ids)))
+        self.node_min = np.array(nodes_min).reshape(-1, 3)
+        self.node_max = np.array(nodes_max).reshape(-1, 3)
+        self.left = np.array(left, dtype=np.int64)
+        self.right = np.array(right, dtype=np.int64)
+        self.start = np.array(start, dtype=np.int64)
+        self.count = np.array(count, dtype=np.int64)
+        self.items = np.array(items, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def bounds(self):
+        """(min, max) of everything, or None when empty."""
+        if not len(self.node_min):
+            return None
+        return self.node_min[0], self.node_max[0]
+
+    def _walk(self, node_test, leaf_test):
+        """Generic traversal: node_test(node) prunes, leaf_test(items) filters."""
+        hits = []
+        if not len(self.node_min):
+            return hits
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if not node_test(node):
+                continue
+            if self.left[node] < 0:
+                leaf = self.items[self.start[node]:self.start[node] + self.count[node]]
+                hits.extend(leaf[leaf_test(leaf)].tolist())
+            else:
+                stack.append(self.left[node])
+                stack.append(self.right[node])
+        return hits
+
+    def query_box(self, bmin, bmax):
+        """ids of boxes overlapping [bmin, bmax]."""
+        bmin, bmax = np.asarray(bmin, dtype=np.float64), np.asarray(bmax, dtype=np.float64)
+        hits = self._walk(
+            lambda n: np.all(self.node_min[n] <= bmax) and np.all(self.node_max[n] >= bmin),
+            lambda i: np.all((self.box_min[i] <= bmax) & (self.box_max[i] >= bmin), axis=1),
+        )
+        return self.ids[hits].tolist()
+
+    @staticmethod
+    def _slab(bmin, bmax, origin, inv_dir):
+        """Ray/box entry distance (inf when missed), vectorized over boxes."""
+        with np.errstate(invalid="ignore"):
+            t1 = (bmin - origin) * inv_dir
+            t2 = (bmax - origin) * inv_dir
+        t1, t2 = np.nan_to_num(t1, nan=-np.inf), np.nan_to_num(t2, nan=np.inf)
+        near = np.minimum(t1, t2).max(axis=-1)
+        far = np.maximum(t1, t2).min(axis=-1)
+        return np.where((far >= np.maximum(near, 0.0)), np.maximum(near, 0.0), np.inf)
+
+    def query_ray(self, origin, direction):
+        """ids of boxes hit by the ray, nearest entry first."""
+        origin = np.asarray(origin, dtype=np.float64)
+        with np.errstate(divide="ignore"):
+            inv_dir = 1.0 / np.asarray(direction, dtype=np.float64)
+        hits = self._walk(
+            lambda n: np.isfinite(self._slab(self.node_min[n], self.node_max[n], origin, inv_dir)),
+            lambda i: np.isfinite(self._slab(self.box_min[i], self.box_max[i], origin, inv_dir)),
+        )
+        if not hits:
+            return []
+        hits = np.array(hits)
+        t = self._slab(self.box_min[hits], self.box_max[hits], origin, inv_dir)
+        return self.ids[hits[np.argsort(t, kind="stable")]].tolist()
+
+    def query_frustum(self, planes):
+        """ids of boxes not fully outside any plane. planes: (k, 4) with a*x+b*y+c*z+d >= 0 inside."""
+        planes = np.asarray(planes, dtype=np.float64).reshape(-1, 4)
+        normals, d = planes[:, :3], planes[:, 3]
+
+        def inside(bmin, bmax):
+            # "positive vertex" of each box for each plane
+            p = np.where(normals[None, :, :] >= 0, bmax[:, None, :], bmin[:, None, :])
+            return np.all(np.einsum("bpk,pk->bp", p, normals) + d >= 0, axis=1)
+
+        hits = self._walk(
+            lambda n: inside(self.node_min[n:n + 1], self.node_max[n:n + 1])[0],
+            lambda i: inside(self.box_min[i], self.box_max[i]),
+        )
+        return self.ids[hits].tolist()
+
+
+class Scene:
+    """Document of placed objects (profiles, bars, hardware).
+
+    Objects are addressed by integer id; the BVH is rebuilt lazily after
+    any add/remove/move.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self._ids = itertools.count(1)
+        self._bvh = None
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __iter__(self):
+        return iter(self.objects.values())
+
+    def add(self, mesh, matrix=None, **kwargs):
+        obj = SceneObject(next(self._ids), mesh,
+                          np.eye(4) if matrix is None else np.asarray(matrix, dtype=np.float64), **kwargs)
+        self.objects[obj.id] = obj
+        self._bvh = None
+        return obj
+
+    def remove(self, object_id):
+        obj = self.objects.pop(object_id, None)
+        self._bvh = None
+        return obj
+
+    def clear(self):
+        self.objects.clear()
+        self._bvh = None
+
+    def get(self, object_id):
+        return self.objects.get(object_id)
+
+    def set_matrix(self, object_id, matrix):
+        self.objects[object_id].matrix = np.asarray(matrix, dtype=np.float64)
+        self._bvh = None
+
+    def set_mesh(self, object_id, mesh):
+        """Geometry of an object changed (e.g. new extrusion length)."""
+        obj = self.objects[object_id]
+        obj.mesh = mesh
+        obj.local_bounds = tuple(mesh.GetBounds())
+        self._bvh = None
+
+    def invalidate(self):
+        """Call after editing a shared mesh in place."""
+        for obj in self.objects.values():
+            if obj.mesh is not None:
+                obj.local_bounds = tuple(obj.mesh.GetBounds())
+        self._bvh = None
+
+    def shared_meshes(self):
+        """{id(mesh): [object ids]} — how many objects reuse each mesh."""
+        groups = {}
+        for obj in self.objects.values():
+            groups.setdefault(id(obj.mesh), []).append(obj.id)
+        return groups
+
+    @property
+    def bvh(self):
+        if self._bvh is None:
+            visible = [o for o in self.objects.values() if o.visible and o.local_bounds is not None]
+            boxes = [o.world_box() for o in visible]
+            self._bvh = BVH([o.id for o in visible],
+                            [b[0] for b in boxes], [b[1] for b in boxes])
+        return self._bvh
+
+    def bounds(self):
+        """VTK-style bounds of all visible objects (fit-to-view), or None."""
+        box = self.bvh.bounds()
+        if box is None:
+            return None
+        (x0, y0, z0), (x1, y1, z1) = box
+        return (x0, x1, y0, y1, z0, z1)
+
+    def pick_candidates(self, origin, direction):
+        return self.bvh.query_ray(origin, direction)
+
+    def in_box(self, bmin, bmax):
+        return self.bvh.query_box(bmin, bmax)
+
+    def visible_in(self, planes):
+        return self.bvh.query_frustum(planes)
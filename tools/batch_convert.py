@@ -0,0 +1,188 @@
+# tools/batch_convert.py
+# Headless DXF → extruded mesh conversion (no PyQt): parallel, binary output, JSON report
+#
+#   python -m tools.batch_convert profiles/ -o out/ --depth 6000 --format vtp stl --report report.json
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import vtk
+
+from core.batch_import import find_dxf_files
+from core.dxf_cache import CACHE_DIR, DXFCache
+from core.dxf_loader import load_dxf_profile
+from tools.extrude_tool import ExtrudeTool
+
+FORMATS = ("vtp", "stl", "ply")
+
+
+def write_mesh(polydata, path, fmt):
+    """Binary writers only: compressed appended VTP, binary STL / PLY."""
+    if fmt == "vtp":
+        writer = vtk.vtkXMLPolyDataWriter()
+        writer.SetDataModeToAppended()
+        writer.EncodeAppendedDataOff()
+        writer.SetCompressorTypeToZLib()
+    elif fmt == "stl":
+        writer = vtk.vtkSTLWriter()
+        writer.SetFileTypeToBinary()
+    elif fmt == "ply":
+        writer = vtk.vtkPLYWriter()
+        writer.SetFileTypeToBinary()
+    else:
+        raise ValueError(f"unknown format: {fmt}")
+    writer.SetFileName(str(path))
+    writer.SetInputData(polydata)
+    if not writer.Write():
+        raise IOError(f"failed to write {path}")
+
+
+def init_worker(quiet=True):
+    """Process pool initializer: loader / extruder logs reach stderr only with --verbose."""
+    if quiet:
+        logging.disable(logging.CRITICAL)
+    else:
+        logging.basicConfig(level=logging.DEBUG, format="%(processName)s %(name)s: %(message)s")
+
+
+def convert_one(file_path, out_base, depth, flip, formats, cache_dir=None, quiet=True):
+    """Worker: parse → tessellate → extrude → write. Returns a JSON-ready dict.
+
+    The extrusion runs along the section normal (reversed with flip): an axis
+    inside the profile plane would give a flat, zero-volume solid.
+    """
+    entry = {"file": file_path, "ok": False, "outputs": [], "timings": {}, "error": ""}
+    timings = entry["timings"]
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log) if quiet else contextlib.nullcontext():
+            t0 = time.perf_counter()
+            if cache_dir is not None:
+                profile = DXFCache(cache_dir).load(file_path)
+            else:
+                profile = load_dxf_profile(file_path)
+            t1 = time.perf_counter()
+            timings["parse"] = t1 - t0
+            if profile is None:
+                entry["error"] = "no valid geometry"
+                return entry
+
+            polydata = profile.to_polydata()
+            t2 = time.perf_counter()
+            timings["tessellate"] = t2 - t1
+
+            extruded = ExtrudeTool.create_extruded(polydata, depth=depth, flip=flip)
+            t3 = time.perf_counter()
+            timings["extrude"] = t3 - t2
+            if extruded is None:
+                entry["error"] = "extrusion failed (no closed loops)"
+                return entry
+            solid = extruded.polydata
+
+            out_base.parent.mkdir(parents=True, exist_ok=True)
+            for fmt in formats:
+                path = out_base.with_suffix(f".{fmt}")
+                write_mesh(solid, path, fmt)
+                entry["outputs"].append(str(path))
+            timings["write"] = time.perf_counter() - t3
+
+        entry.update(ok=True, points=solid.GetNumberOfPoints(), triangles=solid.GetNumberOfPolys(),
+                     loops=profile.num_loops)
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+
+def collect_inputs(inputs, recursive=True):
+    """[(file, relative output stem)] — folders keep their sub-folder layout."""
+    jobs = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            for f in find_dxf_files(path, recursive):
+                jobs.append((f, Path(f).relative_to(path).with_suffix("")))
+        elif path.is_file():
+            jobs.append((str(path), Path(path.stem)))
+        else:
+            print(f"⚠️ [Convert] Not found: {item}", file=sys.stderr)
+    return jobs
+
+
+def run(inputs, out_dir, depth=60.0, flip=False, formats=("vtp",), workers=None, cache_dir=None,
+        recursive=True, quiet=True):
+    """Convert every input in parallel and return the report dict."""
+    jobs = collect_inputs(inputs, recursive)
+    out_dir = Path(out_dir)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+
+    t0 = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(quiet,)) as pool:
+        futures = [pool.submit(convert_one, f, out_dir / rel, depth, flip, formats, cache_dir, quiet)
+                   for f, rel in jobs]
+        for future in as_completed(futures):
+            r = future.result()
+            results.append(r)
+            status = "✅" if r["ok"] else "❌"
+            print(f"{status} [{len(results)}/{len(jobs)}] {r['file']}"
+                  + (f" — {r['error']}" if r["error"] else ""), file=sys.stderr)
+
+    order = {f: i for i, (f, _) in enumerate(jobs)}
+    results.sort(key=lambda r: order[r["file"]])
+    totals = {}
+    for r in results:
+        for stage, t in r["timings"].items():
+            totals[stage] = totals.get(stage, 0.0) + t
+    return {
+        "settings": {"depth": depth, "flip": flip, "formats": list(formats),
+                     "workers": workers, "cache_dir": str(cache_dir) if cache_dir else None},
+        "wall_time": time.perf_counter() - t0,
+        "succeeded": sum(r["ok"] for r in results),
+        "failed": sum(not r["ok"] for r in results),
+        "stage_totals": totals,
+        "files": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert DXF profiles to extruded meshes (headless).")
+    parser.add_argument("inputs", nargs="+", help="DXF files or folders")
+    parser.add_argument("-o", "--out", default="out", help="output folder (default: out)")
+    parser.add_argument("--depth", type=float, default=60.0, help="extrusion length in mm")
+    parser.add_argument("--flip", action="store_true",
+                        help="extrude against the section normal (default: along it)")
+    parser.add_argument("--format", nargs="+", default=["vtp"], choices=FORMATS, dest="formats")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--cache", nargs="?", const=str(CACHE_DIR), default=None,
+                        help=f"reuse parsed profiles from a DXFCache folder (bare --cache: {CACHE_DIR})")
+    parser.add_argument("--no-recursive", action="store_false", dest="recursive")
+    parser.add_argument("--report", default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("-v", "--verbose", action="store_false", dest="quiet",
+                        help="show loader / extruder logs from the workers")
+    args = parser.parse_args(argv)
+
+    report = run(args.inputs, args.out, args.depth, args.flip, args.formats, args.workers,
+                 args.cache, args.recursive, args.quiet)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.report:
+        Path(args.report).write_text(text, encoding="utf-8")
+        print(f"📝 [Convert] {report['succeeded']}/{report['succeeded'] + report['failed']} files, "
+              f"{report['wall_time']:.2f}s — report: {args.report}", file=sys.stderr)
+    else:
+        print(text)
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
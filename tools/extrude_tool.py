@@ -1,34 +1,440 @@
+import logging
+
+import numpy as np
 import vtk
+from vtkmodules.util import numpy_support
+
+from core.loop_assembler import assemble_loops
+from core.profile_geometry import SOURCE_ARRAY, source_to_handle
+
+log = logging.getLogger(__name__)
+
+
+# محركات الإكسترود المتاحة:
+#   "vtk"   فلاتر VTK على الخطوط
+#   "occ"   Prism دقيق في OCC
+#   "numpy" تثليث الغطاء مرة واحدة + الجدران والغطاء العلوي بعمليات مصفوفات
+ENGINES = ("vtk", "occ", "numpy")
+
+# اتجاهات الإكسترود
+AXES = {"X": (1, 0, 0), "Y": (0, 1, 0), "Z": (0, 0, 1)}
+
+# نعومة normals الجدران: الزوايا الأصغر من هذه تُنعّم (أقواس)، الأكبر تبقى حادة (أركان)
+FEATURE_ANGLE = 30.0
+
+
+class SurfaceRegions:
+    """خلايا سطح مقسّمة حسب RegionId (من vtkPolyDataConnectivityFilter) في تمريرة واحدة.
+
+    cells[r]:  أرقام خلايا المنطقة r
+    areas[r]:  مساحة المنطقة r
+    """
+
+    def __init__(self, surface, region_ids):
+        self.surface = surface
+        self.region_ids = np.asarray(region_ids, dtype=np.int64)
+        n = int(self.region_ids.max()) + 1 if len(self.region_ids) else 0
+
+        polys = surface.GetPolys()
+        self._offsets = numpy_support.vtk_to_numpy(polys.GetOffsetsArray()).astype(np.int64)
+        self._conn = numpy_support.vtk_to_numpy(polys.GetConnectivityArray()).astype(np.int64)
+
+        # argsort واحد ثم split حسب عدد الخلايا لكل منطقة
+        order = np.argsort(self.region_ids, kind="stable")
+        counts = np.bincount(self.region_ids, minlength=n)
+        self.cells = np.split(order, np.cumsum(counts)[:-1]) if n else []
+        self.areas = np.bincount(self.region_ids, weights=self.cell_areas(), minlength=n)
+
+    @classmethod
+    def from_polydata(cls, surface, array_name="RegionId"):
+        """RegionId من بيانات الخلايا، أو من أول نقطة في كل خلية (مخرج الـ connectivity نقطي)."""
+        arr = surface.GetCellData().GetArray(array_name)
+        if arr is not None:
+            return cls(surface, numpy_support.vtk_to_numpy(arr))
+        point_ids = numpy_support.vtk_to_numpy(surface.GetPointData().GetArray(array_name))
+        polys = surface.GetPolys()
+        offsets = numpy_support.vtk_to_numpy(polys.GetOffsetsArray())
+        conn = numpy_support.vtk_to_numpy(polys.GetConnectivityArray())
+        regions = cls(surface, point_ids[conn[offsets[:-1]]])
+
+        # نحفظها كبيانات خلايا لتبقى بعد الإكسترود (تلوين كل حجرة مثلاً)
+        cell_arr = numpy_support.numpy_to_vtk(regions.region_ids.astype(np.int32), deep=True)
+        cell_arr.SetName(array_name)
+        surface.GetCellData().AddArray(cell_arr)
+        return regions
+
+    @property
+    def num_regions(self):
+        return len(self.cells)
+
+    def cell_areas(self):
+        """مساحة كل مضلع: 0.5 * |Σ p_i × p_(i+1)| محسوبة لكل الخلايا معاً."""
+        if len(self._conn) == 0:
+            return np.zeros(0)
+        pts = numpy_support.vtk_to_numpy(self.surface.GetPoints().GetData()).astype(np.float64)
+        nxt = np.arange(1, len(self._conn) + 1)
+        nxt[self._offsets[1:] - 1] = self._offsets[:-1]   # آخر نقطة ترجع لأول نقطة في الخلية
+        cross = np.cross(pts[self._conn], pts[self._conn[nxt]])
+        return 0.5 * np.linalg.norm(np.add.reduceat(cross, self._offsets[:-1]), axis=1)
+
+    def attach(self, polydata, array_name="RegionArea"):
+        """مساحات المناطق كـ field data على polydata (الفهرس = RegionId في بيانات الخلايا)."""
+        arr = numpy_support.numpy_to_vtk(np.ascontiguousarray(self.areas, dtype=np.float64), deep=True)
+        arr.SetName(array_name)
+        polydata.GetFieldData().AddArray(arr)
+        return polydata
+
+    def extract(self, region):
+        """vtkPolyData بخلايا منطقة واحدة فقط (نفس النقاط)."""
+        cells = self.cells[region]
+        starts, sizes = self._offsets[cells], np.diff(self._offsets)[cells]
+        first = np.repeat(starts - np.concatenate(([0], np.cumsum(sizes)[:-1])), sizes)
+        conn = self._conn[first + np.arange(sizes.sum())]
+        polys = vtk.vtkCellArray()
+        polys.SetData(numpy_support.numpy_to_vtkIdTypeArray(
+                          np.concatenate(([0], np.cumsum(sizes))).astype(np.int64), deep=True),
+                      numpy_support.numpy_to_vtkIdTypeArray(conn, deep=True))
+        out = vtk.vtkPolyData()
+        out.SetPoints(self.surface.GetPoints())
+        out.SetPolys(polys)
+        return out
+
+
+def region_areas(polydata, array_name="RegionArea"):
+    """مساحات المناطق المرفقة بالمجسم (SurfaceRegions.attach) أو None."""
+    arr = polydata.GetFieldData().GetArray(array_name) if polydata is not None else None
+    return None if arr is None else numpy_support.vtk_to_numpy(arr)
+
+
+def axis_direction(axis):
+    """متجه الإكسترود لمحور بالاسم (Y افتراضياً)."""
+    return AXES.get(str(axis).upper(), (0, 1, 0))
+
+
+class ProfileSection:
+    """مقطع جاهز للإكسترود: حلقات مرتبة + تثليث الغطاء (يُحسب مرة واحدة).
+
+    points:        (N, 3) رؤوس كل الحلقات متتالية في مستوى المقطع
+    loop_offsets:  (L + 1,) بداية كل حلقة في points
+    cap_triangles: (T, 3) تثليث الغطاء مع احترام الثقوب (vtkContourTriangulator)
+    loop_regions:  (L,) رقم الوجه (حلقة خارجية + ثقوبها) لكل حلقة
+    normal:        عمودي المستوى (الحلقات الخارجية CCW حوله)
+    sources:       (N,) handle كيان DXF للضلع الذي يبدأ من كل رأس كرقم (-1 = غير معروف)
+    """
+
+    def __init__(self, points, loop_offsets, cap_triangles, loop_regions, normal, sources=None):
+        self.points = points
+        self.loop_offsets = loop_offsets
+        self.cap_triangles = cap_triangles
+        self.loop_regions = loop_regions
+        self.normal = normal
+        self.sources = sources if sources is not None else np.full(len(points), -1, dtype=np.int64)
+        self._templates = {}
+
+        # الجار التالي/السابق لكل رأس داخل حلقته (آخر رأس يرجع للأول)
+        n = len(points)
+        starts, ends = loop_offsets[:-1], loop_offsets[1:]
+        self.next = np.arange(1, n + 1)
+        self.next[ends - 1] = starts
+        self.prev = np.empty(n, dtype=np.int64)
+        self.prev[self.next] = np.arange(n)
+        self.vertex_loop = np.repeat(np.arange(len(starts)), ends - starts)
+
+    @classmethod
+    def from_assembly(cls, assembly, frame):
+        wire = ExtrudeTool._loops_to_wire(assembly, frame)
+
+        # vtkContourTriangulator يعيد استخدام نقاط الإدخال ويحترم الثقوب
+        tri = vtk.vtkContourTriangulator()
+        tri.SetInputData(wire)
+        tri.Update()
+        surface = tri.GetOutput()
+        if surface.GetNumberOfPolys() == 0:
+            return None
+        polys = surface.GetPolys()
+        offsets = numpy_support.vtk_to_numpy(polys.GetOffsetsArray())
+        if np.any(np.diff(offsets) != 3):
+            triangles = vtk.vtkTriangleFilter()
+            triangles.SetInputData(surface)
+            triangles.Update()
+            polys = triangles.GetOutput().GetPolys()
+        cap = numpy_support.vtk_to_numpy(polys.GetConnectivityArray()).astype(np.int64).reshape(-1, 3)
+
+        sizes = np.array([len(v) for v, _, _ in assembly.loops], dtype=np.int64)
+        loop_offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        points = numpy_support.vtk_to_numpy(wire.GetPoints().GetData()).astype(np.float64)
+
+        loop_regions = np.arange(len(sizes), dtype=np.int64)
+        for region, (outer, holes) in enumerate(assembly.faces()):
+            loop_regions[[outer] + holes] = region
+
+        u, v, _, _ = frame
+        normal = np.cross(np.eye(3)[u], np.eye(3)[v])
+        return cls(points, loop_offsets, cap, loop_regions, normal, np.concatenate(assembly.sources))
+
+    def _side_normals(self):
+        """(N, 2, 3) normal عند بداية ونهاية كل ضلع — منعّمة عبر الزوايا الصغيرة."""
+        edge = self.points[self.next] - self.points
+        out = np.cross(edge, self.normal)
+        out /= np.maximum(np.linalg.norm(out, axis=1), 1e-12)[:, None]
+
+        # عند كل رأس: متوسط normal الضلعين إذا كانت الزاوية بينهما صغيرة
+        avg = out[self.prev] + out
+        avg /= np.maximum(np.linalg.norm(avg, axis=1), 1e-12)[:, None]
+        smooth = np.einsum("ij,ij->i", out[self.prev], out) > np.cos(np.radians(FEATURE_ANGLE))
+        at_vertex = np.where(smooth[:, None], avg, out)
+
+        start = at_vertex
+        end = np.where(smooth[self.next][:, None], at_vertex[self.next], out)
+        return np.stack((start, end), axis=1)
+
+    def _template(self, up):
+        """طوبولوجيا الإكسترود لاتجاه واحد (up = ±1 بالنسبة لـ normal) — تُبنى مرة واحدة.
+
+        (points0, lift, polys, normals, regions): نقاط عند عمق 0، و lift = 1 للنقاط
+        التي تتحرك مع العمق؛ الخلايا والـ normals و RegionId كائنات VTK مشتركة.
+        """
+        cached = self._templates.get(up)
+        if cached is not None:
+            return cached
+
+        n = len(self.points)
+        # ---------- الغطاءان: 0..N-1 سفلي، N..2N-1 علوي ----------
+        p = self.points
+        a, b, c = self.cap_triangles.T
+        facing = np.einsum("ij,j->i", np.cross(p[b] - p[a], p[c] - p[a]), self.normal) * up
+        bottom = np.where((facing > 0)[:, None], self.cap_triangles[:, ::-1], self.cap_triangles)
+        top = bottom[:, ::-1] + n
+
+        # ---------- الجدران: 4 رؤوس لكل ضلع (b_i, b_j, t_i, t_j) ----------
+        base = 2 * n + 4 * np.arange(n)
+        q0, q1, q2, q3 = base, base + 1, base + 2, base + 3
+        if up > 0:
+            walls = np.stack((np.column_stack((q0, q1, q3)), np.column_stack((q0, q3, q2))), axis=1)
+        else:
+            walls = np.stack((np.column_stack((q0, q3, q1)), np.column_stack((q0, q2, q3))), axis=1)
+
+        side = np.stack((p, p[self.next], p, p[self.next]), axis=1)
+        edge_normals = self._side_normals()
+        side_normals = np.concatenate((edge_normals, edge_normals), axis=1)
+
+        points0 = np.concatenate((p, p, side.reshape(-1, 3)))
+        lift = np.concatenate((np.zeros(n), np.ones(n), np.tile([0.0, 0.0, 1.0, 1.0], n)))
+        cap_normal = self.normal * up
+        normals = np.concatenate((np.broadcast_to(-cap_normal, (n, 3)),
+                                  np.broadcast_to(cap_normal, (n, 3)),
+                                  side_normals.reshape(-1, 3)))
+        triangles = np.concatenate((bottom, top, walls.reshape(-1, 3)))
+
+        cap_regions = self.loop_regions[self.vertex_loop[a]]
+        regions = np.concatenate((cap_regions, cap_regions,
+                                  np.repeat(self.loop_regions[self.vertex_loop], 2)))
+
+        shared = _triangles_to_polydata(points0, triangles, normals, regions)
+        cached = (points0, lift, shared.GetPolys(), shared.GetPointData().GetNormals(),
+                  shared.GetCellData().GetArray("RegionId"))
+        self._templates[up] = cached
+        return cached
+
+    def direction(self, flip=False):
+        """اتجاه الإكسترود: عمودي المقطع، أو عكسه مع flip."""
+        return -self.normal if flip else self.normal.copy()
+
+    def _checked_direction(self, direction):
+        """الاتجاه كمصفوفة — ويُرفض إن كان داخل مستوى المقطع (حجم صفري)."""
+        direction = np.asarray(direction, dtype=np.float64)
+        if abs(np.dot(direction, self.normal)) <= 1e-9 * max(np.linalg.norm(direction), 1e-300):
+            raise ValueError(f"extrusion direction {direction.tolist()} lies in the section plane "
+                             f"(normal {self.normal.tolist()})")
+        return direction
+
+    def describe_cell(self, cell_id):
+        """ما يمثله مثلث من الإكسترود (ترتيب الخلايا ثابت: غطاء سفلي، علوي، ثم مثلثان لكل ضلع).
+
+        role:    "bottom" / "top" / "side"
+        region:  رقم الوجه (حلقة خارجية + ثقوبها)
+        loop:    رقم الحلقة، segment: رقم الضلع داخلها مع نقطتيه في مستوى المقطع (للجدران)
+        entity:  handle كيان DXF الذي جاء منه الضلع (أو الـ INSERT للبلوكات)، None إن لم يُعرف
+        """
+        t = len(self.cap_triangles)
+        if cell_id < 2 * t:
+            vertex = self.cap_triangles[cell_id % t, 0]
+            return {"role": "bottom" if cell_id < t else "top",
+                    "region": int(self.loop_regions[self.vertex_loop[vertex]])}
+        vertex = (cell_id - 2 * t) // 2
+        loop = int(self.vertex_loop[vertex])
+        return {"role": "side", "region": int(self.loop_regions[loop]), "loop": loop,
+                "segment": int(vertex - self.loop_offsets[loop]),
+                "entity": source_to_handle(self.sources[vertex]),
+                "points": (self.points[vertex], self.points[self.next[vertex]])}
+
+    def extrude(self, depth, direction):
+        """vtkPolyData مثلثات (غطاءان + جدران) مع Normals و RegionId."""
+        return self.extrude_many([depth], direction)[0]
+
+    def extrude_many(self, depths, direction):
+        """قائمة vtkPolyData لكل عمق — الخلايا والـ normals و RegionId مشتركة بين الكل.
+
+        نقاط كل الأطوال تُحسب بعملية broadcasting واحدة، وكل mesh يشير إلى
+        شريحته بدون نسخ.
+        """
+        direction = self._checked_direction(direction)
+        depths = np.asarray(depths, dtype=np.float64)
+        ups = np.where(depths * np.dot(direction, self.normal) >= 0, 1.0, -1.0)
+        out = [None] * len(depths)
+        for up in np.unique(ups):
+            idx = np.flatnonzero(ups == up)
+            points0, lift, polys, normals, regions = self._template(float(up))
+            # الشيء الوحيد الذي يتغير مع العمق: النقاط العلوية
+            offsets = depths[idx, None] * direction
+            all_points = points0[None, :, :] + lift[None, :, None] * offsets[:, None, :]
+            for k, i in enumerate(idx):
+                vtk_points = vtk.vtkPoints()
+                vtk_points.SetData(numpy_support.numpy_to_vtk(all_points[k], deep=False))
+                poly = vtk.vtkPolyData()
+                poly.SetPoints(vtk_points)
+                poly.SetPolys(polys)
+                poly.GetPointData().SetNormals(normals)
+                poly.GetCellData().AddArray(regions)
+                out[i] = poly
+        return out
+
+    def extrude_instances(self, depths, direction):
+        """تمثيل بالنسخ: (mesh بعمق 1، مصفوفات 4x4 تمدّه على اتجاه الإكسترود).
+
+        المصفوفة تمدّ بمعامل d على الاتجاه فقط مع تثبيت مستوى المقطع، لذا
+        normals الجدران (عمودية على الاتجاه) تبقى صحيحة. الطول <= 0 يُرفض (ValueError):
+        d سالب يعكس الـ mesh فيصبح مقلوباً (الأوجه للداخل) — للاتجاه المعاكس استخدم direction(flip=True).
+        """
+        bad = [d for d in depths if not d > 0]
+        if bad:
+            raise ValueError(f"cut lengths must be positive, got {bad}")
+        direction = self._checked_direction(direction)
+        direction = direction / np.linalg.norm(direction)
+        unit = self.extrude(1.0, direction)
+        origin = self.points[0]
+        outer = np.outer(direction, direction)
+        matrices = []
+        for d in depths:
+            m = np.eye(4)
+            m[:3, :3] += (d - 1.0) * outer
+            m[:3, 3] = -(d - 1.0) * outer @ origin
+            matrices.append(m)
+        return unit, matrices
+
+
+class ExtrudedMesh:
+    """إكسترود قابل للتعديل في مكانه: تغيير العمق أو المحور يعيد كتابة النقاط المتحركة فقط.
+
+    top_cap:   أرقام نقاط الغطاء العلوي
+    side_top:  أرقام نقاط الجدران عند الحافة العلوية
+    moving:    الاثنان معاً (كل ما يتغير مع العمق)
+    """
+
+    def __init__(self, section, depth, direction):
+        self.section = section
+        self.depth = float(depth)
+        self.direction = section._checked_direction(direction)
+        self._up = self._up_for(self.depth, self.direction)
+
+        n = len(section.points)
+        points0, lift, _, _, _ = section._template(self._up)
+        self._points0 = points0
+        self.top_cap = np.arange(n, 2 * n)
+        self.side_top = 2 * n + np.flatnonzero(lift[2 * n:])
+        self.moving = np.concatenate((self.top_cap, self.side_top))
+
+        # نسخة نقاط خاصة بهذا الـ mesh (يُكتب فيها مباشرة)
+        self.polydata = section.extrude(self.depth, self.direction)
+        self._xyz = numpy_support.vtk_to_numpy(self.polydata.GetPoints().GetData())
+
+    def _up_for(self, depth, direction):
+        return 1.0 if depth * np.dot(direction, self.section.normal) >= 0 else -1.0
+
+    def update(self, depth=None, direction=None):
+        """تغيير العمق/الاتجاه: كتابة النقاط المتحركة + Modified() بدون إعادة بناء.
+
+        الاتجاه داخل مستوى المقطع يُرفض (ValueError) ويبقى الـ mesh كما هو.
+        """
+        if direction is not None:
+            direction = self.section._checked_direction(direction)
+        if depth is not None:
+            self.depth = float(depth)
+        if direction is not None:
+            self.direction = direction
+
+        up = self._up_for(self.depth, self.direction)
+        if up != self._up:
+            # انعكاس الاتجاه يقلب ترتيب المثلثات والـ normals — نأخذها من القالب الآخر
+            _, _, polys, normals, regions = self.section._template(up)
+            self.polydata.SetPolys(polys)
+            self.polydata.GetPointData().SetNormals(normals)
+            self.polydata.GetCellData().AddArray(regions)
+            self._up = up
+
+        self._xyz[self.moving] = self._points0[self.moving] + self.depth * self.direction
+        self.polydata.GetPoints().Modified()
+        self.polydata.Modified()
+        return self.polydata
+
+
+def _triangles_to_polydata(points, triangles, normals=None, regions=None):
+    """vtkPolyData من مصفوفات NumPy بنسخة واحدة لكل مصفوفة."""
+    vtk_points = vtk.vtkPoints()
+    vtk_points.SetData(numpy_support.numpy_to_vtk(np.ascontiguousarray(points, dtype=np.float64), deep=True))
+    polys = vtk.vtkCellArray()
+    polys.SetData(
+        numpy_support.numpy_to_vtkIdTypeArray(np.arange(0, 3 * len(triangles) + 1, 3, dtype=np.int64), deep=True),
+        numpy_support.numpy_to_vtkIdTypeArray(np.ascontiguousarray(triangles, dtype=np.int64).ravel(), deep=True),
+    )
+    out = vtk.vtkPolyData()
+    out.SetPoints(vtk_points)
+    out.SetPolys(polys)
+    if normals is not None:
+        arr = numpy_support.numpy_to_vtk(np.ascontiguousarray(normals, dtype=np.float64), deep=True)
+        arr.SetName("Normals")
+        out.GetPointData().SetNormals(arr)
+    if regions is not None:
+        arr = numpy_support.numpy_to_vtk(np.ascontiguousarray(regions, dtype=np.int32), deep=True)
+        arr.SetName("RegionId")
+        out.GetCellData().AddArray(arr)
+    return out
 
 
 class ExtrudeTool:
     """أداة إنشاء إكسترود 3D من شكل 2D (PolyData) مع دعم الثقوب الداخلية."""
 
     @staticmethod
-    def create_extrude(input_polydata, depth=50.0, axis="Y"):
+    def create_extrude(input_polydata, depth=50.0, axis="Y", engine="vtk"):
+        """مجسم الإكسترود كـ vtkPolyData.
+
+        محرك vtk: كل خلية تحمل RegionId (الحلقة/الحجرة)، ومساحة كل منطقة في
+        field data باسم RegionArea — تُقرأ بـ region_areas(out).
+        """
         if input_polydata is None or input_polydata.GetNumberOfPoints() == 0:
-            print("⚠️ [ExtrudeTool] لا يوجد شكل 2D صالح للإكسترود.")
+            log.warning("[ExtrudeTool] لا يوجد شكل 2D صالح للإكسترود.")
+            return None
+        if engine not in ENGINES:
+            log.warning("[ExtrudeTool] محرك غير معروف: %s (المتاح: %s)", engine, ", ".join(ENGINES))
             return None
 
-        axis_map = {"X": (1, 0, 0), "Y": (0, 1, 0), "Z": (0, 0, 1)}
-        direction = axis_map.get(axis.upper(), (0, 1, 0))
+        direction = axis_direction(axis)
 
         try:
             # -------------------------------------------------------------
-            # 1️⃣ تنظيف الشكل من النقاط المكررة
+            # 1️⃣ + 2️⃣ ربط الخطوط في حلقات مغلقة (hash grid بدل clean + stripper)
             # -------------------------------------------------------------
-            cleaner = vtk.vtkCleanPolyData()
-            cleaner.SetInputData(input_polydata)
-            cleaner.Update()
-            clean_data = cleaner.GetOutput()
+            assembly, frame = ExtrudeTool._assemble(input_polydata)
+            if not assembly.loops:
+                log.warning("[ExtrudeTool] لا توجد حلقات مغلقة في الشكل.")
+                return None
 
-            # -------------------------------------------------------------
-            # 2️⃣ ربط الخطوط لتكوين wire مغلق
-            # -------------------------------------------------------------
-            stripper = vtk.vtkStripper()
-            stripper.SetInputData(clean_data)
-            stripper.Update()
-            wire_data = stripper.GetOutput()
+            if engine == "occ":
+                return ExtrudeTool._extrude_occ(assembly, frame, depth, direction)
+            if engine == "numpy":
+                return ExtrudeTool._extrude_numpy(assembly, frame, depth, direction)
+
+            wire_data = ExtrudeTool._loops_to_wire(assembly, frame)
 
             # -------------------------------------------------------------
             # 3️⃣ تحويل الخطوط إلى سطح مغلق (Polygon)
@@ -39,7 +445,7 @@ class ExtrudeTool:
             surface_data = boundary.GetOutput()
 
             if surface_data.GetNumberOfPolys() == 0:
-                print("⚠️ [ExtrudeTool] لم يتمكن من إنشاء سطح مغلق من الخطوط.")
+                log.warning("[ExtrudeTool] لم يتمكن من إنشاء سطح مغلق من الخطوط.")
                 return None
 
             # -------------------------------------------------------------
@@ -52,29 +458,14 @@ class ExtrudeTool:
             connect.Update()
 
             num_regions = connect.GetNumberOfExtractedRegions()
-            print(f"🔹 [ExtrudeTool] عدد الحلقات المكتشفة: {num_regions}")
-
-            surf_with_regions = connect.GetOutput()
-            append = vtk.vtkAppendPolyData()
+            log.debug("[ExtrudeTool] عدد الحلقات المكتشفة: %d", num_regions)
 
-            for region_id in range(num_regions):
-                thresh = vtk.vtkThreshold()
-                thresh.SetInputData(surf_with_regions)
-                # ✅ الطريقة الحديثة بدل ThresholdBetween
-                thresh.SetLowerThreshold(region_id)
-                thresh.SetUpperThreshold(region_id)
-                thresh.Update()
-
-                geom = vtk.vtkGeometryFilter()
-                geom.SetInputConnection(thresh.GetOutputPort())
-                geom.Update()
-                region_poly = geom.GetOutput()
-
-                if region_poly.GetNumberOfPoints() > 0:
-                    append.AddInputData(region_poly)
-
-            append.Update()
-            full_surface = append.GetOutput()
+            # تقسيم الخلايا حسب المنطقة في تمريرة واحدة (بدل vtkThreshold لكل منطقة)
+            full_surface = connect.GetOutput()
+            regions = SurfaceRegions.from_polydata(full_surface)
+            log.debug("[ExtrudeTool] مساحات المناطق: %s%s",
+                      ", ".join(f"{a:.1f}" for a in regions.areas[:10]),
+                      " ..." if regions.num_regions > 10 else "")
 
             # -------------------------------------------------------------
             # 4️⃣ تنفيذ الإكسترود على كل السطح (بما فيه الثقوب)
@@ -94,13 +485,188 @@ class ExtrudeTool:
             final_cleaner = vtk.vtkCleanPolyData()
             final_cleaner.SetInputData(solid)
             final_cleaner.Update()
-            out = final_cleaner.GetOutput()
+            out = regions.attach(final_cleaner.GetOutput())
 
-            print(
-                f"✅ [ExtrudeTool] إكسترود ناجح مع الثقوب الداخلية (نقاط={out.GetNumberOfPoints()})"
-            )
+            log.debug("[ExtrudeTool] إكسترود ناجح مع الثقوب الداخلية (نقاط=%d)", out.GetNumberOfPoints())
             return out
 
         except Exception as e:
-            print("🔥 [ExtrudeTool] خطأ أثناء إنشاء الإكسترود:", e)
+            log.error("[ExtrudeTool] خطأ أثناء إنشاء الإكسترود: %s", e)
+            return None
+
+    @staticmethod
+    def assemble_wires(input_polydata):
+        """يربط خلايا الخطوط (بأي ترتيب) في حلقات مغلقة مرتبة داخل vtkPolyData."""
+        assembly, frame = ExtrudeTool._assemble(input_polydata)
+        if not assembly.loops:
+            return None
+        return ExtrudeTool._loops_to_wire(assembly, frame)
+
+    @staticmethod
+    def _assemble(input_polydata):
+        """(LoopAssembly, frame) — frame = (u, v, flat, level) يربط الإحداثيات 2D بـ 3D."""
+        pts = numpy_support.vtk_to_numpy(input_polydata.GetPoints().GetData()).astype(np.float64)
+        lines = input_polydata.GetLines()
+        offsets = numpy_support.vtk_to_numpy(lines.GetOffsetsArray())
+        conn = numpy_support.vtk_to_numpy(lines.GetConnectivityArray())
+        # كيان DXF لكل نقطة (من ProfileGeometry.to_polydata) يرافق الأضلاع حتى الحلقات
+        src_arr = input_polydata.GetPointData().GetArray(SOURCE_ARRAY)
+        src = (numpy_support.vtk_to_numpy(src_arr).astype(np.int64) if src_arr is not None
+               else np.full(len(pts), -1, dtype=np.int64))
+
+        # الشكل مستوٍ: نُسقط على المحورين الأوسع ونحتفظ بالثالث ثابتاً
+        extent = pts.max(axis=0) - pts.min(axis=0)
+        flat = int(np.argmin(extent))
+        u, v = [a for a in range(3) if a != flat]
+        level = float(pts[:, flat].mean())
+
+        pieces = []
+        for a, b in zip(offsets[:-1], offsets[1:]):
+            ids = conn[a:b]
+            if len(ids) < 2:
+                continue
+            closed = len(ids) > 2 and ids[0] == ids[-1]
+            if closed:
+                ids = ids[:-1]
+            pieces.append((pts[ids][:, (u, v)], None, closed, 0, src[ids]))
+
+        assembly = assemble_loops(pieces)
+        if not assembly.ok:
+            log.warning("[ExtrudeTool] %s", assembly.diagnostics())
+        return assembly, (u, v, flat, level)
+
+    @staticmethod
+    def _to_3d(verts2d, frame):
+        u, v, flat, level = frame
+        xyz = np.empty((len(verts2d), 3), dtype=np.float64)
+        xyz[:, u], xyz[:, v], xyz[:, flat] = verts2d[:, 0], verts2d[:, 1], level
+        return xyz
+
+    @staticmethod
+    def _loops_to_wire(assembly, frame):
+        # كل حلقة polyline مغلقة (آخر نقطة = أول نقطة)
+        loops = [verts for verts, _, _ in assembly.loops]
+        sizes = np.array([len(l) for l in loops], dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        xyz = ExtrudeTool._to_3d(np.concatenate(loops), frame)
+
+        ids = np.insert(np.arange(sizes.sum(), dtype=np.int64), starts + sizes, starts)
+        cell_offsets = np.concatenate(([0], np.cumsum(sizes + 1))).astype(np.int64)
+
+        points = vtk.vtkPoints()
+        points.SetData(numpy_support.numpy_to_vtk(xyz, deep=True))
+        cells = vtk.vtkCellArray()
+        cells.SetData(numpy_support.numpy_to_vtkIdTypeArray(cell_offsets, deep=True),
+                      numpy_support.numpy_to_vtkIdTypeArray(ids, deep=True))
+        wire = vtk.vtkPolyData()
+        wire.SetPoints(points)
+        wire.SetLines(cells)
+        return wire
+
+    # -------------------------------------------------------------
+    # محرك OCC: وجه مستوٍ (خارجي + ثقوب) → BRepPrimAPI_MakePrism → Mesh مرة واحدة
+    # -------------------------------------------------------------
+    @staticmethod
+    def extrude_occ_shape(assembly, frame, depth, direction):
+        """TopoDS_Compound من Prism لكل وجه (حلقة خارجية مع ثقوبها)."""
+        from OCC.Core.BRep import BRep_Builder
+        from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeFace, BRepBuilderAPI_MakePolygon
+        from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakePrism
+        from OCC.Core.ShapeFix import ShapeFix_Face
+        from OCC.Core.TopoDS import TopoDS_Compound
+        from OCC.Core.gp import gp_Pnt, gp_Vec
+
+        def polygon_wire(index):
+            poly = BRepBuilderAPI_MakePolygon()
+            for x, y, z in ExtrudeTool._to_3d(assembly.loops[index][0], frame).tolist():
+                poly.Add(gp_Pnt(x, y, z))
+            poly.Close()
+            return poly.Wire()
+
+        builder = BRep_Builder()
+        compound = TopoDS_Compound()
+        builder.MakeCompound(compound)
+        vec = gp_Vec(*(depth * np.asarray(direction, dtype=np.float64)).tolist())
+        for outer, holes in assembly.faces():
+            maker = BRepBuilderAPI_MakeFace(polygon_wire(outer), True)
+            for h in holes:
+                maker.Add(polygon_wire(h))
+            if not maker.IsDone():
+                log.warning("[ExtrudeTool] فشل بناء الوجه للحلقة %d", outer)
+                continue
+            fix = ShapeFix_Face(maker.Face())
+            fix.Perform()   # اتجاه الثقوب بالنسبة للحلقة الخارجية
+            builder.Add(compound, BRepPrimAPI_MakePrism(fix.Face(), vec).Shape())
+        return compound
+
+    @staticmethod
+    def _extrude_occ(assembly, frame, depth, direction):
+        from model.occ_mesh import shape_to_polydata
+
+        solid = ExtrudeTool.extrude_occ_shape(assembly, frame, depth, direction)
+        out = shape_to_polydata(solid)
+        if out is None:
+            log.warning("[ExtrudeTool] OCC Prism لم يُنتج أي وجه.")
+            return None
+        log.debug("[ExtrudeTool] إكسترود OCC ناجح (نقاط=%d, مثلثات=%d)",
+                  out.GetNumberOfPoints(), out.GetNumberOfPolys())
+        return out
+
+    # -------------------------------------------------------------
+    # محرك NumPy: تثليث الغطاء مرة واحدة ثم مصفوفات فقط
+    # -------------------------------------------------------------
+    @staticmethod
+    def section(input_polydata):
+        """ProfileSection من خطوط 2D (حلقات + تثليث الغطاء) أو None."""
+        assembly, frame = ExtrudeTool._assemble(input_polydata)
+        if not assembly.loops:
+            return None
+        return ProfileSection.from_assembly(assembly, frame)
+
+    @staticmethod
+    def _extrude_numpy(assembly, frame, depth, direction):
+        section = ProfileSection.from_assembly(assembly, frame)
+        if section is None:
+            log.warning("[ExtrudeTool] لم يتمكن من إنشاء سطح مغلق من الخطوط.")
+            return None
+        out = section.extrude(depth, direction)
+        log.debug("[ExtrudeTool] إكسترود NumPy ناجح (نقاط=%d, مثلثات=%d)",
+                  out.GetNumberOfPoints(), out.GetNumberOfPolys())
+        return out
+
+    @staticmethod
+    def create_cut_list(input_polydata, lengths, axis="Y", instanced=False):
+        """إكسترود نفس البروفايل بعدة أطوال (قائمة قص) — التثليث مرة واحدة فقط.
+
+        instanced=False → [vtkPolyData] لكل طول (الخلايا والـ normals مشتركة)
+        instanced=True  → (mesh بطول 1، [مصفوفات 4x4]) للعرض كنسخ
+        """
+        direction = axis_direction(axis)
+        if input_polydata is None or input_polydata.GetNumberOfPoints() == 0:
+            log.warning("[ExtrudeTool] لا يوجد شكل 2D صالح للإكسترود.")
+            return None
+
+        section = ExtrudeTool.section(input_polydata)
+        if section is None:
+            log.warning("[ExtrudeTool] لا توجد حلقات مغلقة في الشكل.")
+            return None
+        if instanced:
+            return section.extrude_instances(lengths, direction)
+        meshes = section.extrude_many(lengths, direction)
+        if meshes:
+            log.debug("[ExtrudeTool] قائمة قص: %d قطعة (نقاط لكل قطعة=%d)", len(meshes), meshes[0].GetNumberOfPoints())
+        else:
+            log.warning("[ExtrudeTool] قائمة القص فارغة.")
+        return meshes
+
+    @staticmethod
+    def create_extruded(input_polydata, depth=50.0, flip=False):
+        """ExtrudedMesh (محرك NumPy) على عمودي المقطع (أو عكسه) — يُعدّل عمقه واتجاهه في مكانه."""
+        if input_polydata is None or input_polydata.GetNumberOfPoints() == 0:
+            log.warning("[ExtrudeTool] لا يوجد شكل 2D صالح للإكسترود.")
+            return None
+        section = ExtrudeTool.section(input_polydata)
+        if section is None:
+            log.warning("[ExtrudeTool] لا توجد حلقات مغلقة في الشكل.")
             return None
+        return ExtrudedMesh(section, depth, section.direction(flip))
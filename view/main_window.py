@@ -8,6 +8,7 @@ from PyQt5.QtWidgets import (
 )
 
 from view.vtk_qt_viewer import VTKQtViewer
+from view.object_properties_panel import ObjectPropertiesPanel
 from controller.main_controller import MainController
 from frontend.window.profiles_library_window import ProfilesLibraryWindow
 
@@ -24,6 +25,14 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(self.viewer)
         self.controller = MainController(self.viewer)
 
+        # ===== Object properties (move + extrude length) =====
+        self.properties_panel = ObjectPropertiesPanel(self.controller, self)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.properties_panel)
+        self.viewer.on_object_selected = self.properties_panel.set_selected_actor
+
+        # ===== Background import progress =====
+        self.controller.on_progress = self._show_progress
+
         # ===== Style (Dark) =====
         self._apply_unified_style()
 
@@ -53,12 +62,30 @@ class MainWindow(QMainWindow):
         act_profiles.triggered.connect(self._open_profiles_library)
         tb.addAction(act_profiles)
 
+        # 📦 Batch import of a whole DXF folder
+        act_batch = QAction("📦 Batch Import", self)
+        act_batch.setToolTip("Import all DXF files in a folder")
+        act_batch.triggered.connect(self.controller.batch_import)
+        tb.addAction(act_batch)
+
+        # ⏹️ Cancel a running DXF import
+        act_cancel = QAction("⏹️ Cancel Import", self)
+        act_cancel.setToolTip("Stop the DXF import running in the background")
+        act_cancel.triggered.connect(self.controller.cancel_import)
+        tb.addAction(act_cancel)
+
         # (Optional) quick action to reload style (useful during tweaks)
         act_reload_style = QAction("🎨 Reload Style", self)
         act_reload_style.setToolTip("Reload alum_style.qss")
         act_reload_style.triggered.connect(self._apply_unified_style)
         tb.addAction(act_reload_style)
 
+    def _show_progress(self, stage, fraction):
+        if stage == "done":
+            self.statusBar().showMessage("Ready", 2000)
+        else:
+            self.statusBar().showMessage(f"{stage}: {fraction:.0%}")
+
     # -------------------------------------------------
     # Style Loader
     # -------------------------------------------------
@@ -1,7 +1,7 @@
 # view/object_properties_panel.py
 from PyQt5.QtWidgets import (
     QDockWidget, QWidget, QVBoxLayout, QFormLayout,
-    QLineEdit, QPushButton, QLabel, QHBoxLayout
+    QLineEdit, QPushButton, QLabel, QHBoxLayout, QSlider, QCheckBox
 )
 from PyQt5.QtCore import Qt
 
@@ -49,11 +49,29 @@ class ObjectPropertiesPanel(QDockWidget):
         btn_layout.addWidget(self.reset_btn)
         layout.addLayout(btn_layout)
 
+        # طول واتجاه الإكسترود (تحديث لحظي أثناء السحب) — الاتجاه عمودي المقطع أو عكسه فقط
+        extrude_form = QFormLayout()
+        self.depth_slider = QSlider(Qt.Horizontal)
+        self.depth_slider.setRange(1, 6000)
+        self.depth_slider.setValue(int(getattr(controller, "extrude_depth", 60)))
+        self.depth_label = QLabel(f"{self.depth_slider.value()} mm")
+        self.depth_label.setMinimumWidth(60)
+        depth_row = QHBoxLayout()
+        depth_row.addWidget(self.depth_slider)
+        depth_row.addWidget(self.depth_label)
+        self.flip_check = QCheckBox("Flip")
+        self.flip_check.setChecked(bool(getattr(controller, "extrude_flip", False)))
+        extrude_form.addRow("Length:", depth_row)
+        extrude_form.addRow("Direction:", self.flip_check)
+        layout.addLayout(extrude_form)
+
         layout.addStretch()
 
         # ربط الأزرار
         self.move_btn.clicked.connect(self._apply_move)
         self.reset_btn.clicked.connect(self._reset_inputs)
+        self.depth_slider.valueChanged.connect(self._apply_depth)
+        self.flip_check.toggled.connect(self.controller.set_extrude_flip)
 
         print("[Panel] ObjectPropertiesPanel initialized ✅")
 
@@ -82,6 +100,10 @@ class ObjectPropertiesPanel(QDockWidget):
         except ValueError:
             print("❌ قيم غير صالحة")
 
+    def _apply_depth(self, value):
+        self.depth_label.setText(f"{value} mm")
+        self.controller.set_extrude_depth(value)
+
     def _reset_inputs(self):
         self.x_input.setText("0.0")
         self.y_input.setText("0.0")
@@ -0,0 +1,187 @@
+# view/render_stats.py
+# عدادات الرسم (FPS، زمن الإطار، المثلثات، الذاكرة) + طبقة عرض اختيارية فوق العارض
+
+import os
+import time
+from collections import deque
+
+import numpy as np
+import vtk
+from vtkmodules.util import numpy_support
+
+# عدد الإطارات المحفوظة للمتوسطات والـ histogram
+RENDER_STATS_HISTORY = 240
+# أقصى زمن يظهر في الـ histogram (ms) — الأبطأ يُقص عند الأعلى
+HISTOGRAM_MAX_MS = 50.0
+# تحديث نص الطبقة كل (ms) — لا داعي لإعادة كتابته مع كل إطار
+OVERLAY_UPDATE_MS = 250
+# عدد أعمدة الـ histogram في الطبقة
+HISTOGRAM_BINS = 25
+
+
+def host_memory_bytes():
+    """ذاكرة العملية الحالية (RSS) — من /proc على Linux، وإلا أقصى قيمة من getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+class RenderStats:
+    """أزمنة آخر RENDER_STATS_HISTORY إطار + عدادات المشهد (تُقرأ برمجياً بدون الطبقة)."""
+
+    def __init__(self, history=RENDER_STATS_HISTORY):
+        self.frame_times = deque(maxlen=history)   # زمن الرسم (ثانية)
+        self.frame_stamps = deque(maxlen=history)  # وقت نهاية كل إطار
+        self.frames = 0
+        self.triangles = 0
+        self.actors = 0
+        self.mesh_bytes = 0
+        self._start = None
+
+    def begin_frame(self):
+        self._start = time.perf_counter()
+
+    def end_frame(self):
+        if self._start is None:
+            return
+        now = time.perf_counter()
+        self.add_frame(now - self._start, now)
+        self._start = None
+
+    def add_frame(self, seconds, stamp=None):
+        self.frame_times.append(seconds)
+        self.frame_stamps.append(time.perf_counter() if stamp is None else stamp)
+        self.frames += 1
+
+    def set_scene(self, triangles, actors, mesh_bytes):
+        self.triangles, self.actors, self.mesh_bytes = triangles, actors, mesh_bytes
+
+    @property
+    def last_ms(self):
+        return self.frame_times[-1] * 1000.0 if self.frame_times else 0.0
+
+    @property
+    def fps(self):
+        """إطارات فعلية في آخر ثانية (العارض يرسم عند الطلب فقط، لذا قد تكون 0)."""
+        if not self.frame_stamps:
+            return 0.0
+        cutoff = time.perf_counter() - 1.0
+        return float(sum(1 for t in self.frame_stamps if t >= cutoff))
+
+    def percentile_ms(self, q):
+        return float(np.percentile(self.frame_times, q)) * 1000.0 if self.frame_times else 0.0
+
+    def histogram(self, bins=20, max_ms=HISTOGRAM_MAX_MS):
+        """(counts, edges_ms) لأزمنة الإطارات المحفوظة."""
+        times = np.minimum(np.asarray(self.frame_times) * 1000.0, max_ms)
+        return np.histogram(times, bins=bins, range=(0.0, max_ms))
+
+    def snapshot(self):
+        """كل العدادات كـ dict (للسجلات ومقارنة الأداء على ملفات العملاء)."""
+        return {
+            "frames": self.frames,
+            "fps": self.fps,
+            "last_ms": self.last_ms,
+            "mean_ms": float(np.mean(self.frame_times)) * 1000.0 if self.frame_times else 0.0,
+            "p95_ms": self.percentile_ms(95),
+            "max_ms": max(self.frame_times) * 1000.0 if self.frame_times else 0.0,
+            "triangles": self.triangles,
+            "actors": self.actors,
+            "mesh_bytes": self.mesh_bytes,
+            "host_bytes": host_memory_bytes(),
+        }
+
+    def summary(self):
+        s = self.snapshot()
+        return (f"FPS {s['fps']:.0f} | frame {s['last_ms']:.1f} ms (mean {s['mean_ms']:.1f}, p95 {s['p95_ms']:.1f})\n"
+                f"triangles {s['triangles']:,} | actors {s['actors']}\n"
+                f"meshes {s['mesh_bytes'] / 2**20:.1f} MB | host {s['host_bytes'] / 2**20:.0f} MB")
+
+
+class StatsOverlay:
+    """نص العدادات + histogram لأزمنة الرسم في زاوية العارض.
+
+    كل عمود = فترة زمنية (0..HISTOGRAM_MAX_MS)، وارتفاعه ∝ عدد الإطارات المحفوظة فيها.
+    """
+
+    def __init__(self, renderer, stats, origin=(0.01, 0.80), size=(0.25, 0.08), bins=HISTOGRAM_BINS):
+        self.renderer = renderer
+        self.stats = stats
+        self.bins = bins
+        self._last_update = 0.0
+
+        self.text = vtk.vtkTextActor()
+        prop = self.text.GetTextProperty()
+        prop.SetFontFamilyToCourier()
+        prop.SetFontSize(12)
+        prop.SetColor(0.85, 0.85, 0.85)
+        prop.SetVerticalJustificationToTop()
+        self.text.GetPositionCoordinate().SetCoordinateSystemToNormalizedViewport()
+        self.text.SetPosition(origin[0], origin[1] - 0.01)
+
+        # الـ histogram: مستطيل لكل فترة (4 نقاط: أسفل يسار/يمين ثم أعلى يمين/يسار)
+        n = bins
+        x0, y0 = origin
+        w, h = size
+        left = x0 + w * np.arange(n) / n
+        right = left + 0.9 * w / n   # فراغ صغير بين الأعمدة
+        self._base = np.zeros((n, 4, 3))
+        self._base[:, :, 0] = np.column_stack((left, right, right, left))
+        self._base[:, :, 1] = y0
+        self._height = h
+        self._points = vtk.vtkPoints()
+        self._points.SetData(numpy_support.numpy_to_vtk(self._base.reshape(-1, 3), deep=True))
+        quads = vtk.vtkCellArray()
+        quads.SetData(numpy_support.numpy_to_vtkIdTypeArray(np.arange(0, 4 * n + 1, 4, dtype=np.int64), deep=True),
+                      numpy_support.numpy_to_vtkIdTypeArray(np.arange(4 * n, dtype=np.int64), deep=True))
+        bars = vtk.vtkPolyData()
+        bars.SetPoints(self._points)
+        bars.SetPolys(quads)
+
+        coords = vtk.vtkCoordinate()
+        coords.SetCoordinateSystemToNormalizedViewport()
+        mapper = vtk.vtkPolyDataMapper2D()
+        mapper.SetInputData(bars)
+        mapper.SetTransformCoordinate(coords)
+        self.histogram = vtk.vtkActor2D()
+        self.histogram.SetMapper(mapper)
+        self.histogram.GetProperty().SetColor(0.45, 0.85, 0.45)
+
+        for actor in (self.text, self.histogram):
+            actor.PickableOff()
+            actor.VisibilityOff()
+            renderer.AddViewProp(actor)
+
+    @property
+    def visible(self):
+        return bool(self.text.GetVisibility())
+
+    def set_visible(self, visible):
+        self.text.SetVisibility(visible)
+        self.histogram.SetVisibility(visible)
+        if visible:
+            self.update(force=True)
+
+    def update(self, force=False):
+        """تحديث النص والأعمدة (بحد أقصى كل OVERLAY_UPDATE_MS) — يظهر مع الإطار التالي."""
+        now = time.perf_counter()
+        if not self.visible or (not force and (now - self._last_update) * 1000.0 < OVERLAY_UPDATE_MS):
+            return
+        self._last_update = now
+        self.text.SetInput(self.stats.summary())
+
+        counts, _ = self.stats.histogram(self.bins)
+        tops = counts / max(counts.max(), 1) * self._height
+        pts = self._base.copy()
+        pts[:, 2:, 1] += tops[:, None]
+        numpy_support.vtk_to_numpy(self._points.GetData())[:] = pts.reshape(-1, 3)
+        self._points.Modified()
@@ -1,7 +1,45 @@
 from PyQt5.QtWidgets import QFrame, QVBoxLayout, QToolBar, QAction
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+import logging
+import math
+import numpy as np
 import vtk
+from vtkmodules.util import numpy_support
+
+from model.picking import PickCache, PICK_KINDS, PICK_EDGE, PICK_VERTEX, pick, instance_candidates, source_entity
+from model.scene import Scene, transform_bounds
+from model.mesh_cache import polydata_nbytes
+from view.render_stats import RenderStats, StatsOverlay
 from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 
+# رسائل المسارات المتكررة (LOD، النسخ، عمال الخلفية) عبر logging بمستوى debug
+log = logging.getLogger(__name__)
+
+# أقل حجم ظاهر على الشاشة (بكسل) لكل مستوى دقة
+LOD_MIN_PIXELS = {"coarse": 0, "medium": 150, "fine": 600}
+# تأخير التحسين بعد توقف حركة الكاميرا (ms)
+LOD_REFINE_DELAY_MS = 200
+
+# مستويات تباعد الشبكة (mm)، وأقصى عدد خطوط ظاهرة قبل الانتقال للمستوى الأكبر
+GRID_SPACINGS = (1, 10, 100, 1000)
+GRID_MAX_VISIBLE_LINES = 100
+# عدد الخطوط على كل جانب من المركز، وكل كم خط يكون خطاً رئيسياً أوضح
+GRID_HALF_LINES = 100
+GRID_MAJOR_EVERY = 10
+GRID_MINOR_COLOR = (90, 90, 95)
+GRID_MAJOR_COLOR = (150, 150, 155)
+
+# نصف قطر الالتقاط للحواف والرؤوس (بكسل)
+PICK_TOLERANCE_PIXELS = 6
+
+# أقصى معدل رسم: طلبات الرسم تُجمع في رسمة واحدة لكل إطار (ms)
+RENDER_INTERVAL_MS = 16
+# أثناء تحريك الكاميرا: الـ meshes الأكبر من هذا تُعرض بنسخة مبسطة
+INTERACTION_MIN_TRIANGLES = 20000
+INTERACTION_DIVISIONS = 48
+# العودة للدقة الكاملة بعد توقف التفاعل (ms) — يمنع التبديل مع كل خطوة عجلة الفأرة
+INTERACTION_RESTORE_DELAY_MS = 150
+
 
 class VTKQtViewer(QFrame):
     """عارض VTK احترافي داخل Qt — مع شبكة ومحاور وأزرار كاميرا."""
@@ -37,6 +75,55 @@ class VTKQtViewer(QFrame):
         # 🔹 متغيرات داخلية
         self._last_actor = None
 
+        # 🔹 المشهد: عدة كائنات (id → actor) مع BVH للتحديد والـ FitAll
+        self.scene = Scene()
+        self._actors = {}         # object id → actor
+        self._actor_ids = {}      # actor → object id
+        self._mappers = {}        # id(mesh) → (mapper, عدد الكائنات)
+        self._display_id = None   # الكائن الذي يستبدله display_stl / display_profile
+        self._instances = {}      # object id → (mesh مشترك، مصفوفات النسخ)
+
+        # 🔹 تحديد وجه/حافة/رأس: locator لكل mesh (يُعاد بناؤه فقط عند تغيّر الـ mesh)
+        self.pick_cache = PickCache()
+        self.pick_kinds = PICK_KINDS
+        self.last_pick = None
+        self.on_entity_picked = None
+
+        # 🔹 عدادات الرسم (دائماً) + طبقة عرضها (اختيارية من زر Stats)
+        self.render_stats = RenderStats()
+        self.stats_overlay = StatsOverlay(self.renderer, self.render_stats)
+        self.render_window.AddObserver("StartEvent", lambda *_: self.render_stats.begin_frame())
+        self.render_window.AddObserver("EndEvent", self._on_frame_end)
+
+        # 🔹 جدولة الرسم: request_render يعلّم العرض كـ dirty والمؤقت يرسم مرة واحدة لكل إطار
+        self._render_dirty = False
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.timeout.connect(self._flush_render)
+
+        # 🔹 دقة مخفضة أثناء التفاعل بالفأرة
+        self._interacting = False
+        # النسخ المبسطة تُحسب في الخلفية عند إضافة الـ mesh، لا عند بدء التفاعل
+        self._reduced = {}        # id(mesh) → (mesh، MTime، mesh مبسط أو None أثناء الحساب)
+        self._swapped = []        # [(mapper, mesh كامل, mesh مبسط)]
+        self._restore_timer = QTimer(self)
+        self._restore_timer.setSingleShot(True)
+        self._restore_timer.timeout.connect(self._restore_full_detail)
+        style = self.interactor.GetInteractorStyle()
+        style.AddObserver("StartInteractionEvent", self._on_interaction_start)
+        style.AddObserver("EndInteractionEvent", self._on_interaction_end)
+
+        # 🔹 تحسين دقة الـ Mesh في الخلفية بعد توقف الكاميرا (مستوى لكل كائن)
+        self._lods = {}           # object id → {"mesh_for", "levels", "level", "pending"}
+        self._jobs = set()        # أعمال الخلفية الجارية (مرجع حتى تصل النتيجة)
+        # خيط واحد للـ Mesh: BRepMesh يعدّل الشكل نفسه، فلا فائدة من تشغيل مستويين معاً
+        self._mesh_pool = QThreadPool(self)
+        self._mesh_pool.setMaxThreadCount(1)
+        self._lod_timer = QTimer(self)
+        self._lod_timer.setSingleShot(True)
+        self._lod_timer.timeout.connect(self._update_lod)
+        self.renderer.GetActiveCamera().AddObserver("ModifiedEvent", self._on_camera_modified)
+
         # 🔹 أزرار التحكم بالكاميرا
         self._add_camera_actions()
         self.enable_picking()
@@ -97,59 +184,63 @@ class VTKQtViewer(QFrame):
         self.axes_actor = axes
         print("🧭 [Axes] Slim Fusion-style axes added ✅")
 
-    def _add_grid(self, size=200, spacing=10):
-        """شبكة XY رمادية شفافة."""
-        grid = vtk.vtkAppendPolyData()
-        for i in range(-size, size + 1, spacing):
-            # خطوط X
-            pts_x = vtk.vtkPoints()
-            lines_x = vtk.vtkCellArray()
-            pts_x.InsertNextPoint(-size, i, 0)
-            pts_x.InsertNextPoint(size, i, 0)
-            line_x = vtk.vtkLine()
-            line_x.GetPointIds().SetId(0, 0)
-            line_x.GetPointIds().SetId(1, 1)
-            lines_x.InsertNextCell(line_x)
-            pd_x = vtk.vtkPolyData()
-            pd_x.SetPoints(pts_x)
-            pd_x.SetLines(lines_x)
-            grid.AddInputData(pd_x)
-
-            # خطوط Y
-            pts_y = vtk.vtkPoints()
-            lines_y = vtk.vtkCellArray()
-            pts_y.InsertNextPoint(i, -size, 0)
-            pts_y.InsertNextPoint(i, size, 0)
-            line_y = vtk.vtkLine()
-            line_y.GetPointIds().SetId(0, 0)
-            line_y.GetPointIds().SetId(1, 1)
-            lines_y.InsertNextCell(line_y)
-            pd_y = vtk.vtkPolyData()
-            pd_y.SetPoints(pts_y)
-            pd_y.SetLines(lines_y)
-            grid.AddInputData(pd_y)
-
-        grid.Update()
+    def _add_grid(self):
+        """شبكة XY رمادية شفافة — buffer واحد يتغير تباعده حسب بعد الكاميرا."""
         mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputConnection(grid.GetOutputPort())
+        mapper.SetColorModeToDirectScalars()
+        mapper.SetScalarModeToUseCellData()
         actor = vtk.vtkActor()
         actor.SetMapper(mapper)
-        actor.GetProperty().SetColor(0.5, 0.5, 0.5)
-        actor.GetProperty().SetOpacity(0.25)
+        actor.PickableOff()
+        # حجم الشبكة يتبع الكاميرا، فلا تدخل في حساب ResetCamera (وإلا تتغير مع كل تكبير)
+        actor.UseBoundsOff()
+        actor.GetProperty().SetOpacity(0.35)
         self.renderer.AddActor(actor)
         self.grid_actor = actor
+        self._grid_key = None
+
+    def _visible_width(self):
+        """عرض المشهد الظاهر (mm) عند النقطة البؤرية للكاميرا."""
+        cam = self.renderer.GetActiveCamera()
+        if cam.GetParallelProjection():
+            return 2.0 * cam.GetParallelScale()
+        return 2.0 * cam.GetDistance() * math.tan(math.radians(cam.GetViewAngle()) / 2.0)
+
+    def _update_grid(self):
+        """إعادة بناء الشبكة فقط عند تغيّر مستوى التباعد أو خروج البؤرة من مركزها.
+
+        أرقام القياس تغطي الجزء الظاهر من الشبكة نفسها (مقرّباً لخطوطها الرئيسية).
+        """
+        width = self._visible_width()
+        spacing = grid_spacing(width)
+        major = spacing * GRID_MAJOR_EVERY
+        fx, fy, _ = self.renderer.GetActiveCamera().GetFocalPoint()
+        center = (round(fx / major) * major, round(fy / major) * major)
+        half = max(math.ceil(width / 2.0 / major), 1) * major
+        # SetBounds لا يعدّل شيئاً إن لم تتغير الحدود
+        self.cube_axes.SetBounds(center[0] - half, center[0] + half, center[1] - half, center[1] + half, 0, 0)
+        key = (spacing, center)
+        if key == self._grid_key:
+            return
+        self._grid_key = key
+        self.grid_actor.GetMapper().SetInputData(grid_polydata(spacing, GRID_HALF_LINES, center))
 
     def _add_measurement_grid(self):
-        """إضافة شبكة القياسات بالأرقام (مثل الصورة)."""
+        """أرقام القياس على حواف الشبكة (مثل الصورة) — الخطوط نفسها من الشبكة المتكيفة.
+
+        حدودها تتبع الشبكة في _update_grid، لا حدود الشكل المعروض.
+        """
         cube_axes = vtk.vtkCubeAxesActor()
         cube_axes.SetCamera(self.renderer.GetActiveCamera())
-        cube_axes.SetBounds(-200, 200, -200, 200, 0, 0)
 
         cube_axes.SetFlyModeToStaticEdges()
-        cube_axes.SetGridLineLocation(vtk.vtkCubeAxesActor.VTK_GRID_LINES_FURTHEST)
-        cube_axes.DrawXGridlinesOn()
-        cube_axes.DrawYGridlinesOn()
+        cube_axes.DrawXGridlinesOff()
+        cube_axes.DrawYGridlinesOff()
         cube_axes.DrawZGridlinesOff()
+        cube_axes.ZAxisVisibilityOff()
+        # مثل الشبكة: خارج ResetCamera والتحديد
+        cube_axes.UseBoundsOff()
+        cube_axes.PickableOff()
 
         # الألوان والخطوط
         for i in range(3):
@@ -158,13 +249,12 @@ class VTKQtViewer(QFrame):
 
         cube_axes.GetXAxesLinesProperty().SetColor(0.4, 0.4, 0.4)
         cube_axes.GetYAxesLinesProperty().SetColor(0.4, 0.4, 0.4)
-        cube_axes.GetXAxesGridlinesProperty().SetColor(0.25, 0.25, 0.25)
-        cube_axes.GetYAxesGridlinesProperty().SetColor(0.25, 0.25, 0.25)
         cube_axes.SetLabelOffset(10)
         cube_axes.SetTitleOffset(20)
 
         self.renderer.AddActor(cube_axes)
         self.cube_axes = cube_axes
+        self._update_grid()
         print("📏 [Grid] Measurement grid added ✅")
 
     # -------------------------------------------------------------
@@ -182,11 +272,16 @@ class VTKQtViewer(QFrame):
         add_action("Right", self.view_right)
         add_action("Reset", self.reset_view)
 
+        stats = QAction("Stats", self)
+        stats.setCheckable(True)
+        stats.toggled.connect(self.show_stats)
+        self.toolbar.addAction(stats)
+
     def view_isometric(self):
         self.renderer.GetActiveCamera().Azimuth(45)
         self.renderer.GetActiveCamera().Elevation(30)
         self.renderer.ResetCamera()
-        self.render_window.Render()
+        self.request_render()
 
     def view_top(self):
         cam = self.renderer.GetActiveCamera()
@@ -194,7 +289,7 @@ class VTKQtViewer(QFrame):
         cam.SetFocalPoint(0, 0, 0)
         cam.SetViewUp(0, 1, 0)
         self.renderer.ResetCamera()
-        self.render_window.Render()
+        self.request_render()
 
     def view_front(self):
         cam = self.renderer.GetActiveCamera()
@@ -202,7 +297,7 @@ class VTKQtViewer(QFrame):
         cam.SetFocalPoint(0, 0, 0)
         cam.SetViewUp(0, 0, 1)
         self.renderer.ResetCamera()
-        self.render_window.Render()
+        self.request_render()
 
     def view_right(self):
         cam = self.renderer.GetActiveCamera()
@@ -210,13 +305,131 @@ class VTKQtViewer(QFrame):
         cam.SetFocalPoint(0, 0, 0)
         cam.SetViewUp(0, 0, 1)
         self.renderer.ResetCamera()
-        self.render_window.Render()
+        self.request_render()
 
     def reset_view(self):
         """FitAll-style — إعادة ضبط الكاميرا لتظهر كامل المشهد بدون تغيير الاتجاه"""
-        self.renderer.ResetCamera()
+        self.fit_view()
+        self.request_render()
+
+    # -------------------------------------------------------------
+    # ✅ جدولة الرسم
+    # -------------------------------------------------------------
+    def request_render(self):
+        """طلب رسم — عدة طلبات في نفس الإطار تنتج رسمة واحدة فقط."""
+        self._render_dirty = True
+        if not self._render_timer.isActive():
+            self._render_timer.start(RENDER_INTERVAL_MS)
+
+    def _flush_render(self):
+        if self._render_dirty:
+            self._render_dirty = False
+            self.render_window.Render()
+
+    def _schedule_reduction(self, mesh):
+        """حساب النسخة المبسطة للـ meshes الكبيرة في خيط عامل (مرة لكل MTime)."""
+        if mesh is None or mesh.GetNumberOfPolys() < INTERACTION_MIN_TRIANGLES:
+            return
+        mtime = mesh.GetMTime()
+        cached = self._reduced.get(id(mesh))
+        if cached is not None and cached[0] is mesh and cached[1] == mtime:
+            return  # جاهزة أو قيد الحساب
+        self._reduced[id(mesh)] = (mesh, mtime, None)
+        # نسخة سطحية: العامل يقرأ نفس المصفوفات لكن بهياكل خلايا خاصة به
+        snapshot = vtk.vtkPolyData()
+        snapshot.ShallowCopy(mesh)
+        self._run_in_background(lambda: _quadric_reduce(snapshot),
+                                lambda reduced: self._on_reduced(mesh, mtime, reduced),
+                                pool=QThreadPool.globalInstance())
+
+    def _on_reduced(self, mesh, mtime, reduced):
+        cached = self._reduced.get(id(mesh))
+        if cached is None or cached[0] is not mesh or cached[1] != mtime:
+            return  # الـ mesh أُزيل أو أُعيد جدولته أثناء الحساب
+        self._reduced[id(mesh)] = (mesh, mtime, reduced)
+
+    def _reduced_mesh(self, mesh):
+        """النسخة المبسطة الجاهزة، أو None (صغير، أو ما زال يُحسب — بدون انتظار)."""
+        cached = self._reduced.get(id(mesh))
+        if cached is None or cached[0] is not mesh or cached[1] != mesh.GetMTime():
+            # تغيّر في مكانه (مثل عمق الإكسترود): يُعاد الحساب للتفاعل القادم
+            self._schedule_reduction(mesh)
+            return None
+        return cached[2]
+
+    def _on_interaction_start(self, obj, event):
+        self._restore_timer.stop()
+        if self._interacting:
+            return
+        self._interacting = True
+        for mapper, _ in self._mappers.values():
+            full = mapper.GetInput()
+            reduced = self._reduced_mesh(full) if full is not None else None
+            if reduced is not None:
+                mapper.SetInputData(reduced)
+                self._swapped.append((mapper, full, reduced))
+
+    def _on_interaction_end(self, obj, event):
+        self._restore_timer.start(INTERACTION_RESTORE_DELAY_MS)
+
+    def _restore_full_detail(self):
+        self._interacting = False
+        for mapper, full, reduced in self._swapped:
+            if mapper.GetInput() is reduced:
+                mapper.SetInputData(full)
+        restored = bool(self._swapped)
+        self._swapped = []
+        if restored:
+            self.request_render()
+
+    # -------------------------------------------------------------
+    # ✅ عدادات الأداء
+    # -------------------------------------------------------------
+    def _on_frame_end(self, obj, event):
+        self.render_stats.end_frame()
+        if self.stats_overlay.visible:
+            self._count_scene()
+            self.stats_overlay.update()
+
+    def _count_scene(self):
+        """المثلثات والـ actors والذاكرة الظاهرة — الـ meshes المشتركة تُحسب مرة واحدة."""
+        triangles, actors, meshes = 0, 0, {}
+        for object_id, actor in self._actors.items():
+            if not actor.GetVisibility():
+                continue
+            actors += 1
+            if object_id in self._instances:
+                mesh, matrices = self._instances[object_id]
+                triangles += mesh.GetNumberOfPolys() * len(matrices)
+                meshes[id(mesh)] = mesh
+                continue
+            mapper = actor.GetMapper() if hasattr(actor, "GetMapper") else None
+            mesh = mapper.GetInput() if mapper is not None else None
+            if mesh is not None:
+                triangles += mesh.GetNumberOfPolys()
+                meshes[id(mesh)] = mesh
+        self.render_stats.set_scene(triangles, actors,
+                                    sum(polydata_nbytes(m) for m in meshes.values()))
+
+    def show_stats(self, enabled=True):
+        """إظهار/إخفاء طبقة FPS وزمن الإطار والـ histogram."""
+        self._count_scene()
+        self.stats_overlay.set_visible(enabled)
+        self.request_render()
+
+    def stats_snapshot(self):
+        """نفس العدادات برمجياً (dict)."""
+        self._count_scene()
+        return self.render_stats.snapshot()
+
+    def fit_view(self):
+        """ضبط الكاميرا على حدود كائنات المشهد (من الـ BVH)، وإلا على كل شيء."""
+        bounds = self.scene.bounds()
+        if bounds is not None:
+            self.renderer.ResetCamera(*bounds)
+        else:
+            self.renderer.ResetCamera()
         self.renderer.ResetCameraClippingRange()
-        self.render_window.Render()
 
     # -------------------------------------------------------------
     # ✅ الكاميرا الذكية
@@ -229,7 +442,7 @@ class VTKQtViewer(QFrame):
             cam.SetViewUp(0, 0, 1)
             self.renderer.ResetCameraClippingRange()
             self.renderer.ResetCamera()
-            self.render_window.Render()
+            self.request_render()
             print("🎥 [Camera] Auto-reset to Fusion-style view ✅")
         except Exception as e:
             print("⚠️ [Camera] reset failed:", e)
@@ -242,30 +455,129 @@ class VTKQtViewer(QFrame):
         self.interactor.AddObserver("LeftButtonPressEvent", self._on_left_click)
         print("[Picker] Enabled ✅")
 
+    def _pick_ray(self, x, y):
+        """(origin, direction) لشعاع الكاميرا تحت نقطة الشاشة."""
+        ends = []
+        for z in (0.0, 1.0):
+            self.renderer.SetDisplayPoint(x, y, z)
+            self.renderer.DisplayToWorld()
+            wx, wy, wz, w = self.renderer.GetWorldPoint()
+            ends.append(np.array((wx, wy, wz)) / (w or 1.0))
+        return ends[0], ends[1] - ends[0]
+
     def _on_left_click(self, obj, event):
         click_pos = self.interactor.GetEventPosition()
-        self.picker.Pick(click_pos[0], click_pos[1], 0, self.renderer)
-        actor = self.picker.GetActor()
+        origin, direction = self._pick_ray(*click_pos)
+        # الـ BVH يعطي الكائنات التي يمر بها الشعاع فقط
+        candidates = self.scene.pick_candidates(origin, direction)
+
+        # 1️⃣ meshes: وجه/حافة/رأس عبر الـ locator المخزن لكل mesh
+        result = pick(self._mesh_candidates(candidates, origin, direction), origin, direction,
+                      self.pick_cache, self._pick_tolerance, self.pick_kinds)
+        if result is not None:
+            obj = self.scene.get(result.object_id)
+            result.entity = source_entity(obj.source, result)
+            self._on_entity_picked(result)
+            return
+
+        # 2️⃣ كائنات بدون mesh (خطوط البروفايل) — picker عادي على المرشحين فقط
+        others = [i for i in candidates if self.scene.get(i).mesh is None]
+        self.picker.InitializePickList()
+        for object_id in others:
+            self.picker.AddPickList(self._actors[object_id])
+        self.picker.PickFromListOn()
+        if others:
+            self.picker.Pick(click_pos[0], click_pos[1], 0, self.renderer)
+        actor = self.picker.GetActor() if others else None
         if actor:
             print(f"[SELECT] Actor selected: {actor}")
             self._highlight_actor(actor)
             if hasattr(self, "on_object_selected"):
                 self.on_object_selected(actor)
         else:
+            self._show_pick_marker(None)
             print("[SELECT] لا يوجد كائن تحت المؤشر")
 
+    def _mesh_candidates(self, object_ids, origin, direction):
+        """[(object id, رقم النسخة، mesh، مصفوفة)] للكائنات التي لها mesh."""
+        out = []
+        for object_id in object_ids:
+            if object_id in self._instances:
+                mesh, matrices = self._instances[object_id]
+                out.extend(instance_candidates(object_id, mesh, matrices, origin, direction))
+                continue
+            obj = self.scene.get(object_id)
+            if obj.mesh is not None:
+                out.append((object_id, -1, obj.mesh, obj.matrix))
+        return out
+
+    def _pick_tolerance(self, point):
+        """PICK_TOLERANCE_PIXELS بوحدات العالم عند عمق النقطة."""
+        cam = self.renderer.GetActiveCamera()
+        height = self.render_window.GetSize()[1] or 1
+        if cam.GetParallelProjection():
+            world_height = 2.0 * cam.GetParallelScale()
+        else:
+            depth = math.dist(cam.GetPosition(), point)
+            world_height = 2.0 * depth * math.tan(math.radians(cam.GetViewAngle()) / 2.0)
+        return PICK_TOLERANCE_PIXELS * world_height / height
+
+    def _on_entity_picked(self, result):
+        self.last_pick = result
+        actor = self._actors[result.object_id]
+        self._highlight_actor(actor)
+        self._show_pick_marker(result)
+        where = f" #{result.instance}" if result.instance >= 0 else ""
+        print(f"[SELECT] {result.kind} — كائن #{result.object_id}{where}, face {result.face_id}: {result.entity}")
+        if hasattr(self, "on_object_selected"):
+            self.on_object_selected(actor)
+        if self.on_entity_picked:
+            self.on_entity_picked(result)
+
+    def _show_pick_marker(self, result):
+        """إبراز الحافة أو الرأس المحدد (actor واحد يُعاد استخدامه)."""
+        marker = getattr(self, "_pick_marker", None)
+        if marker is None:
+            marker = vtk.vtkActor()
+            marker.SetMapper(vtk.vtkPolyDataMapper())
+            marker.PickableOff()
+            marker.UseBoundsOff()
+            prop = marker.GetProperty()
+            prop.SetColor(1, 1, 0)
+            prop.SetLineWidth(4)
+            prop.SetPointSize(12)
+            prop.RenderPointsAsSpheresOn()
+            prop.LightingOff()
+            self.renderer.AddActor(marker)
+            self._pick_marker = marker
+        if result is None or result.kind not in (PICK_EDGE, PICK_VERTEX):
+            marker.VisibilityOff()
+        else:
+            source = vtk.vtkLineSource() if result.kind == PICK_EDGE else vtk.vtkPointSource()
+            if result.kind == PICK_EDGE:
+                source.SetPoint1(*result.edge[0])
+                source.SetPoint2(*result.edge[1])
+            else:
+                source.SetCenter(*result.vertex)
+                source.SetNumberOfPoints(1)
+                source.SetRadius(0)
+            source.Update()
+            marker.GetMapper().SetInputData(source.GetOutput())
+            marker.VisibilityOn()
+        self.request_render()
+
     def _highlight_actor(self, actor):
-        if self._last_actor:
+        if self._last_actor and hasattr(self._last_actor, "GetProperty"):
             self._last_actor.GetProperty().SetEdgeVisibility(False)
         self._last_actor = actor
         actor.GetProperty().SetEdgeColor(1, 1, 0)
         actor.GetProperty().EdgeVisibilityOn()
-        self.render_window.Render()
+        self.request_render()
 
     # -------------------------------------------------------------
     # ✅ عرض STL أو Mesh
     # -------------------------------------------------------------
-    def display_stl(self, data, color=(0.4, 0.7, 1.0)):
+    def display_stl(self, data, color=(0.4, 0.7, 1.0), source=None):
         import os
 
         if isinstance(data, str):
@@ -285,40 +597,443 @@ class VTKQtViewer(QFrame):
 
         print(f"[OCC] Mesh جاهز للعرض: {polydata.GetNumberOfPoints()} نقاط")
 
-        # 🔹 تعديل موضع الشكل بحيث الركن الأدنى هو (0,0,0)
+        # 🔹 تعديل موضع الشكل بحيث الركن الأدنى هو (0,0,0) — عبر مصفوفة الكائن
+        #    (بدون نسخ النقاط، لذا تعديل الـ polydata في مكانه يظهر مباشرة)
         bounds = [0]*6
         polydata.GetBounds(bounds)
         dx, dy, dz = -bounds[0], -bounds[2], -bounds[4]
 
-        transform = vtk.vtkTransform()
-        transform.Translate(dx, dy, dz)
+        # 🧹 إزالة الشكل السابق فقط، ثم إضافته ككائن في المشهد
+        matrix = np.eye(4)
+        matrix[:3, 3] = (dx, dy, dz)
+        self._remove_display()
+        self._display_id = self.add_object(polydata, matrix, color=color, kind="display", source=source)
 
-        transform_filter = vtk.vtkTransformPolyDataFilter()
-        transform_filter.SetInputData(polydata)
-        transform_filter.SetTransform(transform)
-        transform_filter.Update()
-        polydata = transform_filter.GetOutput()
+        # 🔹 FitAll والكاميرا (الشبكة وأرقامها تتبع الكاميرا)
+        self.fit_view()
+        self.request_render()
+        print("✅ [Viewer] STL تم عرضه بنجاح بدون كراش ومع شبكة القياسات.")
+        return self._display_id
 
-        # ✅ إنشاء Mapper و Actor
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputData(polydata)
+    # -------------------------------------------------------------
+    # ✅ عرض بروفايل 2D (البلوكات كنسخ مشتركة)
+    # -------------------------------------------------------------
+    def display_profile(self, profile, color=(0.85, 0.85, 0.85)):
+        """عرض حلقات ProfileGeometry كخطوط — كل بلوك polydata/mapper واحد لكل نسخه."""
+        assembly = vtk.vtkAssembly()
+        mappers = {}
+        for poly, matrix in profile.vtk_instances():
+            mapper = mappers.get(id(poly))
+            if mapper is None:
+                mapper = vtk.vtkPolyDataMapper()
+                mapper.SetInputData(poly)
+                mappers[id(poly)] = mapper
+            actor = vtk.vtkActor()
+            actor.SetMapper(mapper)
+            actor.SetUserMatrix(matrix)
+            actor.GetProperty().SetColor(*color)
+            assembly.AddPart(actor)
+
+        if assembly.GetParts().GetNumberOfItems() == 0:
+            print("⚠️ [Viewer] البروفايل فارغ.")
+            return
+
+        self._remove_display()
+        self._display_id = self.add_actor(assembly, kind="profile", source=profile)
+
+        self.fit_view()
+        self.request_render()
+        print(f"✅ [Viewer] Profile displayed ({len(mappers)} shared meshes, "
+              f"{assembly.GetParts().GetNumberOfItems()} instances)")
+
+    # -------------------------------------------------------------
+    # ✅ عرض متعدد المستويات (LOD)
+    # -------------------------------------------------------------
+    def display_lod(self, mesh_for, levels=("coarse", "medium", "fine"), color=(0.4, 0.7, 1.0), source=None):
+        """عرض شكل بأخشن مستوى فوراً ثم رفع الدقة حسب حجمه على الشاشة.
+
+        mesh_for(level) → vtkPolyData (مخزّن مؤقتاً في الـ model)؛ المستويات الأدق
+        تُحسب في خيط عامل، لذا يجب أن تكون mesh_for آمنة من أي خيط.
+        """
+        polydata = mesh_for(levels[0])
+        self.display_stl(polydata, color=color, source=source)
+        if self._display_id is not None:
+            self.set_object_lod(self._display_id, mesh_for, levels)
+        return self._display_id
+
+    def set_object_lod(self, object_id, mesh_for, levels=("coarse", "medium", "fine"), level=0):
+        """تفعيل LOD لكائن موجود في المشهد (الـ mesh الحالي هو المستوى level)."""
+        self._lods[object_id] = {
+            "mesh_for": mesh_for,
+            "levels": tuple(levels),
+            "level": level,
+            "pending": None,
+        }
+        self._lod_timer.start(LOD_REFINE_DELAY_MS)
+
+    def _on_camera_modified(self, obj, event):
+        self._update_grid()
+        if self._lods:
+            self._lod_timer.start(LOD_REFINE_DELAY_MS)
+
+    def _projected_pixels(self, actor):
+        """قطر الكرة المحيطة بالكائن بالبكسل على الشاشة."""
+        x0, x1, y0, y1, z0, z1 = actor.GetBounds()
+        diameter = math.dist((x0, y0, z0), (x1, y1, z1))
+        height = self.render_window.GetSize()[1] or 1
+        cam = self.renderer.GetActiveCamera()
+        if cam.GetParallelProjection():
+            return diameter / (2.0 * cam.GetParallelScale()) * height
+        center = ((x0 + x1) / 2, (y0 + y1) / 2, (z0 + z1) / 2)
+        distance = max(math.dist(cam.GetPosition(), center), 1e-6)
+        view = 2.0 * distance * math.tan(math.radians(cam.GetViewAngle()) / 2.0)
+        return diameter / view * height
+
+    def _update_lod(self):
+        """اختيار المستوى لكل كائن حسب حجمه الظاهر؛ التحسين مستوى واحد في كل دورة (في الخلفية)."""
+        if self._interacting:
+            self._lod_timer.start(LOD_REFINE_DELAY_MS)
+            return
+        for object_id, lod in list(self._lods.items()):
+            if object_id not in self._actors:
+                del self._lods[object_id]
+                continue
+            if lod["pending"] is not None:
+                continue  # ننتظر نتيجة العامل، ثم يُعاد التقييم
+            pixels = self._projected_pixels(self._actors[object_id])
+            levels = lod["levels"]
+            target = max(i for i, name in enumerate(levels) if pixels >= LOD_MIN_PIXELS.get(name, 0))
+            if target == lod["level"]:
+                continue
+            # الأخشن محسوب مسبقاً — ننزل مباشرة؛ الأدق خطوة واحدة ثم نكمل لاحقاً
+            level = target if target < lod["level"] else lod["level"] + 1
+            lod["pending"] = level
+            self._run_in_background(
+                lambda mesh_for=lod["mesh_for"], name=levels[level]: mesh_for(name),
+                lambda polydata, oid=object_id, lod=lod, level=level, pixels=pixels:
+                    self._on_lod_mesh(oid, lod, level, polydata, pixels),
+            )
+
+    def _on_lod_mesh(self, object_id, lod, level, polydata, pixels):
+        lod["pending"] = None
+        if self._lods.get(object_id) is not lod:
+            return  # الكائن حُذف أو أُعيد تعريف الـ LOD أثناء الحساب
+        if polydata is None or polydata.GetNumberOfPoints() == 0:
+            return
+
+        # الموضع محفوظ في مصفوفة الكائن، لذا يكفي تبديل الـ mesh
+        self.set_object_mesh(object_id, polydata)
+        lod["level"] = level
+        self.request_render()
+        log.debug("[LOD] #%s %s (%.0fpx, %d triangles)", object_id, lod["levels"][level], pixels,
+                  polydata.GetNumberOfPolys())
+        # إعادة التقييم: ربما يلزم مستوى أدق، أو تغيّرت الكاميرا أثناء الحساب
+        self._lod_timer.start(0)
+
+    def _run_in_background(self, fn, on_done, pool=None):
+        """تشغيل fn() في خيط عامل؛ on_done(النتيجة) تُستدعى في خيط الواجهة."""
+        job = _BackgroundJob(fn)
+        self._jobs.add(job)
+
+        def finished(result):
+            self._jobs.discard(job)
+            on_done(result)
+
+        job.signals.done.connect(finished)
+        (pool or self._mesh_pool).start(job)
+        return job
+
+    def refresh_mesh(self, object_id=None):
+        """إعادة الرسم بعد تعديل polydata الكائن object_id في مكانه (مثل تغيير عمق الإكسترود)."""
+        actor = self._actors.get(object_id) if object_id is not None else self._last_actor
+        if actor is None:
+            return
+        self.scene.invalidate()
+        self.renderer.ResetCameraClippingRange()
+        self.request_render()
+
+    # -------------------------------------------------------------
+    # ✅ كائنات المشهد (عدة أجزاء، meshes مشتركة)
+    # -------------------------------------------------------------
+    def _mapper_for(self, mesh):
+        """mapper واحد لكل mesh مشترك بين عدة كائنات."""
+        entry = self._mappers.get(id(mesh))
+        if entry is None:
+            mapper = vtk.vtkPolyDataMapper()
+            mapper.SetInputData(mesh)
+            entry = [mapper, 0]
+            self._mappers[id(mesh)] = entry
+            self._schedule_reduction(mesh)
+        entry[1] += 1
+        return entry[0]
+
+    def _release_mapper(self, mesh):
+        entry = self._mappers.get(id(mesh))
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._mappers[id(mesh)]
+                self._reduced.pop(id(mesh), None)
+                self.pick_cache.discard(mesh)
+
+    def _register(self, obj, actor):
+        self._actors[obj.id] = actor
+        self._actor_ids[actor] = obj.id
+        self.renderer.AddActor(actor)
+        self._last_actor = actor
+        return obj.id
+
+    def add_object(self, mesh, matrix=None, color=(0.4, 0.7, 1.0), name="", kind="part", source=None):
+        """إضافة كائن للمشهد بدون حذف غيره — يُرجع رقم الكائن."""
+        obj = self.scene.add(mesh, matrix, name=name, kind=kind, color=color, source=source)
         actor = vtk.vtkActor()
-        actor.SetMapper(mapper)
+        actor.SetMapper(self._mapper_for(mesh))
+        actor.SetUserMatrix(_to_vtk_matrix(obj.matrix))
         actor.GetProperty().SetColor(*color)
         actor.GetProperty().SetInterpolationToPhong()
+        return self._register(obj, actor)
 
-        # 🧹 إزالة الشكل السابق فقط
-        if self._last_actor:
+    def add_actor(self, actor, name="", kind="part", source=None, local_bounds=None):
+        """تسجيل actor/assembly جاهز ككائن في المشهد (حدوده من الـ actor نفسه إن لم تُعطَ)."""
+        bounds = tuple(local_bounds if local_bounds is not None else actor.GetBounds())
+        obj = self.scene.add(None, name=name, kind=kind, source=source, local_bounds=bounds)
+        return self._register(obj, actor)
+
+    # -------------------------------------------------------------
+    # ✅ عرض بالنسخ (GPU instancing) — mesh واحد، N مصفوفة ولون
+    # -------------------------------------------------------------
+    def add_instances(self, mesh, matrices, colors=None, name="", kind="instances", source=None):
+        """N نسخة من mesh واحد بـ actor و vtkGlyph3DMapper واحد.
+
+        matrices: مصفوفات 4x4 لكل نسخة (دوران + تمديد على محاور الـ mesh + إزاحة)
+        colors:   ألوان RGB (0..1) لكل نسخة، أو None للون واحد
+        الذاكرة على الـ GPU = mesh واحد + (موضع، دوران، تمديد، لون) لكل نسخة.
+        """
+        mapper = vtk.vtkGlyph3DMapper()
+        mapper.SetSourceData(mesh)
+        mapper.SetInputData(instance_polydata(matrices, colors))
+        mapper.SetOrientationModeToQuaternion()
+        mapper.SetOrientationArray("Orientation")
+        mapper.SetScaleModeToScaleByVectorComponents()
+        mapper.SetScaleArray("Scale")
+        mapper.ScalingOn()
+        mapper.SetColorModeToDirectScalars()
+        mapper.SetScalarVisibility(colors is not None)
+
+        actor = vtk.vtkActor()
+        actor.SetMapper(mapper)
+        actor.GetProperty().SetInterpolationToPhong()
+        object_id = self.add_actor(actor, name=name, kind=kind, source=source,
+                                   local_bounds=instances_bounds(mesh, matrices))
+        self._instances[object_id] = (mesh, np.asarray(matrices, dtype=np.float64))
+        self.request_render()
+        log.debug("[Viewer] %d instances of one mesh (%d triangles)", len(matrices), mesh.GetNumberOfPolys())
+        return object_id
+
+    def set_instances(self, object_id, matrices, colors=None):
+        """تغيير المصفوفات/الألوان فقط — الـ mesh على الـ GPU لا يتغير."""
+        mesh, _ = self._instances[object_id]
+        mapper = self._actors[object_id].GetMapper()
+        mapper.SetInputData(instance_polydata(matrices, colors))
+        mapper.SetScalarVisibility(colors is not None)
+        self._instances[object_id] = (mesh, np.asarray(matrices, dtype=np.float64))
+        self.scene.get(object_id).local_bounds = instances_bounds(mesh, matrices)
+        self.scene.invalidate()
+        self.request_render()
+
+    def remove_object(self, object_id):
+        obj = self.scene.remove(object_id)
+        actor = self._actors.pop(object_id, None)
+        if actor is None:
+            return
+        self._actor_ids.pop(actor, None)
+        self._lods.pop(object_id, None)
+        instanced = self._instances.pop(object_id, None)
+        if instanced is not None:
+            self.pick_cache.discard(instanced[0])
+        self.renderer.RemoveActor(actor)
+        if obj is not None and obj.mesh is not None:
+            self._release_mapper(obj.mesh)
+        if self._last_actor is actor:
+            self._last_actor = None
+
+    def clear_objects(self):
+        for object_id in list(self._actors):
+            self.remove_object(object_id)
+        self._display_id = None
+
+    def _remove_display(self):
+        if self._display_id is not None:
+            self.remove_object(self._display_id)
+            self._display_id = None
+        elif self._last_actor is not None and self._last_actor not in self._actor_ids:
             self.renderer.RemoveActor(self._last_actor)
-        self._last_actor = actor
-        self.renderer.AddActor(actor)
 
-        # 🔹 تحديث شبكة القياسات حسب حدود الشكل الجديد
-        if hasattr(self, "cube_axes"):
-            self.cube_axes.SetBounds(actor.GetBounds())
+    def object_for_actor(self, actor):
+        """رقم الكائن الذي يملك الـ actor (أو الـ assembly التي تحتويه)."""
+        object_id = self._actor_ids.get(actor)
+        if object_id is None:
+            for oid, prop in self._actors.items():
+                if isinstance(prop, vtk.vtkAssembly) and prop.GetParts().IsItemPresent(actor):
+                    return oid
+        return object_id
 
-        # 🔹 FitAll والكاميرا
-        self.renderer.ResetCamera()
-        self.renderer.ResetCameraClippingRange()
-        self.render_window.Render()
-        print("✅ [Viewer] STL تم عرضه بنجاح بدون كراش ومع شبكة القياسات.")
+    def set_object_matrix(self, object_id, matrix):
+        self.scene.set_matrix(object_id, matrix)
+        self._actors[object_id].SetUserMatrix(_to_vtk_matrix(self.scene.get(object_id).matrix))
+
+    def move_object(self, object_id, dx=0, dy=0, dz=0):
+        matrix = self.scene.get(object_id).matrix.copy()
+        matrix[:3, 3] += (dx, dy, dz)
+        self.set_object_matrix(object_id, matrix)
+
+    def set_object_mesh(self, object_id, mesh):
+        obj = self.scene.get(object_id)
+        if obj.mesh is not None:
+            self._release_mapper(obj.mesh)
+        self.scene.set_mesh(object_id, mesh)
+        self._actors[object_id].SetMapper(self._mapper_for(mesh))
+
+    def visible_objects(self):
+        """أرقام الكائنات داخل مجال رؤية الكاميرا (استعلام الـ BVH)."""
+        width, height = self.render_window.GetSize()
+        planes = [0.0] * 24
+        self.renderer.GetActiveCamera().GetFrustumPlanes(width / max(height, 1), planes)
+        return self.scene.visible_in(np.reshape(planes, (6, 4)))
+
+
+class _JobSignals(QObject):
+    done = pyqtSignal(object)  # النتيجة (أو None عند الفشل) — تصل لخيط الواجهة كـ queued signal
+
+
+class _BackgroundJob(QRunnable):
+    """عمل واحد في QThreadPool (مثل Mesh مستوى LOD) — الواجهة تستلم النتيجة فقط."""
+
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.signals = _JobSignals()
+
+    def run(self):
+        try:
+            result = self.fn()
+        except Exception:
+            log.exception("[Viewer] خطأ في عمل الخلفية")
+            result = None
+        self.signals.done.emit(result)
+
+
+def _quadric_reduce(mesh):
+    """نسخة مبسطة (vtkQuadricClustering) للعرض أثناء التفاعل."""
+    clustering = vtk.vtkQuadricClustering()
+    clustering.SetInputData(mesh)
+    clustering.SetNumberOfDivisions(INTERACTION_DIVISIONS, INTERACTION_DIVISIONS, INTERACTION_DIVISIONS)
+    clustering.AutoAdjustNumberOfDivisionsOn()
+    clustering.Update()
+    return clustering.GetOutput()
+
+
+def _to_vtk_matrix(matrix):
+    m = vtk.vtkMatrix4x4()
+    for r in range(4):
+        for c in range(4):
+            m.SetElement(r, c, float(matrix[r][c]))
+    return m
+
+
+def grid_spacing(visible_width):
+    """أصغر مستوى تباعد لا يتجاوز عدد خطوطه الظاهرة GRID_MAX_VISIBLE_LINES."""
+    for spacing in GRID_SPACINGS:
+        if visible_width / spacing <= GRID_MAX_VISIBLE_LINES:
+            return spacing
+    return GRID_SPACINGS[-1]
+
+
+def grid_polydata(spacing, half_lines, center=(0.0, 0.0), major_every=GRID_MAJOR_EVERY):
+    """كل خطوط الشبكة (X و Y) في polydata واحد مبني بعملية NumPy واحدة.
+
+    الخطوط الرئيسية (كل major_every خط) لها لون أوضح عبر cell scalars.
+    """
+    k = np.arange(-half_lines, half_lines + 1)
+    n = len(k)
+    cx, cy = center
+    extent = half_lines * spacing
+    along = np.array([-extent, extent])
+
+    pts = np.zeros((2, n, 2, 3))
+    # خطوط موازية لـ X (y ثابت)
+    pts[0, :, :, 0] = cx + along
+    pts[0, :, :, 1] = (cy + k * spacing)[:, None]
+    # خطوط موازية لـ Y (x ثابت)
+    pts[1, :, :, 0] = (cx + k * spacing)[:, None]
+    pts[1, :, :, 1] = cy + along
+
+    # رقم الخط المطلق (ليبقى الخط الرئيسي رئيسياً بعد تحريك المركز)
+    index = np.concatenate([np.rint(cy / spacing) + k, np.rint(cx / spacing) + k]).astype(np.int64)
+    colors = np.where((index % major_every == 0)[:, None], GRID_MAJOR_COLOR, GRID_MINOR_COLOR).astype(np.uint8)
+
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(pts.reshape(-1, 3), deep=True))
+    lines = vtk.vtkCellArray()
+    lines.SetData(numpy_support.numpy_to_vtkIdTypeArray(np.arange(0, 4 * n + 1, 2, dtype=np.int64), deep=True),
+                  numpy_support.numpy_to_vtkIdTypeArray(np.arange(4 * n, dtype=np.int64), deep=True))
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points)
+    polydata.SetLines(lines)
+    scalars = numpy_support.numpy_to_vtk(colors, deep=True)
+    scalars.SetName("Colors")
+    polydata.GetCellData().SetScalars(scalars)
+    return polydata
+
+
+def instance_arrays(matrices):
+    """تفكيك مصفوفات 4x4 إلى (مواضع، quaternions بترتيب w,x,y,z، تمديد لكل محور).
+
+    vtkGlyph3DMapper يطبق Translate → Rotate → Scale، لذا يجب أن يكون الجزء 3x3
+    دوراناً × تمديداً على محاور الـ mesh (أعمدة متعامدة) — وهو حال قوائم القص.
+    """
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    linear = matrices[:, :3, :3]
+    scales = np.linalg.norm(linear, axis=1)
+    rotations = linear / np.where(scales > 0, scales, 1.0)[:, None, :]
+    gram = np.einsum("nij,nik->njk", rotations, rotations)
+    if not np.allclose(gram, np.eye(3), atol=1e-6):
+        raise ValueError("instance matrices must be rotation × per-axis scale (no shear)")
+    # انعكاس → تمديد سالب على المحور الثالث
+    mirrored = np.linalg.det(rotations) < 0
+    rotations[mirrored, :, 2] *= -1
+    scales[mirrored, 2] *= -1
+
+    quaternions = np.empty((len(matrices), 4))
+    q = [0.0] * 4
+    for i, r in enumerate(rotations):
+        vtk.vtkMath.Matrix3x3ToQuaternion(r.tolist(), q)
+        quaternions[i] = q
+    return matrices[:, :3, 3].copy(), quaternions, scales
+
+
+def instance_polydata(matrices, colors=None):
+    """نقطة لكل نسخة مع مصفوفات Orientation / Scale / Colors لـ vtkGlyph3DMapper."""
+    positions, quaternions, scales = instance_arrays(matrices)
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(positions, deep=True))
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points)
+    for name, values in (("Orientation", quaternions), ("Scale", scales)):
+        arr = numpy_support.numpy_to_vtk(np.ascontiguousarray(values), deep=True)
+        arr.SetName(name)
+        polydata.GetPointData().AddArray(arr)
+    if colors is not None:
+        rgb = np.clip(np.asarray(colors, dtype=np.float64).reshape(-1, 3) * 255.0, 0, 255).astype(np.uint8)
+        arr = numpy_support.numpy_to_vtk(rgb, deep=True)
+        arr.SetName("Colors")
+        polydata.GetPointData().SetScalars(arr)
+    return polydata
+
+
+def instances_bounds(mesh, matrices):
+    """حدود كل النسخ (ترتيب VTK) من حدود الـ mesh المحوّلة بكل مصفوفة."""
+    boxes = [transform_bounds(mesh.GetBounds(), m) for m in np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)]
+    lo = np.min([b[0] for b in boxes], axis=0)
+    hi = np.max([b[1] for b in boxes], axis=0)
+    return (float(lo[0]), float(hi[0]), float(lo[1]), float(hi[1]), float(lo[2]), float(hi[2]))